@@ -0,0 +1,210 @@
+"""Benchmarks for the layout model and the offscreen editor rendering paths.
+
+Results are written as JSON, so runs on the same machine can be compared to catch regressions:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from model.BuldingInstance import BuildingInstance, Position, Rotation, building_types
+from model.FactoryLayout import FactoryLayout, type_lookup
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+DEFAULT_MAX_GUI_SIZE = 10000
+GRID_SPACING = 30  # Meters between generated buildings, larger than any building
+
+def generate_layout(size: int, seed: int = 0) -> FactoryLayout:
+    """Generate a non-overlapping layout of size random buildings, on a square grid around the origin."""
+    rng = random.Random(seed)
+    columns = max(1, round(size ** 0.5))
+    offset = columns * GRID_SPACING // 2
+    layout = FactoryLayout()
+    layout.add_many([BuildingInstance(rng.choice(building_types),
+                                      Position((i % columns) * GRID_SPACING - offset, (i // columns) * GRID_SPACING - offset),
+                                      Rotation(rng.randrange(4)))
+                     for i in range(size)])
+    return layout
+
+def layout_bounds(layout: FactoryLayout) -> tuple[float, float, float, float]:
+    footprints = [b.footprint() for b in layout.buildings]
+    return (min(f[0] for f in footprints), min(f[1] for f in footprints),
+            max(f[2] for f in footprints), max(f[3] for f in footprints))
+
+def measure(function, setup=None, repeat: int = 5) -> float:
+    """Return the median duration of function in seconds. setup builds its argument, untimed."""
+    durations = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        function(argument) if setup else function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+## ======================================================
+## Model benchmarks
+## ======================================================
+
+def model_benchmarks(size: int, repeat: int) -> dict:
+    layout = generate_layout(size)
+    json_str = layout.serialize()
+    binary = layout.serialize_binary()
+    sublayout = generate_layout(min(size, 1000), seed=1)
+    buildings = layout.buildings
+
+    def remove_buildings(target):
+        for building in target.buildings[:100]:
+            target.remove_building(building)
+
+    return {
+        'serialize': measure(layout.serialize, repeat=repeat),
+        'deserialize': measure(lambda: FactoryLayout().deserialize(json_str, type_lookup), repeat=repeat),
+        'serialize_binary': measure(layout.serialize_binary, repeat=repeat),
+        'deserialize_binary': measure(lambda: FactoryLayout().deserialize_binary(binary, type_lookup), repeat=repeat),
+        'clone': measure(layout.clone, repeat=repeat),
+        'add_sublayout': measure(lambda target: target.add_sublayout(sublayout.clone(), 4, 4),
+                                 setup=layout.clone, repeat=repeat),
+        'create_from_buildings': measure(lambda: FactoryLayout.create_from_buildings(buildings), repeat=repeat),
+        'remove_building_x100': measure(remove_buildings, setup=layout.clone, repeat=repeat),
+    }
+
+## ======================================================
+## Offscreen editor benchmarks
+## ======================================================
+
+def gui_benchmarks(size: int, repeat: int) -> dict:
+    from PySide6.QtCore import QPointF, QRectF
+    from view.EditorScene import EditorScene
+    from view.EditorView import EditorView
+    from view.Minimap import MinimapView
+    from view.Settings import Settings
+
+    layout = generate_layout(size)
+    scene = EditorScene(None, layout)
+
+    # The editor's scene has a fixed size, it is grown to hold all buildings (and the border
+    # of 8 m the view draws inside it), so that the benchmarks scale with the layout
+    ppm = Settings.PIXELS_PER_METER
+    left, top, right, bottom = layout_bounds(layout)
+    margin = 16
+    scene.setSceneRect(scene.sceneRect().united(
+        QRectF((left - margin) * ppm, (top - margin) * ppm, (right - left + 2 * margin) * ppm, (bottom - top + 2 * margin) * ppm)))
+
+    view = EditorView(scene)
+    view.resize(1600, 1000)
+    minimap = MinimapView(view)
+    minimap.resize(200, 200)
+
+    # Items for the whole scene, the worst case of materializing the viewport's surroundings
+    results = {'scene_population': measure(lambda _: scene.materialize(scene.sceneRect()),
+                                           setup=scene.release_all_items, repeat=repeat)}
+    assert len(scene.building_items) == size, f'{len(scene.building_items)} of {size} buildings got an item'
+
+    # Rendering, zoomed in and zoomed all the way out
+    view.centerOn(0, 0)
+    results['draw_view'] = measure(lambda: view.viewport().grab(), repeat=repeat)
+    view.scale(0.1, 0.1)
+    view.update_scene_visible_rect()
+    results['draw_view_zoomed_out'] = measure(lambda: view.viewport().grab(), repeat=repeat)
+
+    def refresh_minimap():
+        minimap.invalidate_cache()
+        minimap.refresh_cache()
+    results['minimap_full_refresh'] = measure(refresh_minimap, repeat=repeat)
+    results['minimap_repaint'] = measure(lambda: minimap.viewport().grab(), repeat=repeat)
+
+    # Preview collision checks while sweeping diagonally over the layout
+    scene.set_preview(type_lookup['Constructor'])
+    positions = [QPointF((left + (right - left) * i / 200) * ppm, (top + (bottom - top) * i / 200) * ppm)
+                 for i in range(200)]
+
+    def sweep_preview():
+        for position in positions:
+            scene.last_mouse_scene_pos = position
+            scene.snap_preview_to_cursor()
+    results['preview_collisions_x200'] = measure(sweep_preview, repeat=repeat)
+
+    minimap.deleteLater()
+    view.deleteLater()
+    return results
+
+## ======================================================
+## Reporting
+## ======================================================
+
+def compare(results: dict, baseline: dict, tolerance: float) -> int:
+    """Print every benchmark next to its baseline, returns the number of regressions."""
+    regressions = 0
+    for name, duration in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f'{name:55} {duration * 1000:10.2f} ms  (new)')
+            continue
+        ratio = duration / reference if reference else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f'{name:55} {duration * 1000:10.2f} ms  {reference * 1000:10.2f} ms  x{ratio:.2f}{flag}')
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the layout model and the offscreen editor.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='layout sizes (buildings)')
+    parser.add_argument('--max-gui-size', type=int, default=DEFAULT_MAX_GUI_SIZE,
+                        help='largest layout used for the Qt benchmarks')
+    parser.add_argument('--no-gui', action='store_true', help='skip the Qt benchmarks')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark, the median is reported')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare against a previous JSON result file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='slowdown ratio reported as regression')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        for name, duration in model_benchmarks(size, args.repeat).items():
+            results[f'model.{name}[n={size}]'] = duration
+            print(f'model.{name}[n={size}]: {duration * 1000:.2f} ms')
+
+    if not args.no_gui:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PySide6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+
+        for size in args.sizes:
+            if size > args.max_gui_size:
+                continue
+            for name, duration in gui_benchmarks(size, args.repeat).items():
+                results[f'gui.{name}[n={size}]'] = duration
+                print(f'gui.{name}[n={size}]: {duration * 1000:.2f} ms')
+            app.processEvents()
+
+    if args.output:
+        with open(args.output, mode='w') as output_file:
+            json.dump({
+                'meta': {
+                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'repeat': args.repeat,
+                },
+                'results': results,
+            }, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare, mode='r') as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        print()
+        return 1 if compare(results, baseline, args.tolerance) else 0
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
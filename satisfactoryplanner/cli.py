@@ -0,0 +1,304 @@
+"""Headless command line tool for batch processing factory layouts.
+
+Only the model package is used here, so Qt is never imported and the tool starts fast.
+
+    python cli.py validate layouts/ --jobs 8
+    python cli.py stats factory.fl
+    python cli.py translate factory.fl moved.fl --dx 8 --dy -4
+    python cli.py merge merged.fl a.fl b.fl
+    python cli.py convert factory.fl factory.flb
+    python cli.py diff old.fl new.fl
+    python cli.py merge3 base.fl ours.fl theirs.fl -o merged.fl
+    python cli.py autolayout floor.fl --bill "40 Constructor, 20 Smelter" --width 120 --seconds 30
+
+merge3 follows the conventions of a git merge driver: it writes the result over ours
+and exits with 1 when there were conflicts. To use it for layouts in a repository:
+
+    git config merge.factorylayout.driver "python /path/to/cli.py merge3 %O %A %B"
+    echo "*.fl merge=factorylayout" >> .gitattributes
+"""
+import argparse
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from model.FactoryLayout import FactoryLayout, type_lookup, BINARY_EXTENSION, BINARY_MAGIC
+from model.LayoutDiff import diff_layouts, merge_layouts
+from model.BuldingInstance import BuildingInstance, Position, Rotation
+from model.Blueprint import BlueprintInstance
+
+LAYOUT_EXTENSIONS = ('.fl', BINARY_EXTENSION)
+
+def load_layout(file_name: str) -> FactoryLayout:
+    layout = FactoryLayout()
+    layout.load(file_name, type_lookup)
+    return layout
+
+def is_binary_layout(file_name: str) -> bool:
+    # Git hands merge drivers temporary files without the layout's extension
+    with open(file_name, 'rb') as layout_file:
+        return layout_file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def load_layout_any(file_name: str) -> FactoryLayout:
+    """Load a layout in either format, regardless of the file name."""
+    layout = FactoryLayout()
+    if is_binary_layout(file_name):
+        with open(file_name, 'rb') as layout_file:
+            layout.deserialize_binary(layout_file.read(), type_lookup)
+    else:
+        with open(file_name) as layout_file:
+            layout.deserialize(layout_file.read(), type_lookup)
+    return layout
+
+def collect_files(paths: list[str]) -> list[str]:
+    """Expand directories to the layout files they contain, recursively."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(LAYOUT_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+def run_for_files(function, files: list[str], jobs: int) -> list:
+    """Apply function to every file, across a process pool when there is more than one file."""
+    if jobs == 1 or len(files) < 2:
+        return [function(file_name) for file_name in files]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(function, files, chunksize=max(1, len(files) // (4 * (jobs or os.cpu_count() or 1)))))
+
+## ======================================================
+## Per-file tasks (top level, so they can run in worker processes)
+## ======================================================
+
+def validate_file(file_name: str) -> tuple[str, list[str]]:
+    """Return the problems found in a layout file."""
+    try:
+        layout = load_layout(file_name)
+    except KeyError as e:
+        return file_name, [f'unknown building type {e}']
+    except (OSError, ValueError) as e:
+        return file_name, [f'cannot be read: {e}']
+
+    # Every overlapping pair is reported once, overlaps() finds placed blueprints as well as buildings
+    problems = []
+    for building in layout.buildings:
+        for other in layout.overlaps(building):
+            if isinstance(other, BlueprintInstance) or other.id > building.id:
+                problems.append(f'{describe_instance(building)} overlaps {describe_instance(other)}')
+    for instance in layout.blueprint_map.values():
+        for other in layout.overlaps(instance):
+            if isinstance(other, BlueprintInstance) and other.id > instance.id:
+                problems.append(f'{describe_instance(instance)} overlaps {describe_instance(other)}')
+    return file_name, problems
+
+def describe_instance(instance: BuildingInstance | BlueprintInstance) -> str:
+    if isinstance(instance, BlueprintInstance):
+        return f'blueprint {instance.blueprint.name} at ({instance.position.x}, {instance.position.y})'
+    return f'{instance.type.name} at ({instance.position.x}, {instance.position.y})'
+
+def file_stats(file_name: str) -> tuple[str, dict | str]:
+    try:
+        layout = load_layout(file_name)
+    except (OSError, ValueError, KeyError) as e:
+        return file_name, f'cannot be read: {e}'
+
+    buildings = layout.buildings
+    stats = {
+        'buildings': len(buildings),
+        'types': Counter(b.type.name for b in buildings),
+        'area': sum(b.type.width * b.type.length for b in buildings),
+    }
+    if buildings:
+        footprints = [b.footprint() for b in buildings]
+        stats['bounds'] = (min(f[0] for f in footprints), min(f[1] for f in footprints),
+                           max(f[2] for f in footprints), max(f[3] for f in footprints))
+    return file_name, stats
+
+## ======================================================
+## Commands
+## ======================================================
+
+def report_failure(command: str, error: Exception) -> int:
+    """Print why a command could not read or write its layouts and return the exit status."""
+    if isinstance(error, KeyError):
+        print(f'{command}: unknown building type or recipe {error}', file=sys.stderr)
+    else:
+        print(f'{command}: {error}', file=sys.stderr)
+    return 2
+
+def command_validate(args) -> int:
+    invalid = 0
+    for file_name, problems in run_for_files(validate_file, collect_files(args.paths), args.jobs):
+        if problems:
+            invalid += 1
+            print(f'{file_name}: {len(problems)} problem(s)')
+            for problem in problems:
+                print(f'  {problem}')
+        elif not args.quiet:
+            print(f'{file_name}: OK')
+    return 1 if invalid else 0
+
+def command_stats(args) -> int:
+    failed = 0
+    for file_name, stats in run_for_files(file_stats, collect_files(args.paths), args.jobs):
+        if isinstance(stats, str):
+            failed += 1
+            print(f'{file_name}: {stats}')
+            continue
+
+        print(f'{file_name}: {stats["buildings"]} buildings, {stats["area"]} m² footprint')
+        if 'bounds' in stats:
+            left, top, right, bottom = stats['bounds']
+            print(f'  bounds: ({left}, {top}) - ({right}, {bottom}), {right - left} x {bottom - top} m')
+        for name, count in stats['types'].most_common():
+            print(f'  {count:6} {name}')
+    return 1 if failed else 0
+
+def command_translate(args) -> int:
+    try:
+        layout = load_layout(args.input)
+        layout.translate(args.dx, args.dy)
+        layout.save(args.output)
+    except (OSError, ValueError, KeyError) as e:
+        return report_failure('translate', e)
+    return 0
+
+def command_merge(args) -> int:
+    merged = FactoryLayout()
+    try:
+        for file_name in args.inputs:
+            merged.add_sublayout(load_layout(file_name), 0, 0)
+        merged.save(args.output)
+    except (OSError, ValueError, KeyError) as e:
+        return report_failure('merge', e)
+    return 0
+
+def command_convert(args) -> int:
+    try:
+        load_layout(args.input).save(args.output)
+    except (OSError, ValueError, KeyError) as e:
+        return report_failure('convert', e)
+    return 0
+
+def command_diff(args) -> int:
+    try:
+        old, new = load_layout_any(args.old), load_layout_any(args.new)
+    except (OSError, ValueError, KeyError) as e:
+        return report_failure('diff', e)
+    diff = diff_layouts(old, new)
+    for line in diff.describe():
+        print(line)
+    if not args.quiet:
+        print(f'{len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changes)} changed, '
+              f'{len(diff.matches) - len(diff.changes)} unchanged buildings', file=sys.stderr)
+    return 1 if diff else 0
+
+def command_merge3(args) -> int:
+    output = args.output or args.ours
+    try:
+        binary = is_binary_layout(args.ours)
+        base, ours, theirs = load_layout_any(args.base), load_layout_any(args.ours), load_layout_any(args.theirs)
+    except (OSError, ValueError, KeyError) as e:
+        return report_failure('merge3', e)
+    result = merge_layouts(base, ours, theirs)
+    if binary:
+        with open(output, 'wb') as output_file:
+            output_file.write(result.layout.serialize_binary())
+    else:
+        with open(output, 'w') as output_file:
+            output_file.write(result.layout.serialize())
+
+    for conflict in result.conflicts:
+        print(f'conflict: {conflict}', file=sys.stderr)
+    return 1 if result.conflicts else 0
+
+def command_autolayout(args) -> int:
+    # NumPy takes longer to import than the other commands take to run, only this one needs it
+    from model.AutoLayout import AutoLayout, parse_bill
+
+    try:
+        if args.layout:
+            buildings = load_layout(args.layout).buildings
+        else:
+            buildings = [BuildingInstance(building_type, Position(0, 0), Rotation.DEG_0)
+                         for building_type in parse_bill(args.bill)]
+        search = AutoLayout(buildings, args.width, args.height, args.clearance, args.seconds, args.jobs)
+    except (OSError, ValueError, KeyError) as e:
+        return report_failure('autolayout', e)
+
+    def report(result):
+        if not args.quiet:
+            print(f'{result.seconds:6.1f} s  {result.width} x {result.height} m, '
+                  f'{result.evaluations} arrangements tried', file=sys.stderr)
+    result = search.run(report)
+    result.layout.save(args.output)
+    if not result.fits:
+        print(f'{args.output}: needs {result.width} x {result.height} m, more than the area', file=sys.stderr)
+    return 0 if result.fits else 1
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Batch processing of Satisfactory factory layouts, without the GUI.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    validate = commands.add_parser('validate', help='check layouts for overlapping and unknown buildings')
+    validate.add_argument('paths', nargs='+', help='layout files or directories')
+    validate.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    validate.add_argument('-q', '--quiet', action='store_true', help='only report invalid layouts')
+    validate.set_defaults(run=command_validate)
+
+    stats = commands.add_parser('stats', help='print building statistics')
+    stats.add_argument('paths', nargs='+', help='layout files or directories')
+    stats.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    stats.set_defaults(run=command_stats)
+
+    translate = commands.add_parser('translate', help='move every building of a layout')
+    translate.add_argument('input')
+    translate.add_argument('output')
+    translate.add_argument('--dx', type=int, default=0, help='offset in meters')
+    translate.add_argument('--dy', type=int, default=0, help='offset in meters')
+    translate.set_defaults(run=command_translate)
+
+    merge = commands.add_parser('merge', help='combine several layouts into one')
+    merge.add_argument('output')
+    merge.add_argument('inputs', nargs='+')
+    merge.set_defaults(run=command_merge)
+
+    convert = commands.add_parser('convert', help=f'convert between JSON (.fl) and binary ({BINARY_EXTENSION}) layouts')
+    convert.add_argument('input')
+    convert.add_argument('output')
+    convert.set_defaults(run=command_convert)
+
+    diff = commands.add_parser('diff', help='list the buildings added, removed, moved or changed between two layouts')
+    diff.add_argument('old')
+    diff.add_argument('new')
+    diff.add_argument('-q', '--quiet', action='store_true', help='do not print the summary')
+    diff.set_defaults(run=command_diff)
+
+    merge3 = commands.add_parser('merge3', help='three-way merge of two edited versions of a layout')
+    merge3.add_argument('base', help='the common ancestor')
+    merge3.add_argument('ours')
+    merge3.add_argument('theirs')
+    merge3.add_argument('-o', '--output', help='merged layout (default: overwrite ours)')
+    merge3.set_defaults(run=command_merge3)
+
+    autolayout = commands.add_parser('autolayout', help='arrange buildings compactly without overlaps')
+    autolayout.add_argument('output')
+    source = autolayout.add_mutually_exclusive_group(required=True)
+    source.add_argument('--bill', help='buildings to arrange, e.g. "8 Constructor, 4 Smelter"')
+    source.add_argument('--layout', help='rearrange the buildings of this layout')
+    autolayout.add_argument('--width', type=int, default=200, help='width of the area in meters')
+    autolayout.add_argument('--height', type=int, default=200, help='length of the area in meters')
+    autolayout.add_argument('--clearance', type=int, default=2, help='meters kept free around every building')
+    autolayout.add_argument('--seconds', type=float, default=10.0, help='time budget of the search')
+    autolayout.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    autolayout.add_argument('-q', '--quiet', action='store_true', help='do not report the progress')
+    autolayout.set_defaults(run=command_autolayout)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
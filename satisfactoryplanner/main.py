@@ -1,9 +1,12 @@
+import time
+start_time = time.perf_counter()
+
 import sys
 from PySide6.QtWidgets import QApplication
 from view.MainWindow import MainWindow
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    main_window = MainWindow()
+    main_window = MainWindow(start_time)
     main_window.showMaximized()
     sys.exit(app.exec())
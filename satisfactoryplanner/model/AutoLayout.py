@@ -0,0 +1,283 @@
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from model.BuldingInstance import BuildingInstance, BuildingType, Position, Rotation
+from model.FactoryLayout import FactoryLayout, type_lookup
+
+def parse_bill(text: str) -> list[BuildingType]:
+    """Parse a bill of buildings like '8 Constructor, 2 Assembler' into one type per building.
+
+    The count is optional and defaults to one, type names are matched ignoring case.
+    """
+    types_by_name = {name.lower(): building_type for name, building_type in type_lookup.items()}
+    types = []
+    for entry in text.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        count, _, name = entry.partition(' ')
+        if count.isdigit():
+            count, name = int(count), name.strip()
+        else:
+            count, name = 1, entry
+        building_type = types_by_name.get(name.lower())
+        if building_type is None:
+            raise ValueError(f'Unknown building type {name!r}')
+        types += [building_type] * count
+    return types
+
+@dataclass(frozen=True)
+class PackingProblem:
+    """The buildings to pack, by type name so the problem can be sent to worker processes,
+    and the area to pack them into. All sizes are in whole meters.
+
+    Every building claims a slot of its size plus the clearance kept free for walkways
+    and conveyors.
+    """
+    type_names: tuple
+    width: int
+    height: int
+    clearance: int = 2
+
+    def slot_sizes(self) -> list[tuple[int, int]]:
+        """Return the unrotated (width, length) of every building's slot."""
+        sizes = []
+        for name in self.type_names:
+            building_type = type_lookup[name]
+            sizes.append((building_type.width + self.clearance, building_type.length + self.clearance))
+        return sizes
+
+@dataclass
+class Packing:
+    """A point of the search space, decoded by pack().
+
+    The buildings are dropped into a strip of strip_width meters one after the other,
+    each in the lowest, then leftmost, spot along the skyline of the ones before it.
+    """
+    order: list       # Building indices in the order they are dropped
+    turned: list      # Per building, whether it is preferably placed rotated by 90 degrees
+    strip_width: int
+    cost: float = math.inf
+    slots: list = None     # Per building, the (left, top, turned) of its slot as placed
+    extent: tuple = (0, 0)  # Width and height of the packed slots
+
+OVERFLOW_WEIGHT = 4  # Cost of every square meter sticking out of the area, relative to one inside it
+
+def pack(problem: PackingProblem, sizes: list[tuple[int, int]], packing: Packing) -> Packing:
+    """Place the buildings of a packing and compute its cost, the area of the packed slots."""
+    heights = np.zeros(packing.strip_width, dtype=np.int32)
+    slots = [None] * len(sizes)
+    used_width = 0
+    for i in packing.order:
+        turned = packing.turned[i]
+        width, length = sizes[i][::-1] if turned else sizes[i]
+        if width > packing.strip_width:  # Only fits the strip the other way around
+            width, length, turned = length, width, not turned
+        tops = sliding_window_view(heights, width).max(axis=1)
+        left = int(tops.argmin())
+        top = int(tops[left])
+        heights[left:left + width] = top + length
+        slots[i] = (left, top, turned)
+        used_width = max(used_width, left + width)
+
+    used_height = int(heights.max())
+    packing.slots = slots
+    packing.extent = (used_width, used_height)
+    packing.cost = used_width * used_height + OVERFLOW_WEIGHT * max(0, used_height - problem.height) * used_width
+    return packing
+
+def neighbor(packing: Packing, rng: random.Random, min_width: int, max_width: int) -> Packing:
+    """Return a copy of the packing with one small random change."""
+    order, turned, strip_width = list(packing.order), list(packing.turned), packing.strip_width
+    move = rng.random()
+    if move < 0.4:
+        i, j = rng.randrange(len(order)), rng.randrange(len(order))
+        order[i], order[j] = order[j], order[i]
+    elif move < 0.7:
+        order.insert(rng.randrange(len(order)), order.pop(rng.randrange(len(order))))
+    elif move < 0.9:
+        i = rng.randrange(len(turned))
+        turned[i] = not turned[i]
+    else:
+        step = rng.randint(1, max(1, strip_width // 8))
+        strip_width = min(max_width, max(min_width, strip_width + rng.choice((-step, step))))
+    return Packing(order, turned, strip_width)
+
+def width_range(problem: PackingProblem, sizes: list[tuple[int, int]]) -> tuple[int, int]:
+    """The strip widths worth trying: wide enough for every building in one of its orientations."""
+    return max(min(size) for size in sizes), problem.width
+
+def anneal(problem: PackingProblem, start: Packing, seed: int, seconds: float,
+           temperature: float) -> tuple[Packing, int]:
+    """Simulated annealing from start for a number of seconds, run in the worker processes.
+
+    temperature is the fraction of the start's cost a worsening move may add and still be
+    accepted half of the time, it falls to a hundredth of that by the end. Returns the best
+    packing found and the number of packings evaluated.
+    """
+    rng = random.Random(seed)
+    sizes = problem.slot_sizes()
+    min_width, max_width = width_range(problem, sizes)
+    current = best = pack(problem, sizes, Packing(list(start.order), list(start.turned), start.strip_width))
+    start_temperature = temperature * current.cost / math.log(2)
+    evaluations = 1
+
+    start_time = time.perf_counter()
+    while (elapsed := time.perf_counter() - start_time) < seconds:
+        candidate = pack(problem, sizes, neighbor(current, rng, min_width, max_width))
+        evaluations += 1
+        delta = candidate.cost - current.cost
+        current_temperature = start_temperature * 0.01 ** (elapsed / seconds)
+        if delta <= 0 or (current_temperature > 0 and rng.random() < math.exp(-delta / current_temperature)):
+            current = candidate
+            if current.cost < best.cost:
+                best = current
+    return best, evaluations
+
+@dataclass
+class PackingResult:
+    layout: FactoryLayout  # The arranged buildings, with the top left corner of the packing at the origin
+    width: int
+    height: int
+    fits: bool             # Whether the arrangement fits into the requested area
+    evaluations: int       # Packings evaluated so far
+    seconds: float
+
+class AutoLayout:
+    """Search for a compact, non-overlapping arrangement of buildings inside an area.
+
+    A few bin packing heuristics give the starting point. The search then runs in rounds:
+    in every round each worker process anneals from the best packing found so far with its
+    own random seed, and the best of their results starts the next round. The temperature
+    falls with the remaining time, so the search goes from exploring to refining within
+    the time budget. Every improvement is reported as it is found.
+
+    The buildings keep their type, recipe and, as far as the chosen orientation allows,
+    their rotation. A bill of new buildings is given as unplaced building instances.
+    """
+
+    ROUND_SECONDS = 0.5
+    START_TEMPERATURE = 0.01
+
+    def __init__(self, buildings: list[BuildingInstance], width: int, height: int, clearance: int = 2,
+                 seconds: float = 10.0, jobs: int = None) -> None:
+        self.buildings = list(buildings)
+        self.problem = PackingProblem(tuple(b.type.name for b in self.buildings), width, height, clearance)
+        self.seconds = seconds
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cancelled = threading.Event()
+
+        if not self.buildings:
+            raise ValueError('There are no buildings to arrange')
+        sizes = self.problem.slot_sizes()
+        for building, size in zip(self.buildings, sizes):
+            if min(size) > width:
+                raise ValueError(f'{building.type.name} does not fit into an area {width} m wide')
+
+    def start(self, on_progress=None) -> Future:
+        """Run the search on a background thread. on_progress is called on that thread."""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self.run(on_progress))
+            except Exception as e:
+                future.set_exception(e)
+        threading.Thread(target=run, name='AutoLayout', daemon=True).start()
+        return future
+
+    def cancel(self) -> None:
+        """Stop the search after the current round, it still returns the best packing so far."""
+        self.cancelled.set()
+
+    def run(self, on_progress=None) -> PackingResult:
+        """Search until the time budget is used up and return the best arrangement."""
+        start_time = time.perf_counter()
+        best = self.initial_packing()
+        evaluations = 0
+        if on_progress is not None:
+            on_progress(self.result(best, evaluations, 0.0))
+
+        if self.jobs == 1:
+            submit = lambda *args: _completed(anneal(*args))
+            pool = None
+        else:
+            # The editor runs Qt threads, which a forked worker would inherit in an unusable state
+            pool = ProcessPoolExecutor(max_workers=self.jobs, mp_context=multiprocessing.get_context('spawn'))
+            submit = lambda *args: pool.submit(anneal, *args)
+
+        seed = 0
+        try:
+            while not self.cancelled.is_set():
+                remaining = self.seconds - (time.perf_counter() - start_time)
+                if remaining <= 0:
+                    break
+                temperature = self.START_TEMPERATURE * remaining / self.seconds
+                futures = [submit(self.problem, best, seed + job, min(self.ROUND_SECONDS, remaining), temperature)
+                           for job in range(self.jobs)]
+                seed += self.jobs
+
+                improved = False
+                for future in futures:
+                    packing, count = future.result()
+                    evaluations += count
+                    if packing.cost < best.cost:
+                        best, improved = packing, True
+                if improved and on_progress is not None:
+                    on_progress(self.result(best, evaluations, time.perf_counter() - start_time))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        return self.result(best, evaluations, time.perf_counter() - start_time)
+
+    def initial_packing(self) -> Packing:
+        """Return the best of the classic orderings (largest first, tallest first) over a few strip widths."""
+        sizes = self.problem.slot_sizes()
+        min_width, max_width = width_range(self.problem, sizes)
+        indices = range(len(sizes))
+        orders = [sorted(indices, key=lambda i: -sizes[i][0] * sizes[i][1]),
+                  sorted(indices, key=lambda i: -max(sizes[i]))]
+        turnings = [[False] * len(sizes), [w > l for w, l in sizes], [w < l for w, l in sizes]]
+
+        square_width = math.isqrt(sum(w * l for w, l in sizes))
+        widths = {min(max_width, max(min_width, round(square_width * factor))) for factor in (0.8, 1.0, 1.25, 1.6)}
+        widths.add(max_width)
+
+        candidates = [pack(self.problem, sizes, Packing(list(order), list(turned), width))
+                      for order in orders for turned in turnings for width in widths]
+        return min(candidates, key=lambda packing: packing.cost)
+
+    def result(self, packing: Packing, evaluations: int, seconds: float) -> PackingResult:
+        width, height = packing.extent
+        return PackingResult(self.to_layout(packing), width, height, height <= self.problem.height,
+                             evaluations, seconds)
+
+    def to_layout(self, packing: Packing) -> FactoryLayout:
+        """Create copies of the buildings at their packed positions, with their edges on the meter grid."""
+        clearance = self.problem.clearance
+        layout = FactoryLayout()
+        for building, (left, top, turned) in zip(self.buildings, packing.slots):
+            width, length = building.type.width, building.type.length
+            if turned:
+                width, length = length, width
+
+            clone = building.clone()
+            clone.position = Position(left + clearance // 2 + width / 2, top + clearance // 2 + length / 2)
+            if (building.rotation.value % 2 == 1) != turned:
+                clone.rotation = Rotation((building.rotation.value + 1) % 4)
+            layout.add_building(clone)
+        return layout
+
+def _completed(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
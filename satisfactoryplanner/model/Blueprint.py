@@ -0,0 +1,132 @@
+import math
+
+from model.BuldingInstance import BuildingInstance, Position, Rotation
+from model.SpatialIndex import Bounds, bounds_intersect
+from model.Conveyor import Conveyor
+
+def rotate_point(x: float, y: float, turns: int) -> tuple[float, float]:
+    """Rotate a point around the origin by clockwise quarter turns."""
+    for _ in range(turns % 4):
+        x, y = -y, x
+    return x, y
+
+def rotate_bounds(bounds: Bounds, turns: int) -> Bounds:
+    left, top, right, bottom = bounds
+    xs, ys = zip(*(rotate_point(x, y, turns) for x, y in ((left, top), (right, bottom))))
+    return min(xs), min(ys), max(xs), max(ys)
+
+class Blueprint:
+    """A named group of buildings, and the conveyors between them, centered on its origin.
+
+    The bounds and building footprints are computed once, so placed instances can be
+    drawn and collision checked without expanding them into buildings.
+    """
+
+    def __init__(self, name: str, layout) -> None:
+        self.name = name
+        self.layout = layout
+        self.footprints = [b.footprint() for b in layout.buildings]
+        if self.footprints:
+            self.bounds = (min(f[0] for f in self.footprints), min(f[1] for f in self.footprints),
+                           max(f[2] for f in self.footprints), max(f[3] for f in self.footprints))
+        else:
+            self.bounds = (0, 0, 0, 0)
+
+    def __len__(self) -> int:
+        return len(self.layout)
+
+    @staticmethod
+    def from_buildings(name: str, buildings: list[BuildingInstance]) -> 'Blueprint':
+        """Create a blueprint from copies of the buildings, moved so their bounding box is centered on the origin."""
+        from model.FactoryLayout import FactoryLayout  # FactoryLayout itself depends on this module
+
+        copied = FactoryLayout.create_from_buildings(buildings)
+        footprints = [b.footprint() for b in copied.buildings]
+        center_x = round((min(f[0] for f in footprints) + max(f[2] for f in footprints)) / 2) if footprints else 0
+        center_y = round((min(f[1] for f in footprints) + max(f[3] for f in footprints)) / 2) if footprints else 0
+
+        layout = FactoryLayout()
+        layout.add_sublayout(copied, -center_x, -center_y)
+        return Blueprint(name, layout)
+
+class BlueprintInstance:
+    """A placed blueprint: a reference to the blueprint plus a position and rotation.
+
+    It takes part in collision checks with the blueprint's precomputed footprints and
+    is only turned into individual buildings by expand().
+    """
+
+    def __init__(self, blueprint: Blueprint, position: Position, rotation: Rotation) -> None:
+        self.blueprint = blueprint
+        self.position = position
+        self.rotation = rotation
+        self.id = None  # Stable id, assigned by the layout the instance is added to
+        self.layout = None
+        self._footprints = None
+        self._footprints_key = None
+
+    def clone(self) -> 'BlueprintInstance':
+        return BlueprintInstance(self.blueprint, Position.from_units(*self.position.units), self.rotation)
+
+    def transform_bounds(self, bounds: Bounds) -> Bounds:
+        left, top, right, bottom = rotate_bounds(bounds, self.rotation.value)
+        return (left + self.position.x, top + self.position.y, right + self.position.x, bottom + self.position.y)
+
+    def footprint(self) -> Bounds:
+        return self.transform_bounds(self.blueprint.bounds)
+
+    def footprints(self) -> list[Bounds]:
+        """Return the footprints of the blueprint's buildings at this instance's position and rotation."""
+        key = (self.position.units, self.rotation)
+        if key != self._footprints_key:
+            self._footprints = [self.transform_bounds(f) for f in self.blueprint.footprints]
+            self._footprints_key = key
+        return self._footprints
+
+    def overlaps(self, bounds: Bounds) -> bool:
+        return any(bounds_intersect(f, bounds) for f in self.footprints())
+
+    def covers(self, x: float, y: float) -> bool:
+        return any(left < x < right and top < y < bottom for left, top, right, bottom in self.footprints())
+
+    def move_to(self, x: int, y: int) -> None:
+        if self.layout is not None:
+            raise ValueError('Placed blueprint instances cannot be moved')
+        self.position.x = x
+        self.position.y = y
+
+    def rotate_clockwise(self) -> None:
+        if self.layout is not None:
+            raise ValueError('Placed blueprint instances cannot be rotated')
+        self.rotation = self.rotation.rotate_clockwise()
+
+    def expand(self) -> tuple[list[BuildingInstance], list[Conveyor]]:
+        """Create the buildings and conveyors this instance stands for, in world coordinates."""
+        turns = self.rotation.value
+        clones = {}
+        for building in self.blueprint.layout.buildings:
+            x, y = rotate_point(building.position.x, building.position.y, turns)
+            clones[building] = BuildingInstance(building.type, Position(x + self.position.x, y + self.position.y),
+                                                Rotation((building.rotation.value + turns) % 4), building.recipe)
+
+        conveyors = []
+        for conveyor in self.blueprint.layout.conveyors:
+            path = []
+            for cell_x, cell_y in conveyor.path:
+                # Cells are rotated around their centers
+                x, y = rotate_point(cell_x + 0.5, cell_y + 0.5, turns)
+                path.append((math.floor(x) + self.position.x, math.floor(y) + self.position.y))
+            conveyors.append(Conveyor(clones[conveyor.source], clones[conveyor.target], path))
+        return list(clones.values()), conveyors
+
+    def to_dict(self) -> dict:
+        return {
+            "blueprint": self.blueprint.name,
+            "position": {"x": self.position.x, "y": self.position.y},
+            "rotation": self.rotation.value
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, blueprints: dict) -> 'BlueprintInstance':
+        return cls(blueprints[data["blueprint"]], Position(data["position"]["x"], data["position"]["y"]),
+                   Rotation(data["rotation"]))
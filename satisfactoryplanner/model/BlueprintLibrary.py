@@ -0,0 +1,42 @@
+import os
+
+from model.Blueprint import Blueprint
+from model.FactoryLayout import FactoryLayout, type_lookup, BINARY_EXTENSION
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.satisfactoryplanner', 'blueprints')
+
+class BlueprintLibrary:
+    """Named blueprints stored as binary layout files in a directory, loaded on first use."""
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY) -> None:
+        self.directory = directory
+        self.loaded = {}  # Name -> Blueprint
+
+    def path(self, name: str) -> str:
+        if not name or os.sep in name or (os.altsep and os.altsep in name) or name.startswith('.'):
+            raise ValueError(f'Invalid blueprint name {name!r}')
+        return os.path.join(self.directory, name + BINARY_EXTENSION)
+
+    def names(self) -> list[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(file_name[:-len(BINARY_EXTENSION)] for file_name in os.listdir(self.directory)
+                      if file_name.endswith(BINARY_EXTENSION))
+
+    def load(self, name: str) -> Blueprint:
+        blueprint = self.loaded.get(name)
+        if blueprint is None:
+            layout = FactoryLayout()
+            layout.load(self.path(name), type_lookup)
+            blueprint = self.loaded[name] = Blueprint(name, layout)
+        return blueprint
+
+    def save(self, blueprint: Blueprint) -> None:
+        path = self.path(blueprint.name)
+        os.makedirs(self.directory, exist_ok=True)
+        blueprint.layout.save(path)
+        self.loaded[blueprint.name] = blueprint
+
+    def delete(self, name: str) -> None:
+        os.remove(self.path(name))
+        self.loaded.pop(name, None)
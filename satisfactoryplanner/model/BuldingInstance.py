@@ -1,5 +1,14 @@
+import math
+import os
 from dataclasses import dataclass
 from enum import Enum
+from model.Recipe import Recipe, recipe_lookup, recipes_for
+
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources')
+
+def resource_path(file_name: str) -> str:
+    """Return the path of a bundled resource, independent of the working directory."""
+    return os.path.join(RESOURCES_DIR, file_name)
 
 class Rotation(Enum):
     DEG_0 = 0
@@ -13,10 +22,77 @@ class Rotation(Enum):
     def rotate_counterclockwise(self):
         return Rotation((self.value - 1) % 4)
 
-@dataclass
+# Positions are fixed point: whole numbers of half meters, so buildings with an odd width or
+# length can be centered between two grid lines and still be compared and hashed exactly
+UNITS_PER_METER = 2
+
+def to_units(meters: float) -> int:
+    """Snap a length in meters to the nearest whole number of position units, halves rounding up."""
+    return math.floor(meters * UNITS_PER_METER + 0.5)
+
+def offset_units(meters: float) -> int:
+    """Convert an offset in meters to position units. Offsets are not snapped, moving by a rounded
+    offset would silently move somewhere else, so ValueError is raised unless it is a whole number of units."""
+    units = meters * UNITS_PER_METER
+    if units != int(units):
+        raise ValueError(f'Offset of {meters} m is not a multiple of {1 / UNITS_PER_METER} m')
+    return int(units)
+
+def to_meters(units: int) -> int | float:
+    """Convert position units to meters, exactly. Whole meters stay ints."""
+    meters, rest = divmod(units, UNITS_PER_METER)
+    return meters if not rest else units / UNITS_PER_METER
+
 class Position:
-    x: int
-    y: int
+    """A point in the layout, held as integer position units.
+
+    x and y read and write meters. Written values are snapped to the nearest unit, so
+    arithmetic on positions cannot drift off the grid. x_units and y_units are exact and
+    meant for keys and comparisons.
+    """
+
+    __slots__ = ('x_units', 'y_units')
+
+    def __init__(self, x: float, y: float) -> None:
+        self.x_units = to_units(x)
+        self.y_units = to_units(y)
+
+    @classmethod
+    def from_units(cls, x_units: int, y_units: int) -> 'Position':
+        position = cls.__new__(cls)
+        position.x_units = x_units
+        position.y_units = y_units
+        return position
+
+    @property
+    def x(self) -> int | float:
+        return to_meters(self.x_units)
+
+    @x.setter
+    def x(self, meters: float) -> None:
+        self.x_units = to_units(meters)
+
+    @property
+    def y(self) -> int | float:
+        return to_meters(self.y_units)
+
+    @y.setter
+    def y(self, meters: float) -> None:
+        self.y_units = to_units(meters)
+
+    @property
+    def units(self) -> tuple[int, int]:
+        return self.x_units, self.y_units
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Position):
+            return NotImplemented
+        return self.x_units == other.x_units and self.y_units == other.y_units
+
+    __hash__ = None  # Positions are changed in place, units is the key to use
+
+    def __repr__(self) -> str:
+        return f'Position(x={self.x!r}, y={self.y!r})'
 
 @dataclass
 class BuildingType:
@@ -26,72 +102,132 @@ class BuildingType:
     category: str
     icon: str
 
+    @property
+    def recipes(self) -> list[Recipe]:
+        return recipes_for(self.name)
+
 building_types = [
     # Production
-    BuildingType('Constructor', 8, 10, 'Production', './resources/Constructor.png'),
-    BuildingType('Assembler', 10, 15, 'Production', './resources/Assembler.jpg'),
-    BuildingType('Manufacturer', 18, 20, 'Production', './resources/Manufacturer.png'),
-    BuildingType('Foundry', 10, 9, 'Production', './resources/Foundry.png'),
-    BuildingType('Smelter', 6, 9, 'Production', './resources/Smelter.png'),
-    BuildingType('Refinery', 10, 20, 'Production', './resources/Refinery.png'),
+    BuildingType('Constructor', 8, 10, 'Production', resource_path('Constructor.png')),
+    BuildingType('Assembler', 10, 15, 'Production', resource_path('Assembler.jpg')),
+    BuildingType('Manufacturer', 18, 20, 'Production', resource_path('Manufacturer.png')),
+    BuildingType('Foundry', 10, 9, 'Production', resource_path('Foundry.png')),
+    BuildingType('Smelter', 6, 9, 'Production', resource_path('Smelter.png')),
+    BuildingType('Refinery', 10, 20, 'Production', resource_path('Refinery.png')),
 
     # Power
-    BuildingType('Coal Generator', 10, 26, 'Power', './resources/CoalGenerator.png'),
-    BuildingType('Fuel Generator', 20, 20, 'Power', './resources/FuelGenerator.png'),
+    BuildingType('Coal Generator', 10, 26, 'Power', resource_path('CoalGenerator.png')),
+    BuildingType('Fuel Generator', 20, 20, 'Power', resource_path('FuelGenerator.png')),
 
     # Logistics
-    BuildingType('Lift (IN)', 2, 2, 'Logistics', './resources/LiftIn.png'),
-    BuildingType('Lift (OUT)', 2, 2, 'Logistics', './resources/LiftOut.png'),
-    BuildingType('Splitter', 4, 4, 'Logistics', './resources/Splitter.png'),
-    BuildingType('Merger', 4, 4, 'Logistics', './resources/Merger.png'),
-    BuildingType('Pipe Junction', 4, 4, 'Logistics', './resources/PipeJunction.png'),
+    BuildingType('Lift (IN)', 2, 2, 'Logistics', resource_path('LiftIn.png')),
+    BuildingType('Lift (OUT)', 2, 2, 'Logistics', resource_path('LiftOut.png')),
+    BuildingType('Splitter', 4, 4, 'Logistics', resource_path('Splitter.png')),
+    BuildingType('Merger', 4, 4, 'Logistics', resource_path('Merger.png')),
+    BuildingType('Pipe Junction', 4, 4, 'Logistics', resource_path('PipeJunction.png')),
 
     # Organisation
-    BuildingType('Storage container', 10, 5, 'Organisation', './resources/StorageContainer.png'),
+    BuildingType('Storage container', 10, 5, 'Organisation', resource_path('StorageContainer.png')),
 
     # Other
-    BuildingType('AWESOME Sink', 16, 13, 'Other', './resources/Sink.png'),
+    BuildingType('AWESOME Sink', 16, 13, 'Other', resource_path('Sink.png')),
 ]
 
 class BuildingInstance:
     type: BuildingType
     position: Position
     rotation: Rotation
+    recipe: Recipe
 
-    def __init__(self, type: BuildingType, position: Position, rotation: Rotation) -> None:
-        """Initialize a building instance with a type, position, and rotation."""
+    def __init__(self, type: BuildingType, position: Position, rotation: Rotation, recipe: Recipe = None) -> None:
+        """Initialize a building instance with a type, position, rotation and optionally the recipe it runs."""
         self.type = type
         self.position = position
         self.rotation = rotation
+        self.recipe = recipe
+        self.id = None  # Stable id, assigned by the layout the building is added to
+        self.layout = None  # The layout containing this building, notified about geometry changes
+
+    def footprint(self) -> tuple[float, float, float, float]:
+        """Return the (left, top, right, bottom) bounds of the rotated building, in meters."""
+        left, top, right, bottom = self.footprint_units()
+        return (left / UNITS_PER_METER, top / UNITS_PER_METER, right / UNITS_PER_METER, bottom / UNITS_PER_METER)
+
+    def footprint_units(self) -> tuple[int, int, int, int]:
+        """Return the footprint in position units, with a whole number of units on every side."""
+        if self.rotation in (Rotation.DEG_90, Rotation.DEG_270):
+            width, length = self.type.length, self.type.width
+        else:
+            width, length = self.type.width, self.type.length
+        half_x, half_y = width * UNITS_PER_METER // 2, length * UNITS_PER_METER // 2
+        x, y = self.position.x_units, self.position.y_units
+        return x - half_x, y - half_y, x + half_x, y + half_y
+
+    def grid_position(self, x: float, y: float) -> Position:
+        """Return the position closest to (x, y), in meters, at which the edges of the rotated building
+        lie on the meter grid. Buildings with an odd width or length are centered between grid lines."""
+        left, top, right, bottom = self.footprint_units()
+        half_x, half_y = (right - left) // 2, (bottom - top) // 2
+        return Position.from_units(to_units(math.floor(x - half_x / UNITS_PER_METER + 0.5)) + half_x,
+                                   to_units(math.floor(y - half_y / UNITS_PER_METER + 0.5)) + half_y)
+
+    def footprints(self) -> list[tuple[float, float, float, float]]:
+        """Return the footprints making up the building, the same interface as a placed blueprint."""
+        return [self.footprint()]
+
+    def _geometry_changed(self) -> None:
+        if self.layout is not None:
+            self.layout.building_changed(self)
 
     def clone(self) -> 'BuildingInstance':
         """Create a copy of this building instance."""
-        return BuildingInstance(self.type, Position(self.position.x, self.position.y), self.rotation)
-
-    def translate(self, dx: int, dy: int) -> None:
-        """Move the building by dx and dy."""
-        self.position.x += dx
-        self.position.y += dy
+        return BuildingInstance(self.type, Position.from_units(*self.position.units), self.rotation, self.recipe)
+
+    def set_recipe(self, recipe: Recipe | None) -> None:
+        """Change the recipe the building runs, None leaves it idle."""
+        self.recipe = recipe
+        if self.layout is not None:
+            self.layout.topology_changed([self])
+
+    def translate(self, dx: float, dy: float) -> None:
+        """Move the building by dx and dy meters, raises ValueError for offsets off the position grid."""
+        x_units, y_units = offset_units(dx), offset_units(dy)
+        self.position.x_units += x_units
+        self.position.y_units += y_units
+        self._geometry_changed()
+
+    def move_to(self, x: float, y: float) -> None:
+        """Move the building to a specific position, in meters."""
+        self.position.x = x
+        self.position.y = y
+        self._geometry_changed()
 
-    def move_to(self, x: int, y: int) -> None:
-        """Move the building to a specific position."""
+    def place(self, x: float, y: float, rotation: Rotation) -> None:
+        """Move the building to a specific position and rotation at once."""
         self.position.x = x
         self.position.y = y
+        self.rotation = rotation
+        self._geometry_changed()
 
     def rotate_clockwise(self) -> None:
         """Rotate the building 90 degrees clockwise."""
         self.rotation = self.rotation.rotate_clockwise()
+        self._geometry_changed()
 
     def rotate_counterclockwise(self) -> None:
         """Rotate the building 90 degrees counterclockwise."""
         self.rotation = self.rotation.rotate_counterclockwise()
+        self._geometry_changed()
 
     def to_dict(self) -> dict:
-        return {
+        data = {
             "type": self.type.name,  # or some unique identifier
             "position": {"x": self.position.x, "y": self.position.y},
             "rotation": self.rotation.value
         }
+        if self.recipe is not None:
+            data["recipe"] = self.recipe.name
+        return data
 
     @classmethod
     def from_dict(cls, data: dict, type_lookup: dict) -> "BuildingInstance":
@@ -99,4 +235,5 @@ class BuildingInstance:
         type_obj = type_lookup[data["type"]]
         pos = Position(data["position"]["x"], data["position"]["y"])
         rot = Rotation(data["rotation"])
-        return cls(type_obj, pos, rot)
\ No newline at end of file
+        recipe = recipe_lookup[data["recipe"]] if "recipe" in data else None
+        return cls(type_obj, pos, rot, recipe)
\ No newline at end of file
@@ -0,0 +1,169 @@
+import math
+
+from model.BuldingInstance import BuildingInstance
+
+Cell = tuple[int, int]  # A 1 m grid cell
+
+class Conveyor:
+    """A conveyor belt between two buildings, following a path of 1 m grid cells."""
+
+    def __init__(self, source: BuildingInstance, target: BuildingInstance, path: list[Cell] = None) -> None:
+        self.source = source
+        self.target = target
+        self.path = path if path is not None else []  # Empty while the belt cannot be routed
+        self.id = None  # Stable id, assigned by the network the conveyor is added to
+
+    def translate(self, dx: int, dy: int) -> None:
+        self.path = [(x + dx, y + dy) for x, y in self.path]
+
+    def to_dict(self, building_indices: dict) -> dict:
+        # Buildings are referenced by their position in the serialized building list
+        return {
+            "from": building_indices[self.source.id],
+            "to": building_indices[self.target.id],
+            "path": [[x, y] for x, y in self.path]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, buildings: list[BuildingInstance]) -> "Conveyor":
+        return cls(buildings[data["from"]], buildings[data["to"]], [(x, y) for x, y in data["path"]])
+
+class ConveyorNetwork:
+    """The conveyors of a layout, rerouted incrementally as buildings change.
+
+    Edits only mark the affected conveyors dirty: those attached to a changed building
+    and those whose path runs through its new footprint. reroute_dirty() then routes
+    just those, so the cost of an edit does not depend on the number of conveyors.
+    """
+
+    def __init__(self, layout) -> None:
+        self.layout = layout
+        self.router = None  # Created by get_router()
+        self.conveyor_map = {}        # Conveyor id -> conveyor
+        self.next_id = 0
+        self.building_conveyors = {}  # Building -> ids of the conveyors attached to it
+        self.cell_conveyors = {}      # Grid cell -> ids of the conveyors running through it
+        self.dirty = set()
+
+    def __len__(self) -> int:
+        return len(self.conveyor_map)
+
+    def __iter__(self):
+        return iter(list(self.conveyor_map.values()))
+
+    def get_conveyor(self, conveyor_id: int) -> Conveyor:
+        return self.conveyor_map[conveyor_id]
+
+    def add(self, conveyor: Conveyor) -> None:
+        """Add a conveyor, it keeps its id if that is free. Conveyors without a path are routed."""
+        if conveyor.id is None or conveyor.id in self.conveyor_map:
+            conveyor.id = self.next_id
+        self.next_id = max(self.next_id, conveyor.id + 1)
+
+        self.conveyor_map[conveyor.id] = conveyor
+        for building in (conveyor.source, conveyor.target):
+            self.building_conveyors.setdefault(building, set()).add(conveyor.id)
+        if not conveyor.path:
+            self.reroute(conveyor)
+        else:
+            self.index_path(conveyor)
+        self.layout.topology_changed([conveyor.source, conveyor.target])
+
+    def remove(self, conveyor: Conveyor) -> None:
+        self.detach(conveyor)
+        self.layout.topology_changed([conveyor.source, conveyor.target])
+
+    def detach(self, conveyor: Conveyor) -> None:
+        """Remove a conveyor without notifying the layout's topology listeners."""
+        del self.conveyor_map[conveyor.id]
+        for building in (conveyor.source, conveyor.target):
+            attached = self.building_conveyors.get(building)
+            if attached is not None:
+                attached.discard(conveyor.id)
+                if not attached:
+                    del self.building_conveyors[building]
+        self.unindex_path(conveyor)
+        self.dirty.discard(conveyor.id)
+
+    def clear(self) -> None:
+        self.conveyor_map = {}
+        self.building_conveyors = {}
+        self.cell_conveyors = {}
+        self.dirty = set()
+
+    def get_router(self) -> 'ConveyorRouter':
+        # Only needed once a conveyor is routed, so kept out of the startup path
+        if self.router is None:
+            from model.ConveyorRouter import ConveyorRouter
+            self.router = ConveyorRouter(self.layout)
+        return self.router
+
+    def attached(self, building: BuildingInstance) -> list[Conveyor]:
+        return [self.conveyor_map[i] for i in self.building_conveyors.get(building, ())]
+
+    ## ======================================================
+    ## Incremental routing
+    ## ======================================================
+
+    def index_path(self, conveyor: Conveyor) -> None:
+        for cell in conveyor.path:
+            self.cell_conveyors.setdefault(cell, set()).add(conveyor.id)
+
+    def unindex_path(self, conveyor: Conveyor) -> None:
+        for cell in conveyor.path:
+            ids = self.cell_conveyors.get(cell)
+            if ids is not None:
+                ids.discard(conveyor.id)
+                if not ids:
+                    del self.cell_conveyors[cell]
+
+    def area_changed(self, bounds: tuple[float, float, float, float]) -> None:
+        """Mark the conveyors running through the given area for rerouting."""
+        if not self.cell_conveyors:
+            return
+        left, top, right, bottom = bounds
+        for x in range(math.floor(left), math.ceil(right)):
+            for y in range(math.floor(top), math.ceil(bottom)):
+                self.dirty.update(self.cell_conveyors.get((x, y), ()))
+
+    def areas_changed(self, bounds_list: list[tuple[float, float, float, float]]) -> None:
+        if self.cell_conveyors:
+            for bounds in bounds_list:
+                self.area_changed(bounds)
+
+    def building_changed(self, building: BuildingInstance) -> None:
+        self.dirty.update(self.building_conveyors.get(building, ()))
+        self.area_changed(building.footprint())
+
+    def buildings_removed(self, buildings: list[BuildingInstance]) -> list[Conveyor]:
+        """Remove the conveyors attached to removed buildings and return them.
+
+        The layout is not notified, it reports the removed buildings together with the
+        remaining ends of these conveyors.
+        """
+        removed = {}
+        for building in buildings:
+            for conveyor in self.attached(building):
+                removed[conveyor] = None
+        for conveyor in removed:
+            self.detach(conveyor)
+        return list(removed)
+
+    def set_path(self, conveyor: Conveyor, path: list[Cell]) -> None:
+        """Replace the path of a conveyor with one that was routed elsewhere."""
+        self.unindex_path(conveyor)
+        conveyor.path = path
+        self.index_path(conveyor)
+
+    def reroute(self, conveyor: Conveyor) -> None:
+        self.unindex_path(conveyor)
+        conveyor.path = self.get_router().route_buildings(conveyor.source, conveyor.target) or []
+        self.index_path(conveyor)
+
+    def reroute_dirty(self) -> list[Conveyor]:
+        """Reroute the conveyors affected by the edits since the last call and return them."""
+        rerouted = [self.conveyor_map[i] for i in self.dirty if i in self.conveyor_map]
+        self.dirty = set()
+        for conveyor in rerouted:
+            self.reroute(conveyor)
+        return rerouted
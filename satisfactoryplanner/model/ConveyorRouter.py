@@ -0,0 +1,114 @@
+import heapq
+import math
+
+from model.BuldingInstance import BuildingInstance
+from model.Conveyor import Cell
+
+DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+def port_cells(building: BuildingInstance) -> list[Cell]:
+    """Return the 1 m grid cells just outside the middle of each side of a building."""
+    left, top, right, bottom = building.footprint()
+    center_x = math.floor((left + right) / 2)
+    center_y = math.floor((top + bottom) / 2)
+    return [
+        (center_x, math.floor(top) - 1),  # Back
+        (math.ceil(right), center_y),     # Right
+        (center_x, math.ceil(bottom)),    # Front
+        (math.floor(left) - 1, center_y), # Left
+    ]
+
+class ConveyorRouter:
+    """A* router for conveyor belts on a 1 m grid around the buildings of a layout.
+
+    The occupancy grid is not materialized, cells are looked up lazily in the layout's
+    spatial index and cached for the duration of a single route. The search is confined
+    to the bounding box of the endpoints plus SEARCH_MARGIN and gives up after
+    MAX_EXPANSIONS nodes, so a route always finishes within a bounded time.
+    """
+
+    SEARCH_MARGIN = 24
+    MAX_EXPANSIONS = 20000
+    TURN_COST = 0.5  # Extra cost of a bend, so straight belts are preferred over zig-zags
+
+    def __init__(self, layout):
+        self.layout = layout
+
+    def is_blocked(self, cell: Cell) -> bool:
+        """Check whether a building covers the center of a cell."""
+        x, y = cell[0] + 0.5, cell[1] + 0.5
+        for building in self.layout.query_point(x, y):
+            left, top, right, bottom = building.footprint()
+            if left < x < right and top < y < bottom:
+                return True
+        return bool(self.layout.query_blueprint_point(x, y))
+
+    def route(self, start_cells: list[Cell], goal_cells: list[Cell]) -> list[Cell] | None:
+        """Return the cheapest path from any free start cell to any free goal cell, or None."""
+        blocked = {}
+
+        def is_free(cell: Cell) -> bool:
+            if cell not in blocked:
+                blocked[cell] = (not (min_x <= cell[0] <= max_x and min_y <= cell[1] <= max_y)
+                                 or self.is_blocked(cell))
+            return not blocked[cell]
+
+        cells = start_cells + goal_cells
+        min_x = min(c[0] for c in cells) - self.SEARCH_MARGIN
+        max_x = max(c[0] for c in cells) + self.SEARCH_MARGIN
+        min_y = min(c[1] for c in cells) - self.SEARCH_MARGIN
+        max_y = max(c[1] for c in cells) + self.SEARCH_MARGIN
+
+        goals = {cell for cell in goal_cells if is_free(cell)}
+        if not goals:
+            return None
+
+        def heuristic(cell: Cell) -> int:
+            return min(abs(cell[0] - g[0]) + abs(cell[1] - g[1]) for g in goals)
+
+        # Search states are (cell, direction of arrival), so bends can be charged
+        open_heap = []
+        best_cost = {}
+        parents = {}
+        counter = 0
+        for cell in start_cells:
+            if is_free(cell):
+                state = (cell, None)
+                best_cost[state] = 0
+                parents[state] = None
+                heapq.heappush(open_heap, (heuristic(cell), counter, 0, state))
+                counter += 1
+
+        expansions = 0
+        while open_heap and expansions < self.MAX_EXPANSIONS:
+            _, _, cost, state = heapq.heappop(open_heap)
+            if cost > best_cost.get(state, math.inf):
+                continue
+
+            cell, direction = state
+            if cell in goals:
+                path = []
+                while state is not None:
+                    path.append(state[0])
+                    state = parents[state]
+                path.reverse()
+                return path
+
+            expansions += 1
+            for new_direction, (dx, dy) in enumerate(DIRECTIONS):
+                neighbour = (cell[0] + dx, cell[1] + dy)
+                if not is_free(neighbour):
+                    continue
+                new_cost = cost + 1 + (self.TURN_COST if direction is not None and direction != new_direction else 0)
+                new_state = (neighbour, new_direction)
+                if new_cost < best_cost.get(new_state, math.inf):
+                    best_cost[new_state] = new_cost
+                    parents[new_state] = state
+                    heapq.heappush(open_heap, (new_cost + heuristic(neighbour), counter, new_cost, new_state))
+                    counter += 1
+
+        return None
+
+    def route_buildings(self, source: BuildingInstance, target: BuildingInstance) -> list[Cell] | None:
+        """Route between the closest free ports of two buildings."""
+        return self.route(port_cells(source), port_cells(target))
@@ -0,0 +1,368 @@
+import json
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from model.BuldingInstance import BuildingInstance, Rotation
+from model.Blueprint import Blueprint, BlueprintInstance
+from model.Conveyor import Conveyor
+from model.FactoryLayout import FactoryLayout, type_lookup
+from model.Recipe import recipe_lookup
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.satisfactoryplanner', 'journal')
+
+# Journal directory contents, for the current generation n:
+#   snapshot-n.json  the layout (with ids) and the blueprint definitions at the start of the generation,
+#                    missing for an empty generation 0
+#   journal-n.log    the edits since then, one compact JSON record per line
+SNAPSHOT_NAME = 'snapshot-{:06d}.json'
+SEGMENT_NAME = 'journal-{:06d}.log'
+LOCK_NAME = 'journal.lock'  # Locked by the editor journaling to the directory
+
+class JournalError(Exception):
+    """The journal cannot be used: it stopped at an edit it could not apply, so its copy of the
+    layout is out of date, or another editor journals to the same directory."""
+
+class EditJournal:
+    """Write-ahead journal of the edits made to a layout, with background autosave.
+
+    The editor hands every model change to the journal as a small record. A worker
+    thread appends the records to the current journal file and applies them to its own
+    copy of the layout, which it periodically writes as a snapshot before starting a new,
+    empty journal file. Saving writes that copy too, so neither autosave nor saving a big
+    layout blocks the editor.
+
+    All methods are called from the editor's thread. Those returning a Future complete on
+    the worker thread, as does on_error, which is called with the exception when an edit
+    cannot be journaled. From then on the journal ignores all edits and saving fails.
+
+    Only one journal at a time can use a directory, a second editor started meanwhile
+    fails to recover and runs without autosave.
+    """
+
+    COMPACT_RECORDS = 5000  # Records after which the layout is snapshotted and the journal restarted
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY) -> None:
+        self.directory = directory
+        self.tasks = queue.Queue()
+        self.thread = None
+        self.blueprints = {}  # Name -> blueprint whose definition was already recorded
+        self.on_error = None
+
+        # Owned by the worker thread
+        self.layout = FactoryLayout()
+        self.definitions = {}  # Name -> blueprint, for placements recorded without their definition
+        self.generation = 0
+        self.segment = None
+        self.lock_file = None
+        self.record_count = 0
+        self.error = None  # The first record that could not be applied, autosave stops until the next reset
+
+    ## ======================================================
+    ## Editor side
+    ## ======================================================
+
+    def start(self) -> Future:
+        """Start the worker, which recovers the journaled layout.
+
+        The future's result is a separate copy of the recovered layout for the editor,
+        its ids match the ones used by the journal.
+        """
+        self.thread = threading.Thread(target=self.run, name='EditJournal', daemon=True)
+        self.thread.start()
+        return self.submit('recover')
+
+    def close(self) -> None:
+        """Write a final snapshot and stop the worker."""
+        if self.thread is not None:
+            self.submit('close')
+            self.thread.join()
+            self.thread = None
+
+    def reset(self, file_name: str = None) -> Future:
+        """Restart the journal from an empty layout, or from the layout in a file the editor just loaded."""
+        self.blueprints = {}
+        return self.submit('reset', file_name)
+
+    def save(self, file_name: str) -> Future:
+        """Write the layout as of the last record to a file, fails with JournalError once an edit was lost."""
+        return self.submit('save', file_name)
+
+    def submit(self, task: str, argument=None) -> Future:
+        future = Future()
+        self.tasks.put((task, argument, future))
+        return future
+
+    def record(self, record: dict) -> None:
+        self.tasks.put(('record', record, None))
+
+    def buildings_added(self, buildings: list[BuildingInstance], conveyors: list[Conveyor] = ()) -> None:
+        self.record({"op": "add",
+                     "buildings": [dict(b.to_dict(), id=b.id) for b in buildings],
+                     "conveyors": [self.conveyor_data(c) for c in conveyors]})
+
+    def buildings_removed(self, buildings: list[BuildingInstance]) -> None:
+        self.record({"op": "remove", "buildings": [b.id for b in buildings]})
+
+    def buildings_moved(self, buildings: list[BuildingInstance], dx: int, dy: int) -> None:
+        self.record({"op": "move", "buildings": [b.id for b in buildings], "dx": dx, "dy": dy})
+
+    def buildings_rotated(self, buildings: list[BuildingInstance], turns: int) -> None:
+        self.record({"op": "rotate", "buildings": [b.id for b in buildings], "turns": turns})
+
+    def buildings_placed(self, buildings: list[BuildingInstance]) -> None:
+        self.record({"op": "place",
+                     "buildings": [[b.id, b.position.x, b.position.y, b.rotation.value] for b in buildings]})
+
+    def recipes_set(self, recipes: dict) -> None:
+        self.record({"op": "recipes",
+                     "recipes": [[building_id, recipe.name if recipe is not None else None]
+                                 for building_id, recipe in recipes.items()]})
+
+    def conveyors_added(self, conveyors: list[Conveyor]) -> None:
+        self.record({"op": "add_conveyors", "conveyors": [self.conveyor_data(c) for c in conveyors]})
+
+    def conveyors_removed(self, conveyors: list[Conveyor]) -> None:
+        self.record({"op": "remove_conveyors", "conveyors": [c.id for c in conveyors]})
+
+    def conveyors_rerouted(self, conveyors: list[Conveyor]) -> None:
+        # Routes are journaled rather than recomputed, so replaying never depends on the router
+        self.record({"op": "paths", "conveyors": [[c.id, [list(cell) for cell in c.path]] for c in conveyors]})
+
+    def blueprints_added(self, instances: list[BlueprintInstance]) -> None:
+        definitions = {}
+        for instance in instances:
+            blueprint = instance.blueprint
+            if self.blueprints.get(blueprint.name) is not blueprint:
+                self.blueprints[blueprint.name] = blueprint
+                definitions[blueprint.name] = blueprint.layout.to_data()
+        self.record({"op": "add_blueprints", "definitions": definitions,
+                     "blueprints": [dict(p.to_dict(), id=p.id) for p in instances]})
+
+    def blueprints_removed(self, instances: list[BlueprintInstance]) -> None:
+        self.record({"op": "remove_blueprints", "blueprints": [p.id for p in instances]})
+
+    @staticmethod
+    def conveyor_data(conveyor: Conveyor) -> dict:
+        return {"id": conveyor.id, "from": conveyor.source.id, "to": conveyor.target.id,
+                "path": [list(cell) for cell in conveyor.path]}
+
+    ## ======================================================
+    ## Worker thread
+    ## ======================================================
+
+    def run(self):
+        while True:
+            task, argument, future = self.tasks.get()
+            try:
+                if task == 'record':
+                    self.append(argument)
+                    continue
+                elif task == 'recover':
+                    result = self.recover()
+                elif task == 'reset':
+                    result = self.start_over(argument)
+                elif task == 'save':
+                    if self.error is not None:
+                        raise JournalError(f'Autosave stopped at an edit it could not apply: {self.error!r}')
+                    result = self.layout.save(argument)
+                else:
+                    self.close_segment()
+                    if self.error is None:
+                        self.compact()
+                    self.unlock()
+                    future.set_result(None)
+                    return
+            except (OSError, ValueError, KeyError, JournalError) as e:
+                if task == 'recover':
+                    self.error = e  # Keep the unreadable files, instead of compacting them away
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def append(self, record: dict):
+        if self.error is not None or self.segment is None:
+            return
+        try:
+            # Applied first, a record that fails must not be replayed by the next recovery
+            apply_record(self.layout, record, self.definitions)
+            self.segment.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self.segment.flush()
+        except (OSError, ValueError, KeyError) as e:
+            self.error = e
+            if self.on_error is not None:
+                self.on_error(e)
+            return
+
+        self.record_count += 1
+        if self.record_count >= self.COMPACT_RECORDS:
+            self.compact()
+
+    def recover(self) -> FactoryLayout:
+        """Load the newest snapshot and replay the journal written after it."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock()
+        self.generation = max(self.generations('snapshot-', '.json'), default=0)
+        self.layout = FactoryLayout()
+        self.definitions = {}
+
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_NAME.format(self.generation))
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            self.layout.load_data(snapshot["layout"], type_lookup)
+            self.definitions = load_definitions(snapshot["blueprint_definitions"])
+
+        segment_path = os.path.join(self.directory, SEGMENT_NAME.format(self.generation))
+        if os.path.exists(segment_path):
+            with open(segment_path) as segment_file:
+                for line in segment_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # The editor stopped in the middle of writing this record
+                    try:
+                        apply_record(self.layout, record, self.definitions)
+                    except (ValueError, KeyError):
+                        break  # Not a valid edit of the recovered layout, the journal is damaged from here on
+
+        # The copy is built from the same data as a snapshot, so the ids match
+        recovered = FactoryLayout()
+        recovered.load_data(self.layout.to_data(ids=True), type_lookup)
+        self.compact()
+        return recovered
+
+    def start_over(self, file_name: str | None):
+        self.close_segment()
+        self.layout = FactoryLayout()
+        self.definitions = {}
+        self.error = None
+        if file_name is not None:
+            self.layout.load(file_name, type_lookup)
+        self.compact()
+
+    def compact(self):
+        """Snapshot the layout into the next generation and remove the previous one."""
+        self.close_segment()
+        self.generation += 1
+
+        for instance in self.layout.blueprint_map.values():
+            self.definitions.setdefault(instance.blueprint.name, instance.blueprint)
+        snapshot = {"layout": self.layout.to_data(ids=True),
+                    "blueprint_definitions": {name: blueprint.layout.to_data()
+                                              for name, blueprint in self.definitions.items()}}
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_NAME.format(self.generation))
+        with open(snapshot_path + '.tmp', 'w') as snapshot_file:
+            json.dump(snapshot, snapshot_file, separators=(',', ':'))
+        os.replace(snapshot_path + '.tmp', snapshot_path)
+
+        # Older generations are covered by the new snapshot
+        for generation in self.generations('snapshot-', '.json'):
+            if generation < self.generation:
+                os.remove(os.path.join(self.directory, SNAPSHOT_NAME.format(generation)))
+        for generation in self.generations('journal-', '.log'):
+            if generation < self.generation:
+                os.remove(os.path.join(self.directory, SEGMENT_NAME.format(generation)))
+
+        self.segment = open(os.path.join(self.directory, SEGMENT_NAME.format(self.generation)), 'a')
+        self.record_count = 0
+
+    def lock(self):
+        """Lock the directory for this journal, raises JournalError if another one holds it."""
+        lock_file = open(os.path.join(self.directory, LOCK_NAME), 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            raise JournalError(f'{self.directory} is in use by another editor')
+        self.lock_file = lock_file
+
+    def unlock(self):
+        # Closing the file releases the lock
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+    def generations(self, prefix: str, suffix: str) -> list[int]:
+        return [int(name[len(prefix):-len(suffix)]) for name in os.listdir(self.directory)
+                if name.startswith(prefix) and name.endswith(suffix) and name[len(prefix):-len(suffix)].isdigit()]
+
+    def close_segment(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+
+def load_definitions(definitions: dict) -> dict:
+    blueprints = {}
+    for name, data in definitions.items():
+        layout = FactoryLayout()
+        layout.load_data(data, type_lookup)
+        blueprints[name] = Blueprint(name, layout)
+    return blueprints
+
+def apply_record(layout: FactoryLayout, record: dict, definitions: dict) -> None:
+    """Repeat a journaled edit on a layout."""
+    op = record["op"]
+    if op == "add":
+        buildings = []
+        for data in record["buildings"]:
+            building = BuildingInstance.from_dict(data, type_lookup)
+            building.id = data["id"]
+            buildings.append(building)
+        layout.add_many(buildings)
+        add_conveyors(layout, record["conveyors"])
+    elif op == "remove":
+        layout.remove_many([layout.get_building(building_id) for building_id in record["buildings"]])
+    elif op == "move":
+        for building_id in record["buildings"]:
+            layout.get_building(building_id).translate(record["dx"], record["dy"])
+    elif op == "rotate":
+        for building_id in record["buildings"]:
+            building = layout.get_building(building_id)
+            for _ in range(record["turns"]):
+                building.rotate_clockwise()
+    elif op == "place":
+        for building_id, x, y, rotation in record["buildings"]:
+            layout.get_building(building_id).place(x, y, Rotation(rotation))
+    elif op == "recipes":
+        for building_id, name in record["recipes"]:
+            layout.get_building(building_id).set_recipe(recipe_lookup[name] if name is not None else None)
+    elif op == "add_conveyors":
+        add_conveyors(layout, record["conveyors"])
+    elif op == "remove_conveyors":
+        for conveyor_id in record["conveyors"]:
+            layout.conveyors.remove(layout.conveyors.get_conveyor(conveyor_id))
+    elif op == "paths":
+        for conveyor_id, path in record["conveyors"]:
+            layout.conveyors.set_path(layout.conveyors.get_conveyor(conveyor_id), [(x, y) for x, y in path])
+    elif op == "add_blueprints":
+        definitions.update(load_definitions(record["definitions"]))
+        for data in record["blueprints"]:
+            instance = BlueprintInstance.from_dict(data, definitions)
+            instance.id = data["id"]
+            layout.add_blueprint_instance(instance)
+    elif op == "remove_blueprints":
+        for instance_id in record["blueprints"]:
+            layout.remove_blueprint_instance(layout.get_blueprint_instance(instance_id))
+    else:
+        raise ValueError(f'Unknown journal record {op!r}')
+
+    # Reroutes are journaled as paths records, the edit itself must not trigger any
+    layout.conveyors.dirty = set()
+
+def add_conveyors(layout: FactoryLayout, conveyors: list[dict]) -> None:
+    for data in conveyors:
+        conveyor = Conveyor(layout.get_building(data["from"]), layout.get_building(data["to"]),
+                            [(x, y) for x, y in data["path"]])
+        conveyor.id = data["id"]
+        layout.conveyors.add(conveyor)
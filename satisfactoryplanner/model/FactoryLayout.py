@@ -1,45 +1,488 @@
 import json
-from model.BuldingInstance import BuildingInstance, building_types
+import mmap
+import struct
+from model.BuldingInstance import BuildingInstance, Position, Rotation, building_types
+from model.Recipe import recipe_lookup
+from model.SpatialIndex import SpatialIndex
+from model.Conveyor import Conveyor, ConveyorNetwork
+from model.Blueprint import Blueprint, BlueprintInstance
 
 type_lookup = {b.name: b for b in building_types}
 
+# Binary layout format (little endian):
+#   header:     magic, format version, flags (reserved), type count, record count
+#   type table: for every type, the length of its UTF-8 name followed by the name
+#   records:    type table index, rotation, padding, x, y (position units as int32 since version 5,
+#               float32 meters before)
+#   conveyors:  (version 2+) conveyor count, then for every conveyor the source and target
+#               record indices and the path length, followed by the path cells
+#   recipes:    (version 3+) recipe count and names like the type table, then for every record
+#               its recipe table index, or NO_RECIPE
+#   blueprints: (version 4+) blueprint count, then for every blueprint its name like the type table
+#               and its length in bytes followed by the blueprint as a nested binary layout, then
+#               the count of placed instances and one record per instance (blueprint index,
+#               rotation, padding, x, y)
+BINARY_EXTENSION = '.flb'
+BINARY_MAGIC = b'SFPL'
+BINARY_VERSION = 5
+BINARY_HEADER = struct.Struct('<4sHHII')
+BINARY_TYPE_NAME_LENGTH = struct.Struct('<H')
+BINARY_RECORD = struct.Struct('<HBxii')  # Type or blueprint index, rotation, position in position units
+BINARY_RECORD_V4 = struct.Struct('<HBxff')  # Up to version 4 positions were stored in meters
+BINARY_CONVEYOR_COUNT = struct.Struct('<I')
+BINARY_CONVEYOR = struct.Struct('<III')
+BINARY_CELL = struct.Struct('<ii')
+BINARY_RECIPE_INDEX = struct.Struct('<H')
+BINARY_NO_RECIPE = 0xFFFF
+BINARY_BLOB_LENGTH = struct.Struct('<I')
+
 class FactoryLayout:
 
     def __init__(self):
-        self.buildings = []
+        self.building_map = {}  # Building id -> instance, in insertion order
+        self.next_id = 0
+        self.spatial_index = SpatialIndex()
+        self.conveyors = ConveyorNetwork(self)
+        self.topology_listeners = []  # Called with the buildings whose connections or recipe changed, None for all
+        self.blueprint_map = {}  # Blueprint instance id -> placed blueprint instance
+        self.next_blueprint_id = 0
+        self.blueprint_index = SpatialIndex()
+
+    @property
+    def buildings(self) -> list[BuildingInstance]:
+        return list(self.building_map.values())
+
+    def __len__(self) -> int:
+        return len(self.building_map)
+
+    def __iter__(self):
+        return iter(list(self.building_map.values()))
 
     @staticmethod
     def create_from_buildings(buildings: list[BuildingInstance]) -> 'FactoryLayout':
+        """Create a layout from copies of the buildings, plus the conveyors running between them."""
         layout = FactoryLayout()
-        for building in buildings:
-            layout.add_building(building.clone())
+        clones = {building: building.clone() for building in buildings}
+        layout.add_many(list(clones.values()))
+
+        conveyors = {c for b in buildings if b.layout is not None for c in b.layout.conveyors.attached(b)}
+        for conveyor in sorted(conveyors, key=lambda c: c.id):
+            if conveyor.source in clones and conveyor.target in clones:
+                layout.conveyors.add(Conveyor(clones[conveyor.source], clones[conveyor.target], list(conveyor.path)))
         return layout
-    
+
     def clone(self) -> 'FactoryLayout':
-        new_layout = FactoryLayout()
-        for building in self.buildings:
-            new_layout.add_building(building.clone())
-        return new_layout
+        return FactoryLayout.create_from_buildings(self.buildings)
 
     def add_sublayout(self, sublayout: 'FactoryLayout', offset_x: int, offset_y: int) -> None:
         for building in sublayout.buildings:
             building.translate(offset_x, offset_y)
             self.add_building(building)
+        for conveyor in sublayout.conveyors:
+            conveyor.translate(offset_x, offset_y)
+            self.conveyors.add(conveyor)
+        for instance in sublayout.blueprint_map.values():
+            placed = instance.clone()
+            placed.move_to(instance.position.x + offset_x, instance.position.y + offset_y)
+            self.add_blueprint_instance(placed)
+
+    def translate(self, dx: int, dy: int) -> None:
+        """Move everything in the layout by whole meters, the conveyors keep their routes."""
+        # Moving everything together blocks no route, only the conveyors marked before stay marked
+        dirty = set(self.conveyors.dirty)
+        for building in self.building_map.values():
+            building.translate(dx, dy)
+        for conveyor in self.conveyors:
+            self.conveyors.set_path(conveyor, [(x + dx, y + dy) for x, y in conveyor.path])
+
+        # Placed instances are immutable, they are taken out to be moved
+        for instance in list(self.blueprint_map.values()):
+            self.remove_blueprint_instance(instance)
+            instance.move_to(instance.position.x + dx, instance.position.y + dy)
+            self.add_blueprint_instance(instance)
+        self.conveyors.dirty = dirty
 
     def add_building(self, instance: BuildingInstance) -> None:
-        self.buildings.append(instance)
+        """Add a building to the layout.
+
+        The building keeps its id if it has one that is free in this layout (e.g. when
+        it is restored after a removal), otherwise it gets a new one.
+        """
+        self.add_many([instance])
+
+    def add_many(self, instances: list[BuildingInstance]) -> None:
+        """Add buildings as add_building() does, the listeners are notified once for all of them."""
+        if not instances:
+            return
+        building_map = self.building_map
+        footprints = []
+        for instance in instances:
+            if instance.id is None or instance.id in building_map:
+                instance.id = self.next_id
+            self.next_id = max(self.next_id, instance.id + 1)
+            building_map[instance.id] = instance
+            instance.layout = self
+            footprints.append(instance.footprint())
+
+        self.spatial_index.insert_many(zip(instances, footprints))
+        self.conveyors.areas_changed(footprints)
+        self.topology_changed(list(instances))
 
     def remove_building(self, instance: BuildingInstance) -> None:
-        self.buildings.remove(instance)
+        self.remove_many([instance])
 
-    def buildings(self) -> list[BuildingInstance]:
-        return list(self.buildings)
+    def remove_many(self, instances: list[BuildingInstance]) -> None:
+        """Remove buildings and the conveyors attached to them, the listeners are notified once."""
+        if not instances:
+            return
+        for instance in instances:
+            if self.building_map.get(instance.id) is not instance:
+                raise ValueError('Building is not part of this layout')
+
+        for instance in instances:
+            del self.building_map[instance.id]
+            instance.layout = None
+        self.spatial_index.remove_many(instances)
+        removed = self.conveyors.buildings_removed(instances)
+
+        # The buildings at the other end of a removed conveyor lost a connection
+        changed = dict.fromkeys(instances)
+        for conveyor in removed:
+            for building in (conveyor.source, conveyor.target):
+                if building.layout is self:
+                    changed[building] = None
+        self.topology_changed(list(changed))
+
+    def add_blueprint_instance(self, instance: BlueprintInstance) -> None:
+        """Place a blueprint instance, it keeps its id if that is free."""
+        if instance.id is None or instance.id in self.blueprint_map:
+            instance.id = self.next_blueprint_id
+        self.next_blueprint_id = max(self.next_blueprint_id, instance.id + 1)
+
+        self.blueprint_map[instance.id] = instance
+        instance.layout = self
+        self.blueprint_index.insert(instance, instance.footprint())
+        self.conveyors.area_changed(instance.footprint())
+
+    def remove_blueprint_instance(self, instance: BlueprintInstance) -> None:
+        if self.blueprint_map.get(instance.id) is not instance:
+            raise ValueError('Blueprint instance is not part of this layout')
+
+        del self.blueprint_map[instance.id]
+        instance.layout = None
+        self.blueprint_index.remove(instance)
+
+    def get_blueprint_instance(self, instance_id: int) -> BlueprintInstance:
+        return self.blueprint_map[instance_id]
+
+    def get_building(self, building_id: int) -> BuildingInstance:
+        return self.building_map[building_id]
+
+    def building_changed(self, instance: BuildingInstance) -> None:
+        """Keep the spatial index and conveyors in sync after a building was moved or rotated."""
+        self.spatial_index.update(instance, instance.footprint())
+        self.conveyors.building_changed(instance)
+
+    def topology_changed(self, instances: list[BuildingInstance] | None) -> None:
+        """Notify the listeners that buildings were added, removed, (dis)connected or got another recipe."""
+        for listener in self.topology_listeners:
+            listener(instances)
+
+    def clear(self) -> None:
+        for building in self.building_map.values():
+            building.layout = None
+        self.building_map = {}
+        self.spatial_index.clear()
+        self.conveyors.clear()
+        for instance in self.blueprint_map.values():
+            instance.layout = None
+        self.blueprint_map = {}
+        self.blueprint_index.clear()
+        self.topology_changed(None)
+
+    def replace_contents(self, other: 'FactoryLayout') -> None:
+        """Take over all buildings (with their ids and index) of another layout, leaving it empty."""
+        self.clear()
+        self.building_map, other.building_map = other.building_map, {}
+        self.spatial_index, other.spatial_index = other.spatial_index, SpatialIndex()
+        self.next_id, other.next_id = other.next_id, 0
+        self.conveyors, other.conveyors = other.conveyors, ConveyorNetwork(other)
+        self.conveyors.layout = self
+        self.conveyors.router = None  # It was routing in the other layout
+        for building in self.building_map.values():
+            building.layout = self
+        self.blueprint_map, other.blueprint_map = other.blueprint_map, {}
+        self.blueprint_index, other.blueprint_index = other.blueprint_index, SpatialIndex()
+        self.next_blueprint_id, other.next_blueprint_id = other.next_blueprint_id, 0
+        for instance in self.blueprint_map.values():
+            instance.layout = self
+        self.topology_changed(None)
+
+    ## ======================================================
+    ## Spatial queries
+    ## ======================================================
+
+    def query_rect(self, left: float, top: float, right: float, bottom: float) -> list[BuildingInstance]:
+        """Return the buildings overlapping the given rectangle (in meters)."""
+        return self.spatial_index.query_rect((left, top, right, bottom))
+
+    def query_point(self, x: float, y: float) -> list[BuildingInstance]:
+        """Return the buildings covering the given point (in meters)."""
+        return self.spatial_index.query_point(x, y)
+
+    def query_blueprint_point(self, x: float, y: float) -> list[BlueprintInstance]:
+        """Return the placed blueprints with a building covering the given point (in meters)."""
+        return [p for p in self.blueprint_index.query_point(x, y) if p.covers(x, y)]
+
+    def overlaps(self, instance) -> list:
+        """Return the buildings and placed blueprints of this layout overlapping a building or blueprint
+        instance, which need not be part of it."""
+        found = {}
+        for bounds in instance.footprints():
+            for building in self.spatial_index.query_rect(bounds):
+                found[building] = None
+            if self.blueprint_index:
+                for placed in self.blueprint_index.query_rect(bounds):
+                    if placed.overlaps(bounds):
+                        found[placed] = None
+        found.pop(instance, None)
+        return list(found)
+
+    ## ======================================================
+    ## Serialization
+    ## ======================================================
+
+    def to_data(self, ids: bool = False) -> list | dict:
+        """Return the layout as JSON compatible data. With ids, the ids of buildings, conveyors
+        and placed blueprints are included, and kept by load_data()."""
+        data = [b.to_dict() for b in self.building_map.values()]
+        if ids:
+            for building_data, building_id in zip(data, self.building_map):
+                building_data["id"] = building_id
+
+        # Layouts without conveyors or blueprints keep the plain building list format
+        if self.conveyors or self.blueprint_map:
+            self.conveyors.reroute_dirty()
+            building_indices = {building_id: i for i, building_id in enumerate(self.building_map)}
+            data = {
+                "buildings": data,
+                "conveyors": [c.to_dict(building_indices) for c in self.conveyors]
+            }
+            if ids:
+                for conveyor_data, conveyor in zip(data["conveyors"], self.conveyors):
+                    conveyor_data["id"] = conveyor.id
+
+        # Every blueprint in use is stored once, the placed instances only reference it
+        if self.blueprint_map:
+            blueprints = {p.blueprint.name: p.blueprint for p in self.blueprint_map.values()}
+            data["blueprint_definitions"] = {name: blueprint.layout.to_data()
+                                             for name, blueprint in blueprints.items()}
+            data["blueprints"] = [p.to_dict() for p in self.blueprint_map.values()]
+            if ids:
+                for placed_data, placed_id in zip(data["blueprints"], self.blueprint_map):
+                    placed_data["id"] = placed_id
+        return data
 
     def serialize(self) -> str:
-        data = [b.to_dict() for b in self.buildings]
-        result = json.dumps(data, indent=2)
+        result = json.dumps(self.to_data(), indent=2)
         return result
 
+    def load_data(self, data: list | dict, type_lookup: dict):
+        if isinstance(data, list):
+            data = {"buildings": data, "conveyors": []}
+
+        buildings = [BuildingInstance.from_dict(d, type_lookup) for d in data["buildings"]]
+        for building, d in zip(buildings, data["buildings"]):
+            building.id = d.get("id")
+        blueprints = {}
+        for name, definition in data.get("blueprint_definitions", {}).items():
+            layout = FactoryLayout()
+            layout.load_data(definition, type_lookup)
+            blueprints[name] = Blueprint(name, layout)
+        placed = [BlueprintInstance.from_dict(d, blueprints) for d in data.get("blueprints", [])]
+        for instance, d in zip(placed, data.get("blueprints", [])):
+            instance.id = d.get("id")
+
+        self.clear()
+        self.add_many(buildings)
+        for d in data.get("conveyors", []):
+            conveyor = Conveyor.from_dict(d, buildings)
+            conveyor.id = d.get("id")
+            self.conveyors.add(conveyor)
+        for instance in placed:
+            self.add_blueprint_instance(instance)
+
     def deserialize(self, json_str: str, type_lookup: dict):
-        data = json.loads(json_str)
-        self.buildings = [BuildingInstance.from_dict(d, type_lookup) for d in data]
\ No newline at end of file
+        self.load_data(json.loads(json_str), type_lookup)
+
+    def serialize_binary(self) -> bytes:
+        buildings = list(self.building_map.values())
+        type_names = list(dict.fromkeys(b.type.name for b in buildings))
+        type_indices = {name: i for i, name in enumerate(type_names)}
+
+        parts = [BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, len(type_names), len(buildings))]
+        for name in type_names:
+            encoded = name.encode('utf-8')
+            parts.append(BINARY_TYPE_NAME_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+
+        records = bytearray(BINARY_RECORD.size * len(buildings))
+        for i, b in enumerate(buildings):
+            BINARY_RECORD.pack_into(records, i * BINARY_RECORD.size,
+                                    type_indices[b.type.name], b.rotation.value, b.position.x_units, b.position.y_units)
+        parts.append(records)
+
+        self.conveyors.reroute_dirty()
+        building_indices = {building_id: i for i, building_id in enumerate(self.building_map)}
+        parts.append(BINARY_CONVEYOR_COUNT.pack(len(self.conveyors)))
+        for conveyor in self.conveyors:
+            parts.append(BINARY_CONVEYOR.pack(building_indices[conveyor.source.id],
+                                              building_indices[conveyor.target.id], len(conveyor.path)))
+            parts.extend(BINARY_CELL.pack(x, y) for x, y in conveyor.path)
+
+        recipe_names = list(dict.fromkeys(b.recipe.name for b in buildings if b.recipe is not None))
+        recipe_indices = {name: i for i, name in enumerate(recipe_names)}
+        parts.append(BINARY_TYPE_NAME_LENGTH.pack(len(recipe_names)))
+        for name in recipe_names:
+            encoded = name.encode('utf-8')
+            parts.append(BINARY_TYPE_NAME_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+        parts.extend(BINARY_RECIPE_INDEX.pack(recipe_indices[b.recipe.name] if b.recipe is not None else BINARY_NO_RECIPE)
+                     for b in buildings)
+
+        placed = list(self.blueprint_map.values())
+        blueprints = list({p.blueprint.name: p.blueprint for p in placed}.values())
+        blueprint_indices = {blueprint.name: i for i, blueprint in enumerate(blueprints)}
+        parts.append(BINARY_TYPE_NAME_LENGTH.pack(len(blueprints)))
+        for blueprint in blueprints:
+            encoded = blueprint.name.encode('utf-8')
+            blob = blueprint.layout.serialize_binary()
+            parts += [BINARY_TYPE_NAME_LENGTH.pack(len(encoded)), encoded, BINARY_BLOB_LENGTH.pack(len(blob)), blob]
+        parts.append(BINARY_CONVEYOR_COUNT.pack(len(placed)))
+        parts.extend(BINARY_RECORD.pack(blueprint_indices[p.blueprint.name], p.rotation.value, *p.position.units)
+                     for p in placed)
+        return b''.join(parts)
+
+    def deserialize_binary(self, data, type_lookup: dict):
+        """Load the layout from the binary format, data can be any buffer (bytes, mmap, ...)."""
+        view = memoryview(data)
+        try:
+            if len(view) < BINARY_HEADER.size:
+                raise ValueError('Not a binary factory layout')
+
+            magic, version, _, type_count, record_count = BINARY_HEADER.unpack_from(view, 0)
+            if magic != BINARY_MAGIC:
+                raise ValueError('Not a binary factory layout')
+            if version > BINARY_VERSION:
+                raise ValueError(f'Unsupported binary factory layout version {version}')
+
+            offset = BINARY_HEADER.size
+            types = []
+            for _ in range(type_count):
+                (length,) = BINARY_TYPE_NAME_LENGTH.unpack_from(view, offset)
+                offset += BINARY_TYPE_NAME_LENGTH.size
+                types.append(type_lookup[str(view[offset:offset + length], 'utf-8')])
+                offset += length
+
+            if version >= 5:
+                record_format, make_position = BINARY_RECORD, Position.from_units
+            else:
+                record_format, make_position = BINARY_RECORD_V4, Position
+            end = offset + record_count * record_format.size
+            if len(view) < end:
+                raise ValueError('Truncated binary factory layout')
+
+            rotations = list(Rotation)
+            buildings = [BuildingInstance(types[type_index], make_position(x, y), rotations[rotation])
+                         for type_index, rotation, x, y in record_format.iter_unpack(view[offset:end])]
+
+            conveyors = []
+            if version >= 2:
+                offset = end
+                (conveyor_count,) = BINARY_CONVEYOR_COUNT.unpack_from(view, offset)
+                offset += BINARY_CONVEYOR_COUNT.size
+                for _ in range(conveyor_count):
+                    source, target, path_length = BINARY_CONVEYOR.unpack_from(view, offset)
+                    offset += BINARY_CONVEYOR.size
+                    end = offset + path_length * BINARY_CELL.size
+                    path = list(BINARY_CELL.iter_unpack(view[offset:end]))
+                    offset = end
+                    conveyors.append(Conveyor(buildings[source], buildings[target], path))
+
+            if version >= 3:
+                (recipe_count,) = BINARY_TYPE_NAME_LENGTH.unpack_from(view, offset)
+                offset += BINARY_TYPE_NAME_LENGTH.size
+                recipes = []
+                for _ in range(recipe_count):
+                    (length,) = BINARY_TYPE_NAME_LENGTH.unpack_from(view, offset)
+                    offset += BINARY_TYPE_NAME_LENGTH.size
+                    recipes.append(recipe_lookup[str(view[offset:offset + length], 'utf-8')])
+                    offset += length
+
+                end = offset + record_count * BINARY_RECIPE_INDEX.size
+                if len(view) < end:
+                    raise ValueError('Truncated binary factory layout')
+                for building, (recipe_index,) in zip(buildings, BINARY_RECIPE_INDEX.iter_unpack(view[offset:end])):
+                    if recipe_index != BINARY_NO_RECIPE:
+                        building.recipe = recipes[recipe_index]
+                offset = end
+
+            placed = []
+            if version >= 4:
+                (blueprint_count,) = BINARY_TYPE_NAME_LENGTH.unpack_from(view, offset)
+                offset += BINARY_TYPE_NAME_LENGTH.size
+                blueprints = []
+                for _ in range(blueprint_count):
+                    (length,) = BINARY_TYPE_NAME_LENGTH.unpack_from(view, offset)
+                    offset += BINARY_TYPE_NAME_LENGTH.size
+                    name = str(view[offset:offset + length], 'utf-8')
+                    offset += length
+                    (length,) = BINARY_BLOB_LENGTH.unpack_from(view, offset)
+                    offset += BINARY_BLOB_LENGTH.size
+                    layout = FactoryLayout()
+                    layout.deserialize_binary(view[offset:offset + length], type_lookup)
+                    offset += length
+                    blueprints.append(Blueprint(name, layout))
+
+                (placed_count,) = BINARY_CONVEYOR_COUNT.unpack_from(view, offset)
+                offset += BINARY_CONVEYOR_COUNT.size
+                end = offset + placed_count * record_format.size
+                if len(view) < end:
+                    raise ValueError('Truncated binary factory layout')
+                placed = [BlueprintInstance(blueprints[index], make_position(x, y), rotations[rotation])
+                          for index, rotation, x, y in record_format.iter_unpack(view[offset:end])]
+        except struct.error:
+            raise ValueError('Truncated binary factory layout')
+        except IndexError:
+            # A type, rotation, building, recipe or blueprint index past the end of its table
+            raise ValueError('Corrupt binary factory layout')
+        except KeyError as e:
+            raise ValueError(f'Unknown building type or recipe {e} in binary factory layout')
+        finally:
+            view.release()
+
+        self.clear()
+        self.add_many(buildings)
+        for conveyor in conveyors:
+            self.conveyors.add(conveyor)
+        for instance in placed:
+            self.add_blueprint_instance(instance)
+
+    def save(self, file_name: str):
+        """Write the layout to a file, in the binary format for .flb files and as JSON otherwise."""
+        if file_name.endswith(BINARY_EXTENSION):
+            with open(file_name, mode='wb') as save_file:
+                save_file.write(self.serialize_binary())
+        else:
+            with open(file_name, mode='w') as save_file:
+                save_file.write(self.serialize())
+
+    def load(self, file_name: str, type_lookup: dict):
+        """Read the layout from a file, binary .flb files are memory-mapped."""
+        if file_name.endswith(BINARY_EXTENSION):
+            with open(file_name, mode='rb') as load_file:
+                with mmap.mmap(load_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self.deserialize_binary(data, type_lookup)
+        else:
+            with open(file_name, mode='r') as load_file:
+                self.deserialize(load_file.read(), type_lookup)
@@ -0,0 +1,270 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from model.BuldingInstance import BuildingInstance, UNITS_PER_METER
+from model.Conveyor import Conveyor
+from model.FactoryLayout import FactoryLayout
+
+BUCKET_SIZE = 32  # Meters, a changed building is only matched to buildings in the neighboring buckets
+
+def building_key(building: BuildingInstance) -> tuple:
+    """Everything that makes up a building's state, buildings with equal keys are interchangeable."""
+    recipe = building.recipe.name if building.recipe is not None else None
+    return building.type.name, building.position.units, building.rotation.value, recipe
+
+def bucket(building: BuildingInstance) -> tuple[int, int]:
+    x, y = building.position.units
+    return x // (BUCKET_SIZE * UNITS_PER_METER), y // (BUCKET_SIZE * UNITS_PER_METER)
+
+@dataclass
+class BuildingChange:
+    """A building present in both versions, in a different state."""
+    old: BuildingInstance
+    new: BuildingInstance
+
+    @property
+    def moved(self) -> bool:
+        return self.old.position != self.new.position
+
+    @property
+    def rotated(self) -> bool:
+        return self.old.rotation != self.new.rotation
+
+    @property
+    def recipe_changed(self) -> bool:
+        return self.old.recipe is not self.new.recipe
+
+@dataclass
+class LayoutDiff:
+    """The differences between two versions of a layout.
+
+    matches maps every building of the old version that is still present to its
+    counterpart in the new version, changed or not.
+    """
+    matches: dict = field(default_factory=dict)
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    changes: list = field(default_factory=list)
+    added_conveyors: list = field(default_factory=list)
+    removed_conveyors: list = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changes or self.added_conveyors or self.removed_conveyors)
+
+    def describe(self) -> list[str]:
+        """Format the differences one per line, in a diff like notation."""
+        lines = [f'+ {b.type.name} at ({b.position.x}, {b.position.y}), {b.rotation.value * 90}°' for b in self.added]
+        lines += [f'- {b.type.name} at ({b.position.x}, {b.position.y})' for b in self.removed]
+        for change in self.changes:
+            old, new = change.old, change.new
+            parts = []
+            if change.moved:
+                parts.append(f'moved ({old.position.x}, {old.position.y}) -> ({new.position.x}, {new.position.y})')
+            if change.rotated:
+                parts.append(f'rotated {old.rotation.value * 90}° -> {new.rotation.value * 90}°')
+            if change.recipe_changed:
+                parts.append(f'recipe {old.recipe.name if old.recipe else "none"} -> '
+                             f'{new.recipe.name if new.recipe else "none"}')
+            lines.append(f'~ {old.type.name} at ({old.position.x}, {old.position.y}) {", ".join(parts)}')
+        lines += [f'+ conveyor {c.source.type.name} -> {c.target.type.name}' for c in self.added_conveyors]
+        lines += [f'- conveyor {c.source.type.name} -> {c.target.type.name}' for c in self.removed_conveyors]
+        return lines
+
+def match_buildings(old: list[BuildingInstance], new: list[BuildingInstance]) -> dict:
+    """Pair up the buildings of two versions of a layout, without comparing every pair.
+
+    Unchanged buildings are paired through a hash of their state. The rest are paired
+    with the closest building of the same type in the neighboring spatial buckets, so
+    moved, rotated and re-configured buildings are recognized as long as they did not
+    move further than BUCKET_SIZE.
+    """
+    matches = {}
+    by_key = defaultdict(list)
+    for building in old:
+        by_key[building_key(building)].append(building)
+    unmatched_new = []
+    for building in new:
+        same = by_key.get(building_key(building))
+        if same:
+            matches[same.pop()] = building
+        else:
+            unmatched_new.append(building)
+    unmatched_old = [building for same in by_key.values() for building in same]
+
+    buckets = defaultdict(list)
+    for i, building in enumerate(unmatched_old):
+        buckets[(building.type.name, *bucket(building))].append(i)
+
+    # Candidate pairs, closest first, with unchanged rotations and recipes breaking ties
+    candidates = []
+    for j, building in enumerate(unmatched_new):
+        x, y = bucket(building)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for i in buckets.get((building.type.name, x + dx, y + dy), ()):
+                    other = unmatched_old[i]
+                    distance = ((other.position.x_units - building.position.x_units) ** 2
+                                + (other.position.y_units - building.position.y_units) ** 2)
+                    candidates.append((distance, other.rotation != building.rotation,
+                                       other.recipe is not building.recipe, i, j))
+    candidates.sort()
+
+    used_new = set()
+    for _, _, _, i, j in candidates:
+        if unmatched_old[i] not in matches and j not in used_new:
+            matches[unmatched_old[i]] = unmatched_new[j]
+            used_new.add(j)
+    return matches
+
+def conveyor_keys(layout: FactoryLayout, mapping: dict) -> dict:
+    """Key the conveyors of a layout by their mapped (source, target) buildings, skipping unmapped ones."""
+    keys = {}
+    for conveyor in layout.conveyors:
+        source, target = mapping.get(conveyor.source), mapping.get(conveyor.target)
+        if source is not None and target is not None:
+            keys[(source, target)] = conveyor
+    return keys
+
+def diff_layouts(old: FactoryLayout, new: FactoryLayout) -> LayoutDiff:
+    """Compare two versions of a layout building by building."""
+    old_buildings, new_buildings = old.buildings, new.buildings
+    matches = match_buildings(old_buildings, new_buildings)
+    matched_new = set(matches.values())
+
+    diff = LayoutDiff(matches=matches)
+    diff.removed = [b for b in old_buildings if b not in matches]
+    diff.added = [b for b in new_buildings if b not in matched_new]
+    diff.changes = [BuildingChange(o, n) for o, n in matches.items() if building_key(o) != building_key(n)]
+
+    # Conveyors are compared by the new version's buildings at their ends
+    old_conveyors = conveyor_keys(old, matches)
+    new_conveyors = conveyor_keys(new, {b: b for b in new_buildings})
+    diff.removed_conveyors = [c for c in old.conveyors
+                              if (matches.get(c.source), matches.get(c.target)) not in new_conveyors]
+    diff.added_conveyors = [c for key, c in new_conveyors.items() if key not in old_conveyors]
+    return diff
+
+@dataclass
+class MergeResult:
+    layout: FactoryLayout
+    conflicts: list = field(default_factory=list)  # Descriptions of the edits of theirs that were not applied
+
+def merge_layouts(base: FactoryLayout, ours: FactoryLayout, theirs: FactoryLayout) -> MergeResult:
+    """Three-way merge of two versions of a layout that were both edited from base.
+
+    Edits made on one side only are taken over. When both sides changed the same
+    building differently, or an edit of theirs would overlap a building of the merged
+    result, ours wins and the edit of theirs is reported as a conflict.
+    """
+    ours_diff = diff_layouts(base, ours)
+    theirs_diff = diff_layouts(base, theirs)
+    conflicts = []
+
+    # Every building of each version is mapped to its building in the merged layout
+    merged = {}       # Building of base, ours or theirs -> merged building
+    kept = []         # Merged buildings taken from base or ours
+    from_theirs = []  # (merged building, fallback building of ours or None, building of theirs)
+
+    def take(building: BuildingInstance, *versions) -> BuildingInstance:
+        clone = building.clone()
+        for version in versions:
+            if version is not None:
+                merged[version] = clone
+        return clone
+
+    for building in base.buildings:
+        our, their = ours_diff.matches.get(building), theirs_diff.matches.get(building)
+        ours_changed = our is None or building_key(our) != building_key(building)
+        theirs_changed = their is None or building_key(their) != building_key(building)
+
+        if not theirs_changed:
+            if our is not None:
+                kept.append(take(our, building, our, their))
+        elif not ours_changed:
+            if their is not None:
+                from_theirs.append((take(their, building, our, their), our, their))
+        elif our is not None and their is not None and building_key(our) == building_key(their):
+            kept.append(take(our, building, our, their))  # The same edit on both sides
+        elif our is not None or their is not None:
+            conflicts.append(f'{building.type.name} at ({building.position.x}, {building.position.y}) '
+                             f'was changed differently on both sides')
+            if our is not None:
+                kept.append(take(our, building, our))
+
+    ours_added = defaultdict(list)
+    for building in ours_diff.added:
+        clone = take(building, building)
+        kept.append(clone)
+        ours_added[building_key(building)].append(clone)
+    for building in theirs_diff.added:
+        same = ours_added.get(building_key(building))
+        if same:
+            merged[building] = same.pop()  # Added identically on both sides
+        else:
+            from_theirs.append((take(building, building), None, building))
+
+    layout = FactoryLayout()
+    layout.add_many(kept)
+    for clone, fallback, their in from_theirs:
+        overlapping = layout.overlaps(clone)
+        if not overlapping:
+            layout.add_building(clone)
+            continue
+
+        other = overlapping[0]
+        name = other.type.name if isinstance(other, BuildingInstance) else f'blueprint {other.blueprint.name}'
+        conflicts.append(f'{their.type.name} at ({their.position.x}, {their.position.y}) of theirs '
+                         f'overlaps {name} at ({other.position.x}, {other.position.y})')
+
+        # A building ours left alone stays as it is in ours, one added by theirs is dropped
+        replacement = None
+        if fallback is not None:
+            replacement = fallback.clone()
+            layout.add_building(replacement)
+        for version in [version for version, target in merged.items() if target is clone]:
+            if replacement is not None and version is not their:
+                merged[version] = replacement
+            else:
+                del merged[version]
+
+    merge_conveyors(layout, merged, base, ours, theirs)
+    merge_blueprints(layout, base, ours, theirs, conflicts)
+    return MergeResult(layout, conflicts)
+
+def merge_conveyors(layout: FactoryLayout, merged: dict, base: FactoryLayout,
+                    ours: FactoryLayout, theirs: FactoryLayout) -> None:
+    """Keep the conveyors present on both sides or added on one, unless either side removed them."""
+    base_keys = conveyor_keys(base, merged)
+    ours_keys = conveyor_keys(ours, merged)
+    theirs_keys = conveyor_keys(theirs, merged)
+    for key in list(ours_keys) + [key for key in theirs_keys if key not in ours_keys]:
+        in_ours, in_theirs, in_base = key in ours_keys, key in theirs_keys, key in base_keys
+        if not ((in_ours and in_theirs) or (in_ours and not in_base) or (in_theirs and not in_base)):
+            continue
+        conveyor = ours_keys[key] if in_ours else theirs_keys[key]
+        source, target = key
+        if source.layout is not layout or target.layout is not layout:
+            continue
+        # The path is only reused while both ends are where they were in that version
+        unchanged = (building_key(conveyor.source) == building_key(source)
+                     and building_key(conveyor.target) == building_key(target))
+        layout.conveyors.add(Conveyor(source, target, list(conveyor.path) if unchanged else None))
+
+def merge_blueprints(layout: FactoryLayout, base: FactoryLayout, ours: FactoryLayout, theirs: FactoryLayout,
+                     conflicts: list) -> None:
+    """Merge the placed blueprints as sets of (blueprint, position, rotation)."""
+    def keys(version: FactoryLayout) -> dict:
+        return {(p.blueprint.name, p.position.units, p.rotation.value): p
+                for p in version.blueprint_map.values()}
+
+    base_keys, ours_keys, theirs_keys = keys(base), keys(ours), keys(theirs)
+    for key, placed in list(ours_keys.items()) + [item for item in theirs_keys.items() if item[0] not in ours_keys]:
+        in_ours, in_theirs, in_base = key in ours_keys, key in theirs_keys, key in base_keys
+        if not ((in_ours and in_theirs) or (in_ours and not in_base) or (in_theirs and not in_base)):
+            continue
+        clone = placed.clone()
+        if not in_ours and layout.overlaps(clone):
+            conflicts.append(f'Blueprint {placed.blueprint.name} at ({placed.position.x}, {placed.position.y}) '
+                             f'of theirs overlaps the merged layout')
+            continue
+        layout.add_blueprint_instance(clone)
@@ -0,0 +1,205 @@
+from dataclasses import dataclass, field
+
+from model.BuldingInstance import BuildingInstance
+
+PASS_THROUGH_CATEGORIES = ('Logistics', 'Organisation')
+NO_RECIPE = 'no recipe'
+
+@dataclass
+class BuildingFlow:
+    """The solved state of a building. Rates are per minute."""
+    utilization: float | None  # None for buildings that do not run recipes
+    limit: str | None = None   # What keeps the building below 100%, if anything
+    inputs: dict[str, float] = field(default_factory=dict)
+    outputs: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def is_bottleneck(self) -> bool:
+        return self.limit is not None and self.limit != NO_RECIPE
+
+@dataclass
+class ConveyorFlow:
+    """The solved throughput of a conveyor, in items per minute."""
+    rate: float
+    capacity: float
+
+    @property
+    def is_saturated(self) -> bool:
+        return self.rate >= self.capacity - 1e-6
+
+class Component:
+    """A set of buildings connected by conveyors, solved as one unit."""
+
+    def __init__(self, buildings: list[BuildingInstance], conveyor_ids: list[int]) -> None:
+        self.buildings = buildings
+        self.conveyor_ids = conveyor_ids
+
+class ProductionSolver:
+    """Production rates of a layout's buildings, following the items along the conveyors.
+
+    Buildings run their recipe as fast as their inputs and the belts allow. Pass-through
+    buildings (splitters, mergers, lifts, storage) split what they receive evenly over
+    their outgoing belts, everything else consumes it. Buildings without incoming belts
+    are assumed to be supplied externally, outputs without outgoing belts are collected.
+
+    Every connected component is solved as a fixed point over its conveyor incidence
+    arrays, each iteration being a handful of vectorized NumPy operations. Edits only mark
+    the affected components dirty (see FactoryLayout.topology_changed), solve() recomputes
+    just those, so the cost of an edit does not depend on the size of the whole layout.
+    """
+
+    BELT_CAPACITY = 780  # Items per minute of a Mk.5 conveyor belt
+
+    def __init__(self, layout) -> None:
+        self.layout = layout
+        self.building_flows = {}  # Building -> BuildingFlow
+        self.conveyor_flows = {}  # Conveyor id -> ConveyorFlow
+        self.components = {}      # Building -> the component it was last solved in
+        self.dirty = set(layout.buildings)
+        layout.topology_listeners.append(self.topology_changed)
+
+    def topology_changed(self, buildings: list[BuildingInstance] | None) -> None:
+        if buildings is None:
+            self.building_flows = {}
+            self.conveyor_flows = {}
+            self.components = {}
+            self.dirty = set(self.layout.buildings)
+        else:
+            self.dirty.update(buildings)
+
+    def flow(self, building: BuildingInstance) -> BuildingFlow | None:
+        return self.building_flows.get(building)
+
+    def conveyor_flow(self, conveyor_id: int) -> ConveyorFlow | None:
+        return self.conveyor_flows.get(conveyor_id)
+
+    def bottlenecks(self) -> list[BuildingInstance]:
+        return [b for b, flow in self.building_flows.items() if flow.is_bottleneck]
+
+    def solve(self) -> set[BuildingInstance]:
+        """Recompute the components touched since the last call and return their buildings."""
+        if not self.dirty:
+            return set()
+
+        # The old components of the dirty buildings may have been split or merged, re-solve them as a whole
+        stale = set()
+        for building in self.dirty:
+            component = self.components.get(building)
+            if component is None:
+                stale.add(building)
+                continue
+            stale.update(component.buildings)
+            for conveyor_id in component.conveyor_ids:
+                self.conveyor_flows.pop(conveyor_id, None)
+        self.dirty = set()
+
+        for building in stale:
+            self.components.pop(building, None)
+            self.building_flows.pop(building, None)
+
+        solved = set()
+        for building in stale:
+            if building in solved or building.layout is not self.layout:
+                continue
+            component = self.find_component(building)
+            self.solve_component(component)
+            solved.update(component.buildings)
+        return stale
+
+    def find_component(self, start: BuildingInstance) -> Component:
+        network = self.layout.conveyors
+        buildings = [start]
+        seen = {start}
+        conveyor_ids = set()
+        for building in buildings:
+            for conveyor in network.attached(building):
+                conveyor_ids.add(conveyor.id)
+                for other in (conveyor.source, conveyor.target):
+                    if other not in seen:
+                        seen.add(other)
+                        buildings.append(other)
+        return Component(buildings, sorted(conveyor_ids))
+
+    def solve_component(self, component: Component) -> None:
+        # NumPy takes longer to import than the editor takes to show its window, so it is
+        # only loaded once there is something to solve
+        import numpy as np
+
+        buildings = component.buildings
+        conveyors = [self.layout.conveyors.get_conveyor(i) for i in component.conveyor_ids]
+        index = {building: i for i, building in enumerate(buildings)}
+        items = sorted({item for b in buildings if b.recipe is not None
+                        for item in (*b.recipe.inputs, *b.recipe.outputs)})
+        item_index = {item: k for k, item in enumerate(items)}
+
+        n, k = len(buildings), len(items)
+        produced = np.zeros((n, k))  # Rates at 100%
+        required = np.zeros((n, k))
+        producing = np.zeros(n, dtype=bool)
+        pass_through = np.zeros(n, dtype=bool)
+        for i, building in enumerate(buildings):
+            if building.recipe is not None:
+                producing[i] = True
+                for item, rate in building.recipe.inputs.items():
+                    required[i, item_index[item]] = rate
+                for item, rate in building.recipe.outputs.items():
+                    produced[i, item_index[item]] = rate
+            elif building.type.category in PASS_THROUGH_CATEGORIES:
+                pass_through[i] = True
+
+        source = np.array([index[c.source] for c in conveyors], dtype=np.intp)
+        target = np.array([index[c.target] for c in conveyors], dtype=np.intp)
+        out_degree = np.bincount(source, minlength=n)
+        has_input = np.bincount(target, minlength=n) > 0
+        split = np.maximum(out_degree[source], 1)[:, None]
+
+        # A machine whose output cannot leave fast enough backs up
+        output_rate = produced.sum(axis=1)
+        output_limit = np.full(n, np.inf)
+        limited = (out_degree > 0) & (output_rate > 0)
+        output_limit[limited] = out_degree[limited] * self.BELT_CAPACITY / output_rate[limited]
+
+        safe_required = np.where(required > 0, required, 1)
+        flows = np.zeros((len(conveyors), k))
+        utilization = np.where(producing, np.minimum(1, output_limit), 0)
+        input_ratio = np.full((n, k), np.inf)
+
+        # Flows move one conveyor further per iteration, so acyclic components converge within
+        # n + 1 iterations. Loops through pass-through buildings are cut off there.
+        for _ in range(n + 1):
+            inflow = np.zeros((n, k))
+            np.add.at(inflow, target, flows)
+            input_ratio = np.where(required > 0, inflow / safe_required, np.inf)
+            input_limit = np.where(has_input, input_ratio.min(axis=1, initial=np.inf), np.inf)
+            utilization = np.where(producing, np.minimum(1, np.minimum(input_limit, output_limit)), 0)
+
+            outflow = np.where(pass_through[:, None], inflow, utilization[:, None] * produced)
+            new_flows = outflow[source] / split
+            totals = new_flows.sum(axis=1)
+            over = totals > self.BELT_CAPACITY
+            new_flows[over] *= (self.BELT_CAPACITY / totals[over])[:, None]
+
+            converged = np.allclose(new_flows, flows, rtol=0, atol=1e-9)
+            flows = new_flows
+            if converged:
+                break
+
+        starved_item = input_ratio.argmin(axis=1) if k else np.zeros(n, dtype=np.intp)
+        for i, building in enumerate(buildings):
+            if producing[i]:
+                rate = float(utilization[i])
+                limit = None
+                if rate < 1 - 1e-9:
+                    limit = 'output' if output_limit[i] <= rate + 1e-9 else f'input: {items[starved_item[i]]}'
+                self.building_flows[building] = BuildingFlow(
+                    rate, limit,
+                    {item: rate * r for item, r in building.recipe.inputs.items()},
+                    {item: rate * r for item, r in building.recipe.outputs.items()})
+            elif building.type.recipes:
+                self.building_flows[building] = BuildingFlow(0.0, NO_RECIPE)
+            else:
+                self.building_flows[building] = BuildingFlow(None)
+            self.components[building] = component
+
+        for conveyor, total in zip(conveyors, flows.sum(axis=1).tolist()):
+            self.conveyor_flows[conveyor.id] = ConveyorFlow(total, self.BELT_CAPACITY)
@@ -0,0 +1,54 @@
+from dataclasses import dataclass, field
+
+@dataclass
+class Recipe:
+    """A production recipe, rates are items (or m³) per minute at 100% clock speed."""
+    name: str
+    building: str
+    inputs: dict[str, float] = field(default_factory=dict)
+    outputs: dict[str, float] = field(default_factory=dict)
+
+recipes = [
+    # Smelter
+    Recipe('Iron Ingot', 'Smelter', {'Iron Ore': 30}, {'Iron Ingot': 30}),
+    Recipe('Copper Ingot', 'Smelter', {'Copper Ore': 30}, {'Copper Ingot': 30}),
+    Recipe('Caterium Ingot', 'Smelter', {'Caterium Ore': 45}, {'Caterium Ingot': 15}),
+
+    # Foundry
+    Recipe('Steel Ingot', 'Foundry', {'Iron Ore': 45, 'Coal': 45}, {'Steel Ingot': 45}),
+
+    # Constructor
+    Recipe('Iron Plate', 'Constructor', {'Iron Ingot': 30}, {'Iron Plate': 20}),
+    Recipe('Iron Rod', 'Constructor', {'Iron Ingot': 15}, {'Iron Rod': 15}),
+    Recipe('Screw', 'Constructor', {'Iron Rod': 10}, {'Screw': 40}),
+    Recipe('Wire', 'Constructor', {'Copper Ingot': 15}, {'Wire': 30}),
+    Recipe('Cable', 'Constructor', {'Wire': 60}, {'Cable': 30}),
+    Recipe('Concrete', 'Constructor', {'Limestone': 45}, {'Concrete': 15}),
+    Recipe('Steel Beam', 'Constructor', {'Steel Ingot': 60}, {'Steel Beam': 15}),
+    Recipe('Steel Pipe', 'Constructor', {'Steel Ingot': 30}, {'Steel Pipe': 20}),
+
+    # Assembler
+    Recipe('Reinforced Iron Plate', 'Assembler', {'Iron Plate': 30, 'Screw': 60}, {'Reinforced Iron Plate': 5}),
+    Recipe('Rotor', 'Assembler', {'Iron Rod': 20, 'Screw': 100}, {'Rotor': 4}),
+    Recipe('Modular Frame', 'Assembler', {'Reinforced Iron Plate': 3, 'Iron Rod': 12}, {'Modular Frame': 2}),
+    Recipe('Encased Industrial Beam', 'Assembler', {'Steel Beam': 18, 'Concrete': 36}, {'Encased Industrial Beam': 6}),
+
+    # Manufacturer
+    Recipe('Heavy Modular Frame', 'Manufacturer',
+           {'Modular Frame': 10, 'Steel Pipe': 30, 'Encased Industrial Beam': 10, 'Screw': 200},
+           {'Heavy Modular Frame': 2}),
+
+    # Refinery
+    Recipe('Plastic', 'Refinery', {'Crude Oil': 30}, {'Plastic': 20, 'Heavy Oil Residue': 10}),
+    Recipe('Fuel', 'Refinery', {'Crude Oil': 60}, {'Fuel': 40, 'Polymer Resin': 30}),
+
+    # Power
+    Recipe('Coal Power', 'Coal Generator', {'Coal': 15, 'Water': 45}),
+    Recipe('Fuel Power', 'Fuel Generator', {'Fuel': 20}),
+]
+
+recipe_lookup = {r.name: r for r in recipes}
+
+def recipes_for(building_name: str) -> list[Recipe]:
+    """Return the recipes a building type can run."""
+    return [r for r in recipes if r.building == building_name]
@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+
+from model.BuldingInstance import BuildingInstance
+from model.SpatialIndex import Bounds
+
+class Selection:
+    """The selected buildings of a layout, kept as a set of building ids.
+
+    Every operation reports its net change to the listeners once, as the sets of added
+    and removed ids, however many buildings it touches. Operations inside a batch() block
+    are reported together when the block ends. Buildings removed from the layout leave
+    the selection by themselves, replacing the layout's contents clears it.
+    """
+
+    def __init__(self, layout) -> None:
+        self.layout = layout
+        self.ids = set()
+        self.listeners = []  # Called with the (added, removed) building ids of every change
+        self.batch_depth = 0
+        self.batch_start = None  # The ids when the outermost batch started
+        layout.topology_listeners.append(self.on_topology_changed)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, building_id: int) -> bool:
+        return building_id in self.ids
+
+    def __iter__(self):
+        return iter(list(self.ids))
+
+    def buildings(self) -> list[BuildingInstance]:
+        """Return the selected buildings, in id order."""
+        return [self.layout.get_building(building_id) for building_id in sorted(self.ids)]
+
+    ## ======================================================
+    ## Bulk operations
+    ## ======================================================
+
+    def select(self, building_ids) -> None:
+        added = set(building_ids) - self.ids
+        self.ids |= added
+        self.changed(added, set())
+
+    def deselect(self, building_ids) -> None:
+        removed = self.ids.intersection(building_ids)
+        self.ids -= removed
+        self.changed(set(), removed)
+
+    def replace(self, building_ids) -> None:
+        new_ids = set(building_ids)
+        added, removed = new_ids - self.ids, self.ids - new_ids
+        self.ids = new_ids
+        self.changed(added, removed)
+
+    def toggle(self, building_id: int) -> None:
+        if building_id in self.ids:
+            self.deselect([building_id])
+        else:
+            self.select([building_id])
+
+    def clear(self) -> None:
+        self.replace(())
+
+    def select_all(self) -> None:
+        self.replace(self.layout.building_map)
+
+    def invert(self) -> None:
+        self.replace(self.layout.building_map.keys() - self.ids)
+
+    def select_types(self, type_names, add: bool = False) -> None:
+        """Select all buildings of the given types, in addition to the current selection if add is set."""
+        type_names = set(type_names)
+        matching = [b.id for b in self.layout.building_map.values() if b.type.name in type_names]
+        if add:
+            self.select(matching)
+        else:
+            self.replace(matching)
+
+    def select_rect(self, bounds: Bounds, add: bool = False) -> None:
+        """Select the buildings overlapping a rectangle (in meters), found through the spatial index."""
+        matching = [b.id for b in self.layout.query_rect(*bounds)]
+        if add:
+            self.select(matching)
+        else:
+            self.replace(matching)
+
+    ## ======================================================
+    ## Change notification
+    ## ======================================================
+
+    @contextmanager
+    def batch(self):
+        """Report all changes made inside the block as one."""
+        if self.batch_depth == 0:
+            self.batch_start = set(self.ids)
+        self.batch_depth += 1
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                start, self.batch_start = self.batch_start, None
+                self.changed(self.ids - start, start - self.ids)
+
+    def changed(self, added: set, removed: set) -> None:
+        if self.batch_depth or not (added or removed):
+            return
+        for listener in self.listeners:
+            listener(added, removed)
+
+    def on_topology_changed(self, buildings) -> None:
+        if buildings is None:
+            self.clear()
+            return
+        gone = [b.id for b in buildings if b.id in self.ids and self.layout.building_map.get(b.id) is not b]
+        if gone:
+            self.deselect(gone)
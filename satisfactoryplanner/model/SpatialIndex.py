@@ -0,0 +1,123 @@
+import math
+
+Bounds = tuple[float, float, float, float]
+
+def bounds_intersect(a: Bounds, b: Bounds) -> bool:
+    """Check whether two (left, top, right, bottom) rectangles overlap. Touching edges do not count."""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+class SpatialIndex:
+    """Uniform grid hash over axis aligned rectangles.
+
+    Every entry is registered in all grid cells its bounds touch, so queries only
+    look at the entries near the queried area, regardless of the total entry count.
+    """
+
+    def __init__(self, cell_size: int = 8):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, item) -> bool:
+        return item in self.entries
+
+    def cell_range(self, bounds: Bounds):
+        """Yield the grid cells covered by the given bounds."""
+        left, top, right, bottom = bounds
+        for cx in range(math.floor(left / self.cell_size), math.floor(right / self.cell_size) + 1):
+            for cy in range(math.floor(top / self.cell_size), math.floor(bottom / self.cell_size) + 1):
+                yield (cx, cy)
+
+    def insert(self, item, bounds: Bounds) -> None:
+        if item in self.entries:
+            self.remove(item)
+
+        cells = list(self.cell_range(bounds))
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(item)
+        self.entries[item] = (bounds, cells)
+
+    def insert_many(self, entries) -> None:
+        """Insert (item, bounds) pairs."""
+        cells_by_key = self.cells
+        for item, bounds in entries:
+            if item in self.entries:
+                self.remove(item)
+            cells = list(self.cell_range(bounds))
+            for cell in cells:
+                cells_by_key.setdefault(cell, set()).add(item)
+            self.entries[item] = (bounds, cells)
+
+    def remove(self, item) -> None:
+        _, cells = self.entries.pop(item)
+        for cell in cells:
+            bucket = self.cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[cell]
+
+    def remove_many(self, items) -> None:
+        cells_by_key = self.cells
+        for item in items:
+            _, cells = self.entries.pop(item)
+            for cell in cells:
+                bucket = cells_by_key[cell]
+                bucket.discard(item)
+                if not bucket:
+                    del cells_by_key[cell]
+
+    def update(self, item, bounds: Bounds) -> None:
+        """Move an entry to new bounds, only touching the cells that actually changed."""
+        if item not in self.entries:
+            self.insert(item, bounds)
+            return
+
+        old_bounds, old_cells = self.entries[item]
+        if old_bounds == bounds:
+            return
+
+        cells = list(self.cell_range(bounds))
+        if cells != old_cells:
+            new_cells = set(cells)
+            for cell in old_cells:
+                if cell not in new_cells:
+                    bucket = self.cells[cell]
+                    bucket.discard(item)
+                    if not bucket:
+                        del self.cells[cell]
+            for cell in new_cells:
+                self.cells.setdefault(cell, set()).add(item)
+        self.entries[item] = (bounds, cells)
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.entries.clear()
+
+    def bounds(self, item) -> Bounds:
+        return self.entries[item][0]
+
+    def candidates(self, bounds: Bounds) -> set:
+        """Return the entries sharing a grid cell with bounds, a superset of the actual hits."""
+        result = set()
+        for cell in self.cell_range(bounds):
+            bucket = self.cells.get(cell)
+            if bucket:
+                result.update(bucket)
+        return result
+
+    def query_rect(self, bounds: Bounds) -> list:
+        """Return the entries whose bounds overlap the given rectangle."""
+        return [item for item in self.candidates(bounds) if bounds_intersect(self.entries[item][0], bounds)]
+
+    def query_point(self, x: float, y: float) -> list:
+        """Return the entries whose bounds contain the given point, edges included."""
+        bucket = self.cells.get((math.floor(x / self.cell_size), math.floor(y / self.cell_size)), ())
+        result = []
+        for item in bucket:
+            left, top, right, bottom = self.entries[item][0]
+            if left <= x <= right and top <= y <= bottom:
+                result.append(item)
+        return result
@@ -0,0 +1,64 @@
+from PySide6.QtWidgets import (
+    QDialog, QFormLayout, QLineEdit, QSpinBox, QDoubleSpinBox, QCheckBox, QDialogButtonBox
+)
+
+from view.Settings import Settings
+from model.AutoLayout import parse_bill
+from model.BuldingInstance import BuildingInstance, Position, Rotation
+
+class AutoLayoutDialog(QDialog):
+    """Asks what the auto layout arranges and within which area.
+
+    Either the selected buildings are rearranged, or new buildings are added from a bill
+    such as '8 Constructor, 4 Smelter'.
+    """
+
+    def __init__(self, selected: list[BuildingInstance], area: tuple[int, int], parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Auto Layout')
+        self.selected = selected
+
+        form = QFormLayout(self)
+        self.rearrange = QCheckBox(f'Rearrange the {len(selected)} selected buildings')
+        self.rearrange.setChecked(bool(selected))
+        self.rearrange.setEnabled(bool(selected))
+        form.addRow(self.rearrange)
+
+        self.bill = QLineEdit()
+        self.bill.setPlaceholderText('8 Constructor, 4 Smelter, 2 Assembler')
+        self.bill.setEnabled(not selected)
+        self.rearrange.toggled.connect(lambda checked: self.bill.setEnabled(not checked))
+        form.addRow('Buildings:', self.bill)
+
+        self.width_box = self.meters_box(area[0], 1, 10000)
+        self.height_box = self.meters_box(area[1], 1, 10000)
+        self.clearance_box = self.meters_box(Settings.AUTO_LAYOUT_CLEARANCE, 0, 20)
+        form.addRow('Area width:', self.width_box)
+        form.addRow('Area length:', self.height_box)
+        form.addRow('Clearance:', self.clearance_box)
+
+        self.seconds_box = QDoubleSpinBox()
+        self.seconds_box.setRange(1, 600)
+        self.seconds_box.setValue(Settings.AUTO_LAYOUT_SECONDS)
+        self.seconds_box.setSuffix(' s')
+        form.addRow('Time budget:', self.seconds_box)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        form.addRow(buttons)
+
+    @staticmethod
+    def meters_box(value: int, minimum: int, maximum: int) -> QSpinBox:
+        box = QSpinBox()
+        box.setRange(minimum, maximum)
+        box.setValue(value)
+        box.setSuffix(' m')
+        return box
+
+    def buildings(self) -> list[BuildingInstance]:
+        """Return the buildings to arrange, raises ValueError for an invalid bill."""
+        if self.rearrange.isChecked():
+            return self.selected
+        return [BuildingInstance(building_type, Position(0, 0), Rotation.DEG_0)
+                for building_type in parse_bill(self.bill.text())]
@@ -0,0 +1,97 @@
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsColorizeEffect
+from PySide6.QtGui import QPainterPath, QPen, QColor
+from PySide6.QtCore import Qt, QRectF
+
+from view.Settings import Settings
+from view.IconCache import IconCache
+from view.ConveyorItem import ConveyorItem
+from model.Blueprint import BlueprintInstance
+
+class BlueprintItem(QGraphicsItem):
+    """A placed blueprint drawn as a single item.
+
+    The buildings and belts are painted from the blueprint's own data and the result is
+    kept in Qt's device coordinate cache, so a placed blueprint costs one item and one
+    cached image no matter how many buildings it contains.
+    """
+
+    def __init__(self, instance: BlueprintInstance):
+        super().__init__()
+        self.instance = instance
+        self.collision_effect = None
+
+        blueprint = instance.blueprint
+        ppm = Settings.PIXELS_PER_METER
+        left, top, right, bottom = blueprint.bounds
+        self.rect = QRectF(left * ppm, top * ppm, (right - left) * ppm, (bottom - top) * ppm)
+
+        # Picking and selection use the buildings' footprints, not the bounding box
+        self.footprint_path = QPainterPath()
+        for left, top, right, bottom in blueprint.footprints:
+            self.footprint_path.addRect(left * ppm, top * ppm, (right - left) * ppm, (bottom - top) * ppm)
+
+        self.belt_path = QPainterPath()
+        for conveyor in blueprint.layout.conveyors:
+            if conveyor.path:
+                points = ConveyorItem.corner_points(conveyor.path)
+                self.belt_path.moveTo(ConveyorItem.cell_center(points[0]))
+                for point in points[1:]:
+                    self.belt_path.lineTo(ConveyorItem.cell_center(point))
+
+        self.belt_pen = QPen(QColor('#d08a2c'), ConveyorItem.BELT_WIDTH * ppm)
+        self.belt_pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
+        self.outline_pen = QPen(QColor('#4fa3e0'), 0.3 * ppm, Qt.PenStyle.DashLine)
+
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable, True)
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+        self.update()
+
+    def update(self):
+        """Update the item's position and rotation from its instance."""
+        self.setPos(Settings.PIXELS_PER_METER * self.instance.position.x,
+                    Settings.PIXELS_PER_METER * self.instance.position.y)
+        self.setRotation(self.instance.rotation.value * 90)
+
+    def set_colliding(self, colliding: bool):
+        """Highlight the blueprint as colliding, the effect is created once and then only toggled."""
+        if self.collision_effect is None:
+            if not colliding:
+                return
+            self.collision_effect = QGraphicsColorizeEffect()
+            self.collision_effect.setColor(QColor('red'))
+            self.collision_effect.setStrength(0.5)
+            self.setGraphicsEffect(self.collision_effect)
+        self.collision_effect.setEnabled(colliding)
+
+    def boundingRect(self) -> QRectF:
+        margin = self.outline_pen.widthF()
+        return self.rect.adjusted(-margin, -margin, margin, margin)
+
+    def shape(self) -> QPainterPath:
+        return self.footprint_path
+
+    def paint(self, painter, option, widget=None):
+        ppm = Settings.PIXELS_PER_METER
+        scale = option.levelOfDetailFromTransform(painter.worldTransform())
+        detailed = scale >= Settings.DETAIL_MIN_SCALE
+        level = IconCache.zoom_level(scale)
+        for building in self.instance.blueprint.layout.buildings:
+            width, length = building.type.width * ppm, building.type.length * ppm
+            if not detailed:
+                left, top, right, bottom = building.footprint()
+                painter.fillRect(QRectF(left * ppm, top * ppm, (right - left) * ppm, (bottom - top) * ppm),
+                                 QColor(Settings.CATEGORY_COLORS.get(building.type.category, Settings.DEFAULT_CATEGORY_COLOR)))
+                continue
+            painter.save()
+            painter.translate(building.position.x * ppm, building.position.y * ppm)
+            painter.rotate(building.rotation.value * 90)
+            pixmap = IconCache.pixmap(building.type, width, length, level)
+            painter.drawPixmap(QRectF(-width / 2, -length / 2, width, length), pixmap, QRectF(pixmap.rect()))
+            painter.restore()
+
+        painter.setPen(self.belt_pen)
+        painter.drawPath(self.belt_path)
+
+        painter.setPen(self.outline_pen if not self.isSelected() else QPen(QColor('white'), self.outline_pen.widthF()))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(self.rect)
@@ -1,30 +1,107 @@
 from .DraggableRectItem import DraggableRectItem
 from .Settings import Settings
-from PySide6.QtGui import QPixmap, QPainterPath
+from .IconCache import IconCache
+from PySide6.QtGui import QPainterPath, QColor, QPen
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtWidgets import QGraphicsColorizeEffect
 
 from model.BuldingInstance import BuildingType
 from model.FactoryLayout import BuildingInstance
+from model.ProductionSolver import BuildingFlow
 
 class BuildingItem(DraggableRectItem):
     type: BuildingType
 
     def __init__(self, instance: BuildingInstance):
+        width = Settings.PIXELS_PER_METER * instance.type.width
+        length = Settings.PIXELS_PER_METER * instance.type.length
         super().__init__(Settings.PIXELS_PER_METER * instance.position.x,
                          Settings.PIXELS_PER_METER * instance.position.y,
-                         Settings.PIXELS_PER_METER * instance.type.width, 
-                         Settings.PIXELS_PER_METER * instance.type.length,
-                         QPixmap(instance.type.icon))
+                         width,
+                         length,
+                         IconCache.pixmap(instance.type, width, length))
         self.instance = instance
+        self.syncing = False
+        self.collision_effect = None
+        self.bottleneck = False
         self.update()
 
     def update(self):
         """Update the visual representation of the building based on its instance data."""
+        # The instance is the source of truth here, so the position change is not written back
+        self.syncing = True
         self.setPos(Settings.PIXELS_PER_METER * self.instance.position.x,
                     Settings.PIXELS_PER_METER * self.instance.position.y)
         self.setRotation(self.instance.rotation.value * 90)
+        self.syncing = False
+
+    def set_instance(self, instance: BuildingInstance):
+        """Reuse the item for another building, the pixmap is only replaced if the type differs."""
+        if instance.type is not self.instance.type:
+            width = Settings.PIXELS_PER_METER * instance.type.width
+            length = Settings.PIXELS_PER_METER * instance.type.length
+            pixmap = IconCache.pixmap(instance.type, width, length)
+            if pixmap.width() != width or pixmap.height() != length:
+                pixmap = pixmap.scaled(width, length)
+            self.setPixmap(pixmap)
+            self.setOffset(-pixmap.width() / 2, -pixmap.height() / 2)
+        self.instance = instance
+        self.set_colliding(False)
+        self.bottleneck = False
+        self.setToolTip('')
+        self.update()
+
+    def set_colliding(self, colliding: bool):
+        """Highlight the building as colliding, the effect is created once and then only toggled."""
+        if self.collision_effect is None:
+            if not colliding:
+                return
+            self.collision_effect = QGraphicsColorizeEffect()
+            self.collision_effect.setColor(QColor('red'))
+            self.collision_effect.setStrength(0.5)
+            self.setGraphicsEffect(self.collision_effect)
+        self.collision_effect.setEnabled(colliding)
+
+    def set_flow(self, flow: BuildingFlow | None):
+        """Show the solved production rates in the tooltip, bottlenecks get an orange outline."""
+        lines = [self.instance.type.name]
+        if self.instance.recipe is not None:
+            lines.append(f'Recipe: {self.instance.recipe.name}')
+        if flow is not None and flow.utilization is not None:
+            lines.append(f'Utilization: {flow.utilization:.0%}')
+            if flow.limit is not None:
+                lines.append(f'Limited by {flow.limit}')
+            lines += [f'In: {item} {rate:.1f}/min' for item, rate in flow.inputs.items()]
+            lines += [f'Out: {item} {rate:.1f}/min' for item, rate in flow.outputs.items()]
+        self.setToolTip('\n'.join(lines))
+
+        bottleneck = flow is not None and flow.is_bottleneck
+        if bottleneck != self.bottleneck:
+            self.bottleneck = bottleneck
+            super().update()
+
+    def paint(self, painter, option, widget=None):
+        level = IconCache.zoom_level(option.levelOfDetailFromTransform(painter.worldTransform()))
+        if level == 0:
+            super().paint(painter, option, widget)
+        else:
+            # Zoomed out, a smaller copy of the icon is drawn instead of scaling down the full one
+            rect = self.boundingRect()
+            pixmap = IconCache.pixmap(self.instance.type, rect.width(), rect.height(), level)
+            painter.drawPixmap(rect, pixmap, QRectF(pixmap.rect()))
+            if self.isSelected():
+                # The same outline QGraphicsPixmapItem draws for selected items
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+                painter.setPen(QPen(QColor('white'), 0))
+                painter.drawRect(rect)
+                painter.setPen(QPen(QColor('black'), 0, Qt.PenStyle.DashLine))
+                painter.drawRect(rect)
+        if self.bottleneck:
+            painter.setPen(QPen(QColor('orange'), 0.5 * Settings.PIXELS_PER_METER))
+            painter.drawRect(self.boundingRect())
 
     def itemChange(self, change, value):
-        if change == BuildingItem.ItemPositionHasChanged:
+        if change == BuildingItem.ItemPositionHasChanged and not self.syncing:
             self.instance.move_to(value.x() / Settings.PIXELS_PER_METER,
                                   value.y() / Settings.PIXELS_PER_METER)
             
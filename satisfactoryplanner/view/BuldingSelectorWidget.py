@@ -1,9 +1,10 @@
 from PySide6.QtWidgets import QVBoxLayout, QGridLayout, QPushButton, QWidget, QScrollArea
-from PySide6.QtGui import QPixmap
 from collections import defaultdict
 from PySide6.QtCore import Qt, Signal
 
 from view.Accordion import Accordion
+from view.IconCache import IconCache
+from model.BuldingInstance import resource_path
 
 class BuildingPaletteWidget(QScrollArea):
     building_selected = Signal(object)
@@ -22,6 +23,8 @@ class BuildingPaletteWidget(QScrollArea):
         self.setWidget(self.container)
         self.setWidgetResizable(True)
 
+        self.accordions = []
+
         self.populate_buildings(buildings)
 
     def populate_buildings(self, buildings):
@@ -31,7 +34,7 @@ class BuildingPaletteWidget(QScrollArea):
 
         for category, building_types in grouped.items():
             accordion = Accordion(category)
-            accordion.icon.setPixmap(QPixmap('./resources/ResIcon_Production.webp').scaled(32, 32))
+            self.accordions.append(accordion)
             grid = QWidget()
             grid_layout = QGridLayout(grid)
 
@@ -51,3 +54,8 @@ class BuildingPaletteWidget(QScrollArea):
 
             self.container_layout.addWidget(accordion)
 
+    def load_icons(self):
+        """Decode and set the category icons. Deferred until the window is on screen."""
+        icon = IconCache.source(resource_path('ResIcon_Production.webp')).scaled(32, 32)
+        for accordion in self.accordions:
+            accordion.icon.setPixmap(icon)
@@ -0,0 +1,68 @@
+from PySide6.QtWidgets import QGraphicsPathItem
+from PySide6.QtGui import QPainterPath, QPen, QColor
+from PySide6.QtCore import Qt, QPointF
+
+from view.Settings import Settings
+from model.Conveyor import Conveyor
+from model.ProductionSolver import ConveyorFlow
+
+class ConveyorItem(QGraphicsPathItem):
+    """The graphical representation of a conveyor belt."""
+
+    BELT_WIDTH = 0.6  # Meters
+
+    def __init__(self, conveyor: Conveyor):
+        super().__init__()
+        self.conveyor = conveyor
+
+        self.routed_pen = QPen(QColor('#d08a2c'), self.BELT_WIDTH * Settings.PIXELS_PER_METER)
+        self.routed_pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
+        self.saturated_pen = QPen(self.routed_pen)
+        self.saturated_pen.setColor(QColor('#d03c2c'))
+        self.unrouted_pen = QPen(QColor('red'), 0.2 * Settings.PIXELS_PER_METER, Qt.PenStyle.DashLine)
+
+        self.setZValue(0.5)  # Above the buildings, below the placement preview
+        self.saturated = False
+        self.update()
+
+    def update(self):
+        """Update the belt to follow the conveyor's path, or a straight dashed line if it could not be routed."""
+        path = QPainterPath()
+        if self.conveyor.path:
+            self.setPen(self.saturated_pen if self.saturated else self.routed_pen)
+            points = self.corner_points(self.conveyor.path)
+            path.moveTo(self.cell_center(points[0]))
+            for point in points[1:]:
+                path.lineTo(self.cell_center(point))
+        else:
+            self.setPen(self.unrouted_pen)
+            path.moveTo(self.building_center(self.conveyor.source))
+            path.lineTo(self.building_center(self.conveyor.target))
+        self.setPath(path)
+
+    def set_flow(self, flow: ConveyorFlow | None):
+        """Show the solved throughput in the tooltip, saturated belts are drawn in red."""
+        self.setToolTip(f'{flow.rate:.1f} / {flow.capacity:.0f} items/min' if flow is not None else '')
+        saturated = flow is not None and flow.is_saturated
+        if saturated != self.saturated:
+            self.saturated = saturated
+            self.update()
+
+    @staticmethod
+    def corner_points(cells: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """Drop the cells in the middle of straight runs, only the ends and bends are drawn."""
+        points = [cells[0]]
+        for previous, cell, following in zip(cells, cells[1:], cells[2:]):
+            if (cell[0] - previous[0], cell[1] - previous[1]) != (following[0] - cell[0], following[1] - cell[1]):
+                points.append(cell)
+        if len(cells) > 1:
+            points.append(cells[-1])
+        return points
+
+    @staticmethod
+    def cell_center(cell: tuple[int, int]) -> QPointF:
+        return QPointF((cell[0] + 0.5) * Settings.PIXELS_PER_METER, (cell[1] + 0.5) * Settings.PIXELS_PER_METER)
+
+    @staticmethod
+    def building_center(building) -> QPointF:
+        return QPointF(building.position.x * Settings.PIXELS_PER_METER, building.position.y * Settings.PIXELS_PER_METER)
@@ -2,12 +2,15 @@ from PySide6.QtWidgets import QGraphicsPixmapItem
 from PySide6.QtCore import Qt, QPointF
 
 from view.Settings import Settings
+from model.BuldingInstance import UNITS_PER_METER
 
 class DraggableRectItem(QGraphicsPixmapItem):
-    GRID_SIZE = Settings.PIXELS_PER_METER
+    # Items snap to the model's position grid, which has room for the half meter centers of odd sized buildings
+    GRID_SIZE = Settings.PIXELS_PER_METER / UNITS_PER_METER
 
     def __init__(self, x, y, w, h, pixmap):
-        pixmap = pixmap.scaled(w, h)
+        if pixmap.width() != w or pixmap.height() != h:
+            pixmap = pixmap.scaled(w, h)
 
         super().__init__(pixmap)
         
@@ -25,8 +28,8 @@ class DraggableRectItem(QGraphicsPixmapItem):
 
     def itemChange(self, change, value):    
         if change == QGraphicsPixmapItem.ItemPositionChange:
-            snapped_x = round(value.x() / Settings.PIXELS_PER_METER) * Settings.PIXELS_PER_METER
-            snapped_y = round(value.y() / Settings.PIXELS_PER_METER) * Settings.PIXELS_PER_METER
+            snapped_x = round(value.x() / self.GRID_SIZE) * self.GRID_SIZE
+            snapped_y = round(value.y() / self.GRID_SIZE) * self.GRID_SIZE
             return QPointF(snapped_x, snapped_y)
 
         return super().itemChange(change, value)
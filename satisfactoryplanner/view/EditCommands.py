@@ -0,0 +1,173 @@
+from PySide6.QtGui import QUndoCommand
+
+from model.BuldingInstance import BuildingInstance
+from model.Conveyor import Conveyor
+from model.Recipe import Recipe
+from model.Blueprint import BlueprintInstance
+
+class AddBuildingsCommand(QUndoCommand):
+    """Adds a batch of buildings, undoing removes the whole batch at once."""
+
+    def __init__(self, scene, instances: list[BuildingInstance], text: str, select: bool = False,
+                 conveyors: list[Conveyor] = ()):
+        super().__init__(text)
+        self.scene = scene
+        self.instances = instances
+        self.select = select
+        self.conveyors = list(conveyors)
+
+    def redo(self):
+        self.scene.insert_buildings(self.instances, selected=self.select, conveyors=self.conveyors)
+
+    def undo(self):
+        self.scene.delete_buildings(self.instances)
+
+class RemoveBuildingsCommand(QUndoCommand):
+    """Removes a batch of buildings. The instances keep their ids, so undo restores them as they were,
+    together with the conveyors that were removed along with them."""
+
+    def __init__(self, scene, instances: list[BuildingInstance], text: str):
+        super().__init__(text)
+        self.scene = scene
+        self.instances = instances
+        self.conveyors = []
+
+    def redo(self):
+        self.conveyors = self.scene.delete_buildings(self.instances)
+
+    def undo(self):
+        self.scene.insert_buildings(self.instances, selected=True, conveyors=self.conveyors)
+
+class AddConveyorCommand(QUndoCommand):
+    """Adds a conveyor between two buildings."""
+
+    def __init__(self, scene, conveyor: Conveyor):
+        super().__init__('Draw Conveyor')
+        self.scene = scene
+        self.conveyor = conveyor
+
+    def redo(self):
+        self.scene.insert_conveyor(self.conveyor)
+
+    def undo(self):
+        self.scene.delete_conveyor(self.conveyor)
+
+class MoveBuildingsCommand(QUndoCommand):
+    """Moves a set of buildings by an offset. A drag is pushed once, when it ends, so however
+    many steps it took it is a single undo step."""
+
+    def __init__(self, scene, building_ids: list[int], dx: int, dy: int, applied: bool = False):
+        super().__init__('Move')
+        self.scene = scene
+        self.building_ids = frozenset(building_ids)
+        self.dx = dx
+        self.dy = dy
+        self.applied = applied  # The move already happened interactively, skip the first redo
+
+    def redo(self):
+        if self.applied:
+            self.applied = False
+            return
+        self.scene.translate_buildings(self.building_ids, self.dx, self.dy)
+
+    def undo(self):
+        self.scene.translate_buildings(self.building_ids, -self.dx, -self.dy)
+
+class RotateBuildingsCommand(QUndoCommand):
+    """Rotates a set of buildings clockwise in place, by quarter turns."""
+
+    def __init__(self, scene, building_ids: list[int], turns: int = 1):
+        super().__init__('Rotate')
+        self.scene = scene
+        self.building_ids = frozenset(building_ids)
+        self.turns = turns
+
+    def redo(self):
+        self.scene.rotate_buildings(self.building_ids, self.turns)
+
+    def undo(self):
+        self.scene.rotate_buildings(self.building_ids, -self.turns)
+
+class ArrangeBuildingsCommand(QUndoCommand):
+    """Moves and rotates every building of a set to its own new spot, as found by the auto layout."""
+
+    def __init__(self, scene, placements: dict):
+        super().__init__('Auto Layout')
+        self.scene = scene
+        self.placements = placements  # Building id -> (x, y, rotation)
+        self.previous = {}
+        for building_id in placements:
+            building = scene.layout.get_building(building_id)
+            self.previous[building_id] = (building.position.x, building.position.y, building.rotation)
+
+    def redo(self):
+        self.scene.place_buildings(self.placements)
+
+    def undo(self):
+        self.scene.place_buildings(self.previous)
+
+class SetRecipeCommand(QUndoCommand):
+    """Changes the recipe of a set of buildings, undo restores each building's previous recipe."""
+
+    def __init__(self, scene, building_ids: list[int], recipe: Recipe | None):
+        super().__init__('Set Recipe')
+        self.scene = scene
+        self.recipe = recipe
+        self.previous = {building_id: scene.layout.get_building(building_id).recipe for building_id in building_ids}
+
+    def redo(self):
+        self.scene.set_recipes({building_id: self.recipe for building_id in self.previous})
+
+    def undo(self):
+        self.scene.set_recipes(self.previous)
+
+class AddBlueprintsCommand(QUndoCommand):
+    """Places a batch of blueprint instances."""
+
+    def __init__(self, scene, instances: list[BlueprintInstance], text: str, select: bool = False):
+        super().__init__(text)
+        self.scene = scene
+        self.instances = instances
+        self.select = select
+
+    def redo(self):
+        self.scene.insert_blueprints(self.instances, selected=self.select)
+
+    def undo(self):
+        self.scene.delete_blueprints(self.instances)
+
+class RemoveBlueprintsCommand(QUndoCommand):
+    """Removes a batch of placed blueprint instances."""
+
+    def __init__(self, scene, instances: list[BlueprintInstance], text: str):
+        super().__init__(text)
+        self.scene = scene
+        self.instances = instances
+
+    def redo(self):
+        self.scene.delete_blueprints(self.instances)
+
+    def undo(self):
+        self.scene.insert_blueprints(self.instances, selected=True)
+
+class ExplodeBlueprintsCommand(QUndoCommand):
+    """Replaces placed blueprint instances by the individual buildings and conveyors they stand for."""
+
+    def __init__(self, scene, instances: list[BlueprintInstance]):
+        super().__init__('Explode Blueprint')
+        self.scene = scene
+        self.instances = instances
+        self.buildings = []
+        self.conveyors = []
+        for instance in instances:
+            buildings, conveyors = instance.expand()
+            self.buildings += buildings
+            self.conveyors += conveyors
+
+    def redo(self):
+        self.scene.delete_blueprints(self.instances)
+        self.scene.insert_buildings(self.buildings, selected=True, conveyors=self.conveyors)
+
+    def undo(self):
+        self.scene.delete_buildings(self.buildings)
+        self.scene.insert_blueprints(self.instances, selected=True)
@@ -1,19 +1,40 @@
-from PySide6.QtWidgets import QGraphicsScene, QFileDialog, QGraphicsColorizeEffect
-from PySide6.QtCore import Qt, QPointF, Signal
-from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QGraphicsScene, QFileDialog, QProgressDialog, QMessageBox, QMenu
+from PySide6.QtCore import Qt, QPointF, QRectF, QTimer, Signal
+from PySide6.QtGui import QTransform, QUndoStack
 from view.Settings import Settings
 from view.BuildingItem import BuildingItem
+from view.ConveyorItem import ConveyorItem
+from view.BlueprintItem import BlueprintItem
+from view.Profiler import profiler
+from view.EditCommands import (
+    AddBuildingsCommand, RemoveBuildingsCommand, MoveBuildingsCommand, RotateBuildingsCommand, AddConveyorCommand,
+    SetRecipeCommand, AddBlueprintsCommand, RemoveBlueprintsCommand, ExplodeBlueprintsCommand, ArrangeBuildingsCommand
+)
 from model.BuldingInstance import BuildingInstance, BuildingType, Position, Rotation
 from model.FactoryLayout import FactoryLayout, type_lookup
+from model.Conveyor import Conveyor
+from model.ProductionSolver import ProductionSolver
+from model.Blueprint import Blueprint, BlueprintInstance
+from model.Selection import Selection
+from model.SpatialIndex import Bounds, bounds_intersect
 from enum import Enum
+from contextlib import contextmanager
 
 class SceneOperation(Enum):
     BUILDING_PLACEMENT = 1
     BUILDING_REMOVAL = 2
+    SELECTION_MOVE = 3
+    CONVEYOR_PLACEMENT = 4
 
 class EditorScene(QGraphicsScene):
     """The graphical representation of the factory editor's world."""
 
+    BULK_INDEX_THRESHOLD = 200  # Batches of at least this many items bypass the BSP index
+    MATERIALIZE_MARGIN = 0.5  # Items exist this fraction of the viewport size around it, small scrolls need no work
+    ITEM_POOL_SIZE = 500  # Released building items kept for reuse
+    UNDO_LIMIT = 500  # Edits kept in the undo history
+    STATUS_INTERVAL_MS = 50  # Cursor position updates of the status bar are coalesced to at most this often
+
     layout: FactoryLayout
     operation: SceneOperation
     preview_item: BuildingItem
@@ -26,58 +47,220 @@ class EditorScene(QGraphicsScene):
         self.save_file = None
         self.operation = None
         self.last_mouse_scene_pos = None
+        self.preview_cell = None  # (position units, rotation) the preview was last snapped and collision checked at
+        self.suppress_context_menu = False  # The right click already cancelled an operation
         self.clipboard_layout = None
+        self.clipboard_blueprints = []
+        self.building_items = {}  # Building id -> item
+        self.conveyor_items = {}  # Conveyor id -> item
+        self.blueprint_items = {}  # Blueprint instance id -> item
+        self.production = ProductionSolver(layout)
+        self.blueprint_library = None  # Opened by get_blueprint_library()
+
+        # Conveyor drawing
+        self.conveyor_source = None
+        self.conveyor_preview = None
+        self.conveyor_preview_goal = None
+
+        # Edit history
+        self.undo_stack = QUndoStack(self)
+        self.undo_stack.setUndoLimit(self.UNDO_LIMIT)
+        self.undo_stack.indexChanged.connect(self.on_history_changed)
+
+        self.status_timer = QTimer(self)
+        self.status_timer.setSingleShot(True)
+        self.status_timer.setInterval(self.STATUS_INTERVAL_MS)
+        self.status_timer.timeout.connect(self.emit_mouse_position)
+
+        # Asynchronous layout loading
+        self.loader = None
+        self.load_progress = None
+
+        # Autosave, edits are only journaled once the previous session has been recovered
+        self.journal = None
+        self.pending_journal = None
+        self.journal_recovered.connect(self.on_journal_recovered)
+        self.journal_failed.connect(self.on_journal_failed)
+
+        # Auto layout, the best arrangement found so far is the placement preview
+        self.auto_layout = None          # The running search
+        self.auto_layout_sources = None  # Buildings rearranged by placing the preview, [] when it adds new ones
+        self.auto_layout_progress.connect(self.on_auto_layout_progress)
+        self.auto_layout_finished.connect(self.on_auto_layout_finished)
+        self.save_failed.connect(self.on_save_failed)
+        self.save_requested.connect(self.save_layout)
+
+        # Virtualization: only the buildings near the viewport have items
+        self.visible_rect = None        # Scene rect shown by the view
+        self.detailed = True            # False when zoomed out so far that the view draws the buildings itself
+        self.materialized_rect = None   # Scene rect whose buildings have items
+        self.materialized_bounds = None # The same rect in meters
+        self.item_pool = []             # Released items, reused for the next buildings getting one
+        self.materializing = False
+        self.bulk_updates = 0           # Nesting depth of bulk_update(), Qt's selection changes are ignored inside
+        self.selection_batches = 0      # Nesting depth of selection_batch()
+        self.selection_change_pending = False
+        self.selectionChanged.connect(self.on_selection_changed)
+
+        # The selected buildings, including those without an item
+        self.selection = Selection(layout)
+        self.selection.listeners.append(self.on_model_selection_changed)
+
+        # Group move of the current selection
+        self.drag_buildings = []
+        self.drag_origin = None
+        self.drag_offset = (0, 0)
+        self.colliding_buildings = set()
 
     ## ======================================================
     ## Signals
     ## ====================================================== 
 
     mouse_scene_position_changed = Signal(str)
+    production_changed = Signal(str)
+    layout_changed = Signal(list)  # Scene rects whose contents changed in the model, with or without items
+    status_changed = Signal(str)
+    selection_changed = Signal(str)  # Emitted once per change of the selection, with a summary of it
+    save_failed = Signal(str)
+    save_requested = Signal(str)  # A file to save from the editor's layout, when the journal cannot
+    journal_recovered = Signal(object)  # The FactoryLayout recovered from the journal
+    journal_failed = Signal(str)
+    auto_layout_progress = Signal(object, object)  # The AutoLayout search and its best PackingResult so far
+    auto_layout_finished = Signal(object, object)
 
     ## ======================================================
     ## Slots
     ## ====================================================== 
 
     def set_preview_type(self, building_type: BuildingType):
+        self.cancel_conveyor_placement()
+        self.cancel_auto_layout()
         self.operation = SceneOperation.BUILDING_PLACEMENT
 
         # This is a hack, because the view does not have focus to handle rotation events
         self.views()[0].setFocus()
         self.set_preview(building_type)
 
+    def set_preview_blueprint(self, name: str):
+        self.cancel_conveyor_placement()
+        self.cancel_auto_layout()
+        self.operation = SceneOperation.BUILDING_PLACEMENT
+        self.views()[0].setFocus()
+        blueprint = self.get_blueprint_library().load(name)
+        self.set_preview_item(BlueprintItem(BlueprintInstance(blueprint, Position(0, 0), Rotation.DEG_0)))
+
+    def save_selection_as_blueprint(self, name: str):
+        buildings = self.selected_buildings()
+        if buildings:
+            self.get_blueprint_library().save(Blueprint.from_buildings(name, buildings))
+
+    def get_blueprint_library(self) -> 'BlueprintLibrary':
+        # Only needed once blueprints are used, so kept out of the startup path
+        if self.blueprint_library is None:
+            from model.BlueprintLibrary import BlueprintLibrary
+            self.blueprint_library = BlueprintLibrary()
+        return self.blueprint_library
+
+    def explode_selected_blueprints(self):
+        instances = [item.instance for item in self.selected_blueprint_items()]
+        if instances:
+            self.undo_stack.push(ExplodeBlueprintsCommand(self, instances))
+
     def delete_current_selection(self):
-        for item in self.selectedItems():
-            self.layout.remove_building(item.instance)
-            self.removeItem(item)
+        instances = self.selected_buildings()
+        blueprints = [item.instance for item in self.selected_blueprint_items()]
+        if not instances and not blueprints:
+            return
+
+        with self.selection_batch():
+            self.undo_stack.beginMacro('Delete')
+            if instances:
+                self.undo_stack.push(RemoveBuildingsCommand(self, instances, 'Delete'))
+            if blueprints:
+                self.undo_stack.push(RemoveBlueprintsCommand(self, blueprints, 'Delete'))
+            self.undo_stack.endMacro()
 
     def select_all_items(self):
-        for item in self.items():
-            item.setSelected(True)
+        # Only placed blueprints get selected along, never the placement preview
+        with self.bulk_update(0, notify_selection=False):
+            for item in self.blueprint_items.values():
+                item.setSelected(True)
+        count = len(self.selection)
+        self.selection.select_all()
+        if len(self.selection) == count:
+            self.emit_selection_changed()  # Only blueprints were selected, the model did not report it
+
+    def clear_selection(self):
+        self.selection.clear()
+        self.clearSelection()
+
+    def invert_selection(self):
+        self.selection.invert()
+
+    def select_same_type(self):
+        """Select every building of the types that are selected now."""
+        self.selection.select_types({building.type.name for building in self.selection.buildings()})
+
+    def select_rect(self, rect: QRectF):
+        """Select the buildings overlapping a scene rect, for selections made without items."""
+        ppm = Settings.PIXELS_PER_METER
+        self.selection.select_rect((rect.left() / ppm, rect.top() / ppm, rect.right() / ppm, rect.bottom() / ppm))
 
     def copy_current_selection(self):
-        self.clipboard_layout = FactoryLayout.create_from_buildings([item.instance for item in self.selectedItems()])
+        self.clipboard_layout = FactoryLayout.create_from_buildings(self.selected_buildings())
+        self.clipboard_blueprints = [item.instance.clone() for item in self.selected_blueprint_items()]
         
     def cut_current_selection(self):
-        self.clipboard_layout = FactoryLayout.create_from_buildings([item.instance for item in self.selectedItems()])
+        self.copy_current_selection()
         self.delete_current_selection()
 
     def paste_current_selection(self):
-        if self.clipboard_layout:
-            layout_to_paste = self.clipboard_layout.clone()
-            self.layout.add_sublayout(layout_to_paste, offset_x=4, offset_y=4)
-            items_to_paste = [BuildingItem(instance) for instance in layout_to_paste.buildings]
+        if not self.clipboard_layout and not self.clipboard_blueprints:
+            return
 
-            self.clearSelection()
-            for item in items_to_paste:
-                item.setSelected(True)
-                item.update()
-                self.addItem(item)
+        layout_to_paste = self.clipboard_layout.clone()
+        instances = layout_to_paste.buildings
+        conveyors = list(layout_to_paste.conveyors)
+        for instance in instances:
+            instance.translate(4, 4)
+        for conveyor in conveyors:
+            conveyor.translate(4, 4)
+
+        blueprints = [instance.clone() for instance in self.clipboard_blueprints]
+        for instance in blueprints:
+            instance.move_to(instance.position.x + 4, instance.position.y + 4)
+
+        with self.selection_batch():
+            self.clear_selection()
+            self.undo_stack.beginMacro('Paste')
+            if instances:
+                self.undo_stack.push(AddBuildingsCommand(self, instances, 'Paste', select=True, conveyors=conveyors))
+            if blueprints:
+                self.undo_stack.push(AddBlueprintsCommand(self, blueprints, 'Paste', select=True))
+            self.undo_stack.endMacro()
 
     def rotate_current_selection(self):
-        for item in self.selectedItems():
-            if isinstance(item, BuildingItem):
-                item.instance.rotate_clockwise()
-                item.update()
+        building_ids = sorted(self.selection.ids)
+        if building_ids:
+            self.undo_stack.push(RotateBuildingsCommand(self, building_ids))
+
+    def on_history_changed(self, index: int):
+        # Any edit can free or block the preview's spot. Clearing the history (also done
+        # while the scene is torn down) changes nothing in the layout.
+        if self.undo_stack.count():
+            self.check_collisions()
+
+    def start_conveyor_placement(self):
+        self.cancel_building_placement()
+        self.cancel_conveyor_placement()
+        self.operation = SceneOperation.CONVEYOR_PLACEMENT
+        self.views()[0].setFocus()
+
+    def undo(self):
+        self.undo_stack.undo()
+
+    def redo(self):
+        self.undo_stack.redo()
 
     def save_layout_to_file(self):
         if self.save_file is None:
@@ -85,46 +268,263 @@ class EditorScene(QGraphicsScene):
                 None,
                 'Save file',
                 'factory.fl',
-                'Factory layouts (*.fl)'
+                'Factory layouts (*.fl);;Binary factory layouts (*.flb)'
             )
 
-        if self.save_file is None:
+        if not self.save_file:
+            self.save_file = None
             return
-        
-        with open(self.save_file, mode='w') as save_file:
-            save_file.write(self.layout.serialize())
+
+        if self.journal is None:
+            self.save_layout(self.save_file)
+            return
+
+        # The journal's worker writes its own copy of the layout, so the editor is not blocked
+        file_name = self.save_file
+        self.journal.save(file_name).add_done_callback(lambda future: self.emit_save_result(file_name, future))
+
+    def save_layout(self, file_name: str):
+        """Write the editor's own layout, blocking until it is saved."""
+        try:
+            self.layout.save(file_name)
+        except (OSError, ValueError) as e:
+            self.on_save_failed(f'Could not save {file_name}: {e}')
+            return
+        self.status_changed.emit(f'Saved {file_name}')
+
+    def emit_save_result(self, file_name: str, future):
+        # Called on the journal's worker thread, the signals are delivered to the editor's thread
+        from model.EditJournal import JournalError
+
+        error = future.exception()
+        if error is None:
+            self.status_changed.emit(f'Saved {file_name}')
+        elif isinstance(error, JournalError):
+            # The journal's copy misses edits, the editor's layout is the one to save
+            self.save_requested.emit(file_name)
+        else:
+            self.save_failed.emit(f'Could not save {file_name}: {error}')
+
+    def on_save_failed(self, message: str):
+        QMessageBox.warning(self.views()[0], 'Save file', message)
+
+    def new_layout(self):
+        self.replace_layout(FactoryLayout())
+        self.save_file = None
+        if self.journal is not None:
+            self.journal.reset()
+        self.finish_loading()
 
     def load_layout_from_file(self):
         file_name, _ = QFileDialog.getOpenFileName(
             None,
             'Open file',
             '',
-            'Factory layouts (*.fl)'
+            'Factory layouts (*.fl *.flb)'
         )
 
-        if file_name is None:
+        if not file_name:
             return
-        
-        with open(file_name, mode='r') as load_file:
-            json_str = load_file.read()
-            self.layout.deserialize(json_str, type_lookup)
 
-        # Clear existing items
-        for item in self.items():
-            self.removeItem(item)
+        self.load_layout(file_name)
 
-        # Add items from the loaded layout
-        for building in self.layout.buildings:
-            self.addItem(BuildingItem(building))
+    def load_layout(self, file_name: str):
+        """Load a layout without blocking the window.
+
+        The file is parsed on a worker thread, cancelling meanwhile keeps the current
+        layout. Only the buildings near the viewport get items, so taking over the parsed
+        layout is quick regardless of its size.
+        """
+        if self.loader is not None:
+            return
+
+        # Only needed once a file is opened, so kept out of the startup path
+        from view.LayoutLoader import LayoutLoader
+
+        self.load_progress = QProgressDialog('Loading layout...', 'Cancel', 0, 0, self.views()[0])
+        self.load_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.load_progress.setMinimumDuration(500)
+        self.load_progress.canceled.connect(self.cancel_loading)
+
+        self.loader = LayoutLoader(file_name, type_lookup, self)
+        self.loader.loaded.connect(self.populate_loaded_layout)
+        self.loader.failed.connect(self.loading_failed)
+        self.loader.finished.connect(self.loader.deleteLater)
+        self.loader.start()
+
+    def populate_loaded_layout(self, layout: FactoryLayout):
+        if self.loader is None:  # Cancelled while parsing
+            return
+        file_name = self.loader.file_name
+        self.loader = None
+
+        self.replace_layout(layout)
+        if self.journal is not None:
+            self.journal.reset(file_name)
+        self.finish_loading()
+
+    def replace_layout(self, layout: FactoryLayout):
+        # Clear the old layout in one go
+        self.clear()
+        self.building_items = {}
+        self.conveyor_items = {}
+        self.blueprint_items = {}
+        self.item_pool = []
+        self.colliding_buildings = set()
+        self.conveyor_source = None
+        self.conveyor_preview = None
+        self.undo_stack.clear()
+        self.preview_item = None
+        self.operation = None
+        self.cancel_auto_layout()
+
+        self.layout.replace_contents(layout)
+        for instance in self.layout.blueprint_map.values():
+            item = BlueprintItem(instance)
+            self.addItem(item)
+            self.blueprint_items[instance.id] = item
+        self.refresh_materialized()
+
+    def finish_loading(self):
+        self.sync_conveyors()
+        self.update_production()
+        self.layout_changed.emit([self.sceneRect()])
+        if self.load_progress is not None:
+            self.load_progress.reset()
+            self.load_progress.deleteLater()
+            self.load_progress = None
+
+    def cancel_loading(self):
+        # The worker cannot be interrupted, its result is just dropped
+        self.loader = None
+        self.finish_loading()
+
+    def loading_failed(self, message: str):
+        self.loader = None
+        self.finish_loading()
+        QMessageBox.warning(self.views()[0], 'Open file', message)
+
+    def start_journal(self, journal: 'EditJournal'):
+        """Recover the layout of the previous session in the background, then journal all edits."""
+        self.pending_journal = journal
+        journal.on_error = self.emit_journal_error
+        journal.start().add_done_callback(self.emit_journal_recovered)
+
+    def emit_journal_recovered(self, future):
+        # Called on the journal's worker thread
+        error = future.exception()
+        if error is None:
+            self.journal_recovered.emit(future.result())
+        else:
+            self.journal_failed.emit(f'Could not recover the autosaved layout: {error}')
+
+    def emit_journal_error(self, error: Exception):
+        # Called on the journal's worker thread
+        self.journal_failed.emit(f'Autosave stopped, an edit could not be journaled: {error!r}')
+
+    def on_journal_recovered(self, layout: FactoryLayout):
+        journal, self.pending_journal = self.pending_journal, None
+        if len(layout) or layout.blueprint_map:
+            self.replace_layout(layout)
+            self.finish_loading()
+            self.status_changed.emit(f'Recovered {len(self.layout)} buildings from the autosave')
+        elif len(self.layout) or self.layout.blueprint_map:
+            # Edited while the (empty) journal was being read, it starts from the current state
+            journal.buildings_added(self.layout.buildings, list(self.layout.conveyors))
+            journal.blueprints_added(list(self.layout.blueprint_map.values()))
+        self.journal = journal
+
+    def on_journal_failed(self, message: str):
+        # The journal files are left alone, autosave stays off for this session
+        self.close_journal()
+        QMessageBox.warning(self.views()[0], 'Autosave', message)
+
+    def close_journal(self):
+        """Snapshot the journal and stop its worker, called when the editor closes."""
+        journal = self.journal or self.pending_journal
+        self.journal = self.pending_journal = None
+        if journal is not None:
+            journal.close()
+
+    def start_auto_layout(self, buildings: list[BuildingInstance], width: int, height: int,
+                          clearance: int = Settings.AUTO_LAYOUT_CLEARANCE, seconds: float = Settings.AUTO_LAYOUT_SECONDS,
+                          rearrange: bool = False):
+        """Search for a compact arrangement of buildings in the background, previewed as it improves.
+
+        Placing the preview adds the buildings, or with rearrange moves the given buildings
+        of the layout to their new spots. Raises ValueError if they cannot be arranged.
+        """
+        # Only needed once an auto layout is asked for, so kept out of the startup path
+        from model.AutoLayout import AutoLayout
+
+        search = AutoLayout(buildings, width, height, clearance, seconds)
+        self.cancel_building_placement()
+        self.cancel_conveyor_placement()
+        self.operation = SceneOperation.BUILDING_PLACEMENT
+        self.views()[0].setFocus()
+        self.auto_layout = search
+        self.auto_layout_sources = list(buildings) if rearrange else []
+        future = search.start(lambda result: self.auto_layout_progress.emit(search, result))
+        future.add_done_callback(lambda future: self.emit_auto_layout_finished(search, future))
+
+    def emit_auto_layout_finished(self, search: 'AutoLayout', future):
+        # Called on the search's thread
+        try:
+            self.auto_layout_finished.emit(search, future.result())
+        except Exception as error:
+            self.status_changed.emit(f'Auto layout failed: {error}')
+
+    def on_auto_layout_progress(self, search: 'AutoLayout', result: 'PackingResult'):
+        if search is not self.auto_layout:
+            return  # Cancelled in the meantime
+        rotation = self.preview_item.instance.rotation if self.preview_item else Rotation.DEG_0
+        blueprint = Blueprint.from_buildings('Auto Layout', result.layout.buildings)
+        self.set_preview_item(BlueprintItem(BlueprintInstance(blueprint, Position(0, 0), rotation)))
+        self.status_changed.emit(f'Auto layout: {self.describe_auto_layout(result)}, searching...')
+
+    def on_auto_layout_finished(self, search: 'AutoLayout', result: 'PackingResult'):
+        if search is not self.auto_layout:
+            return
+        self.auto_layout = None
+        self.status_changed.emit(f'Auto layout: {self.describe_auto_layout(result)}, click to place it')
+
+    @staticmethod
+    def describe_auto_layout(result: 'PackingResult') -> str:
+        fits = '' if result.fits else ' (larger than the area)'
+        return (f'{len(result.layout)} buildings in {result.width} x {result.height} m{fits}, '
+                f'{result.evaluations} arrangements tried in {result.seconds:.1f} s')
+
+    def place_auto_layout(self, instance: BlueprintInstance):
+        # The preview's buildings come in the order of the buildings the search was given
+        buildings, _ = instance.expand()
+        sources = self.auto_layout_sources
+        if sources:
+            if any(self.layout.building_map.get(source.id) is not source for source in sources):
+                self.status_changed.emit('Auto layout: some of the arranged buildings were removed in the meantime')
+            else:
+                self.undo_stack.push(ArrangeBuildingsCommand(
+                    self, {source.id: (building.position.x, building.position.y, building.rotation)
+                           for source, building in zip(sources, buildings)}))
+        else:
+            with self.selection_batch():
+                self.clear_selection()
+                self.undo_stack.push(AddBuildingsCommand(self, buildings, 'Auto Layout', select=True))
+        self.cancel_building_placement()
+
+    def cancel_auto_layout(self):
+        if self.auto_layout is not None:
+            self.auto_layout.cancel()
+        self.auto_layout = None
+        self.auto_layout_sources = None
 
     ## ======================================================
     ## Helper methods
     ## ======================================================
 
-    def scene_to_world(self, scene_pos: QPointF) -> Position:
-        return Position(scene_pos.x() / Settings.PIXELS_PER_METER, 
-                        scene_pos.y() / Settings.PIXELS_PER_METER)
-    
+    def scene_to_world(self, scene_pos: QPointF) -> tuple[float, float]:
+        # Not a Position, those are snapped to the position grid
+        return scene_pos.x() / Settings.PIXELS_PER_METER, scene_pos.y() / Settings.PIXELS_PER_METER
+
     def scene_to_world_snapped(self, scene_pos: QPointF) -> Position:
         x = round(scene_pos.x() / Settings.PIXELS_PER_METER)
         y = round(scene_pos.y() / Settings.PIXELS_PER_METER)
@@ -132,40 +532,546 @@ class EditorScene(QGraphicsScene):
 
     def place_building(self):
         instance = self.preview_item.instance.clone()
-        self.layout.add_building(instance)
-        self.addItem(BuildingItem(instance))
+        if self.auto_layout_sources is not None:
+            self.place_auto_layout(instance)
+        elif isinstance(instance, BlueprintInstance):
+            self.undo_stack.push(AddBlueprintsCommand(self, [instance], f'Place {instance.blueprint.name}'))
+        else:
+            self.undo_stack.push(AddBuildingsCommand(self, [instance], 'Place'))
 
     def set_preview(self, building_type: BuildingType):
+        self.set_preview_item(BuildingItem(BuildingInstance(building_type, Position(0, 0), Rotation.DEG_0)))
+
+    def set_preview_item(self, item: BuildingItem | BlueprintItem):
+        """Make item the placement preview, following the cursor."""
         if self.preview_item:
             self.removeItem(self.preview_item)
 
-        self.preview_item = BuildingItem(BuildingInstance(building_type, Position(0, 0), Rotation.DEG_0))
+        self.preview_item = item
         self.preview_item.setOpacity(0.4)
         self.preview_item.setZValue(9999)  # always on top
 
         self.addItem(self.preview_item)
+        self.preview_cell = None
+        self.snap_preview_to_cursor()
 
     def rotate_preview(self):
         self.preview_item.instance.rotate_clockwise()
         self.preview_item.update()
+        self.preview_cell = None
+        self.check_collisions()
+        self.snap_preview_to_cursor()
 
     def snap_preview_to_cursor(self):
-        if self.preview_item:
-            snapped_x = round(self.last_mouse_scene_pos.x() / Settings.PIXELS_PER_METER) * Settings.PIXELS_PER_METER
-            snapped_y = round(self.last_mouse_scene_pos.y() / Settings.PIXELS_PER_METER) * Settings.PIXELS_PER_METER
-            self.preview_item.setPos(snapped_x, snapped_y)
+        """Move the preview to the cursor's grid cell. Nothing is done while the cell and rotation stay the same."""
+        if not self.preview_item or self.last_mouse_scene_pos is None:
+            return
+
+        instance = self.preview_item.instance
+        if isinstance(instance, BuildingInstance):
+            # Buildings with an odd width or length are centered between grid lines
+            snapped = instance.grid_position(*self.scene_to_world(self.last_mouse_scene_pos))
+        else:
+            snapped = self.scene_to_world_snapped(self.last_mouse_scene_pos)
+        cell = (snapped.units, instance.rotation)
+        if cell == self.preview_cell:
+            return
+        self.preview_cell = cell
 
-            self.preview_item.instance.move_to(round(snapped_x / Settings.PIXELS_PER_METER),
-                                               round(snapped_y / Settings.PIXELS_PER_METER))
+        self.preview_item.instance.move_to(snapped.x, snapped.y)
+        self.preview_item.update()
+        self.check_collisions()
 
+    @profiler.timed('Collisions')
     def check_collisions(self):
         if self.preview_item:
-            colliding = self.preview_item.is_colliding()
-            effect = QGraphicsColorizeEffect()
-            effect.setColor(QColor('red'))
-            effect.setStrength(0.5)
+            overlapping = self.layout.overlaps(self.preview_item.instance)
+            if self.auto_layout_sources:
+                # The buildings being rearranged make room for themselves
+                sources = set(self.auto_layout_sources)
+                overlapping = [other for other in overlapping if other not in sources]
+            self.preview_item.set_colliding(bool(overlapping))
+
+    def emit_mouse_position(self):
+        scene_pos = self.last_mouse_scene_pos
+        world_x, world_y = self.scene_to_world(scene_pos)
+        snapped_world_pos = self.scene_to_world_snapped(scene_pos)
+        self.mouse_scene_position_changed.emit(f'Scene Position: ({scene_pos.x():.2f}, {scene_pos.y():.2f}) '
+                                               f'World Position: ({world_x:.2f}, {world_y:.2f}) '
+                                               f'Snapped World Position: ({snapped_world_pos.x}, {snapped_world_pos.y})')
 
-            self.preview_item.setGraphicsEffect(effect if colliding else None)
+    @contextmanager
+    def bulk_update(self, item_count: int, notify_selection: bool = True):
+        """Batch many item insertions/removals.
+
+        Selection change notifications are suppressed, and emitted once at the end if
+        notify_selection is set. For large batches the BSP index is switched off and
+        rebuilt once afterwards, instead of being updated for every single item.
+
+        The scene's signals are not blocked, those emitted meanwhile by the journal's or
+        the auto layout's threads would be lost.
+        """
+        disable_index = item_count >= self.BULK_INDEX_THRESHOLD
+        if disable_index:
+            self.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+        self.bulk_updates += 1
+        try:
+            yield
+        finally:
+            self.bulk_updates -= 1
+            if disable_index:
+                self.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+            if notify_selection:
+                self.selectionChanged.emit()
+
+    def insert_buildings(self, instances: list[BuildingInstance], selected: bool = False,
+                         conveyors: list[Conveyor] = ()):
+        """Add buildings, and conveyors between them, to the layout and the scene in one batch."""
+        with self.selection_batch():
+            self.layout.add_many(instances)
+            if selected:
+                self.selection.select(instance.id for instance in instances)
+            self.sync_buildings(instances)
+            for conveyor in conveyors:
+                self.layout.conveyors.add(conveyor)
+            if self.journal is not None:
+                self.journal.buildings_added(instances, conveyors)
+            self.sync_conveyors()
+            self.update_production()
+            self.emit_layout_changed([instance.footprint() for instance in instances])
+
+    def delete_buildings(self, instances: list[BuildingInstance]) -> list[Conveyor]:
+        """Remove buildings from the layout and the scene in one batch.
+
+        Returns the conveyors that were removed along with the buildings.
+        """
+        with self.selection_batch():
+            conveyors = list({c: None for instance in instances for c in self.layout.conveyors.attached(instance)})
+            self.layout.remove_many(instances)
+            if self.journal is not None:
+                self.journal.buildings_removed(instances)
+            self.sync_buildings(instances)
+            self.sync_conveyors()
+            self.update_production()
+            self.emit_layout_changed([instance.footprint() for instance in instances])
+        return conveyors
+
+    def insert_conveyor(self, conveyor: Conveyor):
+        self.layout.conveyors.add(conveyor)
+        if self.journal is not None:
+            self.journal.conveyors_added([conveyor])
+        self.sync_conveyors()
+        self.update_production()
+
+    def delete_conveyor(self, conveyor: Conveyor):
+        self.layout.conveyors.remove(conveyor)
+        if self.journal is not None:
+            self.journal.conveyors_removed([conveyor])
+        self.sync_conveyors()
+        self.update_production()
+
+    def set_recipes(self, recipes: dict):
+        """Set the recipe of each building in a building id -> recipe mapping."""
+        for building_id, recipe in recipes.items():
+            self.layout.get_building(building_id).set_recipe(recipe)
+        if self.journal is not None:
+            self.journal.recipes_set(recipes)
+        self.update_production()
+
+    @profiler.timed('Conveyors')
+    def sync_conveyors(self):
+        """Reroute the conveyors affected by the last edits and bring their items in line with the model."""
+        network = self.layout.conveyors
+        rerouted = network.reroute_dirty()
+        if rerouted and self.journal is not None:
+            self.journal.conveyors_rerouted(rerouted)
+        for conveyor in rerouted:
+            item = self.conveyor_items.get(conveyor.id)
+            if item is not None:
+                item.update()
+
+        for conveyor_id in self.conveyor_items.keys() - network.conveyor_map.keys():
+            self.removeItem(self.conveyor_items.pop(conveyor_id))
+        for conveyor_id in network.conveyor_map.keys() - self.conveyor_items.keys():
+            item = ConveyorItem(network.get_conveyor(conveyor_id))
+            self.conveyor_items[conveyor_id] = item
+            self.addItem(item)
+
+    @profiler.timed('Production')
+    def update_production(self):
+        """Re-solve the production of the components changed by the last edits and show the new rates."""
+        changed = self.production.solve()
+        if not changed:
+            return
+
+        conveyor_ids = set()
+        for building in changed:
+            item = self.building_items.get(building.id)
+            if item is not None and item.instance is building:
+                item.set_flow(self.production.flow(building))
+            conveyor_ids.update(c.id for c in self.layout.conveyors.attached(building))
+        for conveyor_id in conveyor_ids:
+            item = self.conveyor_items.get(conveyor_id)
+            if item is not None:
+                item.set_flow(self.production.conveyor_flow(conveyor_id))
+
+        flows = [f for f in self.production.building_flows.values() if f.utilization is not None]
+        if flows:
+            average = sum(f.utilization for f in flows) / len(flows)
+            bottlenecks = sum(1 for f in flows if f.is_bottleneck)
+            self.production_changed.emit(f'{len(flows)} machines, {average:.0%} average utilization, '
+                                         f'{bottlenecks} bottlenecks')
+        else:
+            self.production_changed.emit('No machines')
+
+    def insert_blueprints(self, instances: list[BlueprintInstance], selected: bool = False):
+        with self.selection_batch():
+            for instance in instances:
+                self.layout.add_blueprint_instance(instance)
+                item = BlueprintItem(instance)
+                self.addItem(item)
+                item.setSelected(selected)
+                self.blueprint_items[instance.id] = item
+            if self.journal is not None:
+                self.journal.blueprints_added(instances)
+            self.sync_conveyors()
+            self.emit_layout_changed([instance.footprint() for instance in instances])
+
+    def delete_blueprints(self, instances: list[BlueprintInstance]):
+        with self.selection_batch():
+            for instance in instances:
+                self.removeItem(self.blueprint_items.pop(instance.id))
+                self.layout.remove_blueprint_instance(instance)
+            if self.journal is not None:
+                self.journal.blueprints_removed(instances)
+            self.sync_conveyors()
+            self.emit_layout_changed([instance.footprint() for instance in instances])
+
+    def translate_buildings(self, building_ids, dx: int, dy: int):
+        self.translate_instances([self.layout.get_building(building_id) for building_id in building_ids], dx, dy)
+
+    def rotate_buildings(self, building_ids, turns: int):
+        buildings = [self.layout.get_building(building_id) for building_id in building_ids]
+        changed = [building.footprint() for building in buildings]
+        for building in buildings:
+            for _ in range(turns % 4):
+                building.rotate_clockwise()
+        if self.journal is not None:
+            self.journal.buildings_rotated(buildings, turns % 4)
+        self.sync_buildings(buildings)
+        self.sync_conveyors()
+        self.emit_layout_changed(changed + [building.footprint() for building in buildings])
+
+    def place_buildings(self, placements: dict):
+        """Move and rotate buildings, given by id, each to its own (x, y, rotation)."""
+        buildings = [self.layout.get_building(building_id) for building_id in placements]
+        changed = [building.footprint() for building in buildings]
+        for building in buildings:
+            building.place(*placements[building.id])
+        if self.journal is not None:
+            self.journal.buildings_placed(buildings)
+        self.sync_buildings(buildings)
+        self.sync_conveyors()
+        self.emit_layout_changed(changed + [building.footprint() for building in buildings])
+
+    def selected_buildings(self) -> list[BuildingInstance]:
+        return self.selection.buildings()
+
+    def selected_blueprint_items(self) -> list[BlueprintItem]:
+        return [item for item in self.selectedItems()
+                if isinstance(item, BlueprintItem) and item is not self.preview_item]
+
+    def start_selection_move(self, scene_pos: QPointF):
+        """Start moving the whole selection as one unit, anchored at the given position."""
+        self.operation = SceneOperation.SELECTION_MOVE
+        self.drag_buildings = self.selected_buildings()
+        self.drag_origin = self.scene_to_world_snapped(scene_pos)
+        self.drag_offset = (0, 0)
+        self.colliding_buildings = set()
+
+    def move_selection(self, scene_pos: QPointF):
+        """Move the selection to follow the cursor. Nothing is done until the snapped offset changes."""
+        snapped = self.scene_to_world_snapped(scene_pos)
+        offset = (snapped.x - self.drag_origin.x, snapped.y - self.drag_origin.y)
+        if offset == self.drag_offset:
+            return
+
+        self.translate_instances(self.drag_buildings, offset[0] - self.drag_offset[0], offset[1] - self.drag_offset[1])
+        self.drag_offset = offset
+        self.update_selection_collisions()
+
+    def finish_selection_move(self) -> bool:
+        """End the group move. A move ending in a collision is rejected as a whole.
+
+        Returns whether the move was kept.
+        """
+        accepted = not self.colliding_buildings
+        if not accepted:
+            self.translate_instances(self.drag_buildings, -self.drag_offset[0], -self.drag_offset[1])
+        elif self.drag_offset != (0, 0):
+            self.undo_stack.push(MoveBuildingsCommand(self, [building.id for building in self.drag_buildings],
+                                                      *self.drag_offset, applied=True))
+
+        for building in self.colliding_buildings:
+            item = self.building_items.get(building.id)
+            if item is not None:
+                item.set_colliding(False)
+
+        self.operation = None
+        self.drag_buildings = []
+        self.drag_origin = None
+        self.drag_offset = (0, 0)
+        self.colliding_buildings = set()
+        return accepted
+
+    def translate_instances(self, buildings: list[BuildingInstance], dx: int, dy: int):
+        changed = [building.footprint() for building in buildings]
+        for building in buildings:
+            building.translate(dx, dy)
+        if self.journal is not None:
+            self.journal.buildings_moved(buildings, dx, dy)
+        self.sync_buildings(buildings)
+        self.sync_conveyors()
+        self.emit_layout_changed(changed + [building.footprint() for building in buildings])
+
+    def emit_layout_changed(self, bounds: list[Bounds]):
+        """Report the area covered by changed footprints (in meters) as a single scene rect."""
+        if not bounds:
+            return
+        ppm = Settings.PIXELS_PER_METER
+        left = min(b[0] for b in bounds)
+        top = min(b[1] for b in bounds)
+        right = max(b[2] for b in bounds)
+        bottom = max(b[3] for b in bounds)
+        self.layout_changed.emit([QRectF(left * ppm, top * ppm, (right - left) * ppm, (bottom - top) * ppm)])
+
+    def show_recipe_menu(self, building: BuildingInstance, screen_pos):
+        """Let the user pick the recipe of a building, applied to the whole selection if it is part of it."""
+        recipes = building.type.recipes
+        if not recipes:
+            return
+
+        building_ids = [b.id for b in self.selected_buildings() if b.type is building.type]
+        if building.id not in building_ids:
+            building_ids = [building.id]
+
+        menu = QMenu()
+        for recipe in [None] + recipes:
+            action = menu.addAction(recipe.name if recipe is not None else 'No recipe')
+            action.setCheckable(True)
+            action.setChecked(building.recipe is recipe)
+            action.setData(recipe)
+        chosen = menu.exec(screen_pos)
+        if chosen is not None and chosen.data() is not building.recipe:
+            self.undo_stack.push(SetRecipeCommand(self, building_ids, chosen.data()))
+
+    def building_at(self, scene_pos: QPointF) -> BuildingInstance | None:
+        buildings = self.layout.query_point(*self.scene_to_world(scene_pos))
+        return buildings[0] if buildings else None
+
+    def cancel_building_placement(self):
+        if self.preview_item:
+            self.removeItem(self.preview_item)
+        self.preview_item = None
+        self.operation = None
+        self.cancel_auto_layout()
+
+    def cancel_conveyor_placement(self):
+        if self.conveyor_preview is not None:
+            self.removeItem(self.conveyor_preview)
+        self.conveyor_source = None
+        self.conveyor_preview = None
+        self.conveyor_preview_goal = None
+
+    def place_conveyor(self, scene_pos: QPointF):
+        """Pick the source building on the first click, connect it to the target building on the second."""
+        building = self.building_at(scene_pos)
+        if building is None:
+            return
+
+        if self.conveyor_source is None:
+            self.conveyor_source = building
+        elif building is not self.conveyor_source:
+            self.undo_stack.push(AddConveyorCommand(self, Conveyor(self.conveyor_source, building)))
+            self.cancel_conveyor_placement()
+
+    def update_conveyor_preview(self, scene_pos: QPointF):
+        """Route a preview belt from the source to the hovered building or cell, only when that changes."""
+        target = self.building_at(scene_pos)
+        if target is self.conveyor_source:
+            target = None
+        goal = target if target is not None else self.scene_to_world_snapped(scene_pos)
+        goal_key = goal.id if target is not None else (goal.x, goal.y)
+        if goal_key == self.conveyor_preview_goal:
+            return
+        self.conveyor_preview_goal = goal_key
+
+        from model.ConveyorRouter import port_cells
+
+        router = self.layout.conveyors.get_router()
+        goal_cells = port_cells(target) if target is not None else [(goal.x, goal.y)]
+        preview = Conveyor(self.conveyor_source, target or self.conveyor_source,
+                           router.route(port_cells(self.conveyor_source), goal_cells))
+        if self.conveyor_preview is None:
+            self.conveyor_preview = ConveyorItem(preview)
+            self.conveyor_preview.setOpacity(0.6)
+            self.addItem(self.conveyor_preview)
+        else:
+            self.conveyor_preview.conveyor = preview
+            self.conveyor_preview.update()
+        self.conveyor_preview.setVisible(bool(preview.path) or target is not None)
+
+    def update_selection_collisions(self):
+        """Re-test the moved buildings against the rest of the layout and toggle only the changed highlights."""
+        moving = set(self.drag_buildings)
+        colliding = {building for building in self.drag_buildings
+                     if any(other not in moving for other in self.layout.overlaps(building))}
+
+        for building in colliding.symmetric_difference(self.colliding_buildings):
+            item = self.building_items.get(building.id)
+            if item is not None:
+                item.set_colliding(building in colliding)
+        self.colliding_buildings = colliding
+
+    ## ======================================================
+    ## Virtualization
+    ## ======================================================
+
+    def set_visible_rect(self, rect: QRectF, detailed: bool = True):
+        """Make sure the buildings in and around the visible scene rect have items, called by the view.
+
+        When not detailed the view draws the buildings from the layout and no items are kept.
+        """
+        self.visible_rect = rect
+        if detailed != self.detailed:
+            self.detailed = detailed
+            self.release_all_items()
+        if not detailed:
+            return
+        if self.materialized_rect is not None and self.materialized_rect.contains(rect):
+            return
+        margin_x = rect.width() * self.MATERIALIZE_MARGIN
+        margin_y = rect.height() * self.MATERIALIZE_MARGIN
+        self.materialize(rect.adjusted(-margin_x, -margin_y, margin_x, margin_y))
+
+    def refresh_materialized(self):
+        self.materialized_rect = None
+        if self.visible_rect is not None:
+            self.set_visible_rect(self.visible_rect, self.detailed)
+
+    @profiler.timed('Materialize')
+    def materialize(self, rect: QRectF):
+        """Give the buildings inside rect an item and release the items of all others."""
+        ppm = Settings.PIXELS_PER_METER
+        self.materialized_rect = rect
+        self.materialized_bounds = (rect.left() / ppm, rect.top() / ppm, rect.right() / ppm, rect.bottom() / ppm)
+
+        inside = {building.id: building for building in self.layout.query_rect(*self.materialized_bounds)}
+        released = [item for building_id, item in self.building_items.items() if building_id not in inside]
+        added = [building for building_id, building in inside.items() if building_id not in self.building_items]
+        with self.item_changes(len(released) + len(added)):
+            for item in released:
+                self.release_item(item)
+            for building in added:
+                self.materialize_building(building)
+
+    def sync_buildings(self, buildings: list[BuildingInstance]):
+        """Bring the items of changed buildings in line with the model, creating or releasing
+        them as the buildings enter or leave the materialized area."""
+        with self.item_changes(len(buildings)):
+            for building in buildings:
+                item = self.building_items.get(building.id)
+                inside = (building.layout is self.layout and self.materialized_bounds is not None
+                          and bounds_intersect(building.footprint(), self.materialized_bounds))
+                if item is not None and item.instance is building and inside:
+                    item.update()
+                elif item is not None and item.instance is building:
+                    self.release_item(item)
+                elif inside:
+                    self.materialize_building(building)
+
+    @contextmanager
+    def item_changes(self, item_count: int):
+        """Create and release items without touching the model's selection."""
+        self.materializing = True
+        try:
+            with self.bulk_update(item_count, notify_selection=False):
+                yield
+        finally:
+            self.materializing = False
+
+    def materialize_building(self, building: BuildingInstance):
+        if self.item_pool:
+            item = self.item_pool.pop()
+            item.set_instance(building)
+        else:
+            item = BuildingItem(building)
+        self.addItem(item)
+        item.setSelected(building.id in self.selection)
+        item.set_colliding(building in self.colliding_buildings)
+        item.set_flow(self.production.flow(building))
+        self.building_items[building.id] = item
+
+    def release_item(self, item: BuildingItem):
+        self.removeItem(item)
+        del self.building_items[item.instance.id]
+        if len(self.item_pool) < self.ITEM_POOL_SIZE:
+            self.item_pool.append(item)
+
+    def release_all_items(self):
+        with self.item_changes(len(self.building_items)):
+            for item in list(self.building_items.values()):
+                self.release_item(item)
+        self.materialized_rect = None
+        self.materialized_bounds = None
+
+    def on_selection_changed(self):
+        # Qt only knows about the selection of buildings with items, the rest is kept as it was
+        if self.materializing or self.bulk_updates:
+            return
+        selected = {building_id for building_id, item in self.building_items.items() if item.isSelected()}
+        with self.selection.batch():
+            self.selection.select(selected)
+            self.selection.deselect(self.building_items.keys() - selected)
+        self.emit_selection_changed()
+
+    def on_model_selection_changed(self, added: set, removed: set):
+        # Bring the items in line without each of them reporting back
+        with self.bulk_update(0, notify_selection=False):
+            for building_id in added:
+                item = self.building_items.get(building_id)
+                if item is not None:
+                    item.setSelected(True)
+            for building_id in removed:
+                item = self.building_items.get(building_id)
+                if item is not None:
+                    item.setSelected(False)
+        self.emit_selection_changed()
+
+    @contextmanager
+    def selection_batch(self):
+        """Report the selection changes of a bulk edit with a single selection_changed."""
+        self.selection_batches += 1
+        try:
+            with self.selection.batch():
+                yield
+        finally:
+            self.selection_batches -= 1
+        if not self.selection_batches and self.selection_change_pending:
+            self.selection_change_pending = False
+            self.emit_selection_changed()
+
+    def emit_selection_changed(self):
+        if self.selection_batches:
+            self.selection_change_pending = True
+            return
+        buildings, blueprints = len(self.selection), len(self.selected_blueprint_items())
+        if not buildings and not blueprints:
+            self.selection_changed.emit('No selection')
+        elif not blueprints:
+            self.selection_changed.emit(f'{buildings} buildings selected')
+        else:
+            self.selection_changed.emit(f'{buildings} buildings, {blueprints} blueprints selected')
 
     ## ======================================================
     ## Event handlers
@@ -177,27 +1083,83 @@ class EditorScene(QGraphicsScene):
                 self.place_building()
 
             elif event.button() == Qt.RightButton and self.preview_item:
-                if self.preview_item:
-                    self.removeItem(self.preview_item)
-                self.preview_item = None
-                self.operation = None
-        
+                self.cancel_building_placement()
+                self.suppress_context_menu = True
+
+        elif self.operation == SceneOperation.CONVEYOR_PLACEMENT:
+            if event.button() == Qt.LeftButton:
+                self.place_conveyor(event.scenePos())
+
+            elif event.button() == Qt.RightButton:
+                # The first right click drops the source building, the second leaves conveyor mode
+                if self.conveyor_source is None:
+                    self.operation = None
+                self.cancel_conveyor_placement()
+                self.suppress_context_menu = True
+
         else:
+            if not self.detailed and event.button() == Qt.LeftButton:
+                # Zoomed out the buildings have no items, so clicks are resolved in the layout
+                building = self.building_at(event.scenePos())
+                if building is not None:
+                    if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+                        self.selection.toggle(building.id)
+                    elif building.id not in self.selection:
+                        self.clearSelection()
+                        self.selection.replace([building.id])
+                    if building.id in self.selection:
+                        self.start_selection_move(event.scenePos())
+                    return
+
+            # A plain click outside the selection deselects everything, also the buildings without an item
+            item = self.itemAt(event.scenePos(), QTransform())
+            if (event.button() == Qt.LeftButton and not event.modifiers() & Qt.KeyboardModifier.ControlModifier
+                    and not (item is not None and item.isSelected())):
+                self.selection.clear()
+
             super().mousePressEvent(event)
 
+            # Dragging a selected building moves the whole selection in one batch
+            if event.button() == Qt.LeftButton and isinstance(item, BuildingItem) and item.isSelected():
+                self.start_selection_move(event.scenePos())
+
+    def contextMenuEvent(self, event):
+        suppressed, self.suppress_context_menu = self.suppress_context_menu, False
+        if self.operation is None and not suppressed:
+            building = self.building_at(event.scenePos())
+            if building is not None:
+                self.show_recipe_menu(building, event.screenPos())
+                return
+        super().contextMenuEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        # Editing a placed blueprint starts by exploding it into individual buildings
+        item = self.itemAt(event.scenePos(), QTransform())
+        if self.operation is None and isinstance(item, BlueprintItem):
+            self.undo_stack.push(ExplodeBlueprintsCommand(self, [item.instance]))
+            return
+        super().mouseDoubleClickEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if self.operation == SceneOperation.SELECTION_MOVE and event.button() == Qt.LeftButton:
+            self.finish_selection_move()
+        super().mouseReleaseEvent(event)
+
+    @profiler.timed('Mouse move')
     def mouseMoveEvent(self, event):
-        scene_pos = event.scenePos()
-        world_pos = self.scene_to_world(scene_pos)
-        snapped_world_pos = self.scene_to_world_snapped(scene_pos)
-        self.mouse_scene_position_changed.emit(f'Scene Position: ({scene_pos.x():.2f}, {scene_pos.y():.2f}) '
-                                               f'World Position: ({world_pos.x:.2f}, {world_pos.y:.2f}) '
-                                               f'Snapped World Position: ({snapped_world_pos.x}, {snapped_world_pos.y})')
         self.last_mouse_scene_pos = event.scenePos()
+        if not self.status_timer.isActive():
+            self.status_timer.start()
         if self.preview_item:
             self.snap_preview_to_cursor()
-            self.check_collisions()
-            self.preview_item.update()
-        super().mouseMoveEvent(event)
+
+        if self.operation == SceneOperation.SELECTION_MOVE:
+            self.move_selection(event.scenePos())
+        elif self.operation == SceneOperation.CONVEYOR_PLACEMENT:
+            if self.conveyor_source is not None:
+                self.update_conveyor_preview(event.scenePos())
+        else:
+            super().mouseMoveEvent(event)
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Delete:
@@ -210,10 +1172,19 @@ class EditorScene(QGraphicsScene):
             self.cut_current_selection()
         elif event.key() == Qt.Key.Key_V and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
             self.paste_current_selection()
+        elif event.key() == Qt.Key.Key_Z and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            if event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+                self.redo()
+            else:
+                self.undo()
+        elif event.key() == Qt.Key.Key_Y and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.redo()
         elif event.key() == Qt.Key.Key_S and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
             self.save_layout_to_file()
         elif event.key() == Qt.Key.Key_O and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
             self.load_layout_from_file()
+        elif event.key() == Qt.Key.Key_B:
+            self.start_conveyor_placement()
         elif event.key() == Qt.Key.Key_R:
             if self.operation == SceneOperation.BUILDING_PLACEMENT:
                 self.rotate_preview()
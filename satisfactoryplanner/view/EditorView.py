@@ -1,10 +1,16 @@
+import math
 from PySide6.QtWidgets import QGraphicsView
 from PySide6.QtGui import QColor, QPainter, QPen, QBrush, QPixmap, QTransform, QGuiApplication
-from PySide6.QtCore import Qt, QRectF
+from PySide6.QtCore import Qt, QRectF, QLineF, Signal
 from view.Settings import Settings
 from view.EditorScene import EditorScene
+from view.Profiler import profiler
+from view.ProfilerHud import ProfilerHud
 
 class EditorView(QGraphicsView):
+    # Emitted when the visible part of the scene changes by scrolling, zooming or resizing
+    visible_rect_changed = Signal()
+
     def __init__(self, scene: EditorScene):
         super().__init__()
         self.setScene(scene)
@@ -25,6 +31,86 @@ class EditorView(QGraphicsView):
         self._isPanning = False
         self._panStart = None
 
+        self.profiler_hud = ProfilerHud(self)
+
+        # The scene only creates items for the buildings around the visible area, and none
+        # at all when zoomed out far enough for the buildings to be drawn as flat rectangles
+        self.visible_rect_changed.connect(self.update_scene_visible_rect)
+        scene.layout_changed.connect(self.on_layout_changed)
+        scene.selection_changed.connect(self.on_scene_selection_changed)
+        self.rubber_band_rect = None
+        self.rubberBandChanged.connect(self.on_rubber_band_changed)
+
+    def update_scene_visible_rect(self):
+        scene = self.scene()
+        if scene is not None:  # Already detached while the window is torn down
+            scene.set_visible_rect(self.mapToScene(self.viewport().rect()).boundingRect(), self.detailed())
+
+    def detailed(self) -> bool:
+        """Whether buildings are shown as items with icons, rather than drawn as flat rectangles."""
+        return self.transform().m11() >= Settings.DETAIL_MIN_SCALE
+
+    # --- Level of detail ---
+    def on_layout_changed(self, regions: list[QRectF]):
+        # Without items nothing tells the view about model changes, so they are repainted here
+        if not self.scene().detailed:
+            for rect in regions:
+                self.viewport().update(self.mapFromScene(rect).boundingRect().adjusted(-2, -2, 2, 2))
+
+    def on_scene_selection_changed(self, summary: str):
+        if not self.scene().detailed:
+            self.viewport().update()
+
+    def on_rubber_band_changed(self, rubber_band_rect, from_scene_point, to_scene_point):
+        # Qt only selects items, so zoomed out the released rubber band selects in the model
+        if not rubber_band_rect.isNull():
+            self.rubber_band_rect = self.mapToScene(rubber_band_rect).boundingRect()
+        elif self.rubber_band_rect is not None:
+            if not self.scene().detailed:
+                self.scene().select_rect(self.rubber_band_rect)
+            self.rubber_band_rect = None
+
+    @profiler.timed('Flat buildings')
+    def draw_flat_buildings(self, painter, rect: QRectF):
+        """Draw the buildings within rect as category colored rectangles, one batched call per category."""
+        scene = self.scene()
+        ppm = Settings.PIXELS_PER_METER
+        categories = {}
+        selected = []
+        colliding = []
+        for building in scene.layout.query_rect(rect.left() / ppm, rect.top() / ppm, rect.right() / ppm, rect.bottom() / ppm):
+            left, top, right, bottom = building.footprint()
+            building_rect = QRectF(left * ppm, top * ppm, (right - left) * ppm, (bottom - top) * ppm)
+            categories.setdefault(building.type.category, []).append(building_rect)
+            if building.id in scene.selection:
+                selected.append(building_rect)
+            if building in scene.colliding_buildings:
+                colliding.append(building_rect)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        painter.setPen(Qt.PenStyle.NoPen)
+        for category, rects in categories.items():
+            painter.setBrush(QColor(Settings.CATEGORY_COLORS.get(category, Settings.DEFAULT_CATEGORY_COLOR)))
+            painter.drawRects(rects)
+        if colliding:
+            painter.setBrush(QColor('red'))
+            painter.drawRects(colliding)
+        if selected:
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.setPen(QPen(QColor('white'), 0))
+            painter.drawRects(selected)
+        painter.restore()
+
+    # --- Profiling ---
+    def set_profiler_hud_visible(self, visible: bool):
+        self.profiler_hud.set_active(visible)
+        profiler.enabled = visible or profiler.recording
+
+    @profiler.timed('Frame')
+    def paintEvent(self, event):
+        super().paintEvent(event)
+
     # --- Mouse Panning ---
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.MiddleButton:
@@ -50,6 +136,7 @@ class EditorView(QGraphicsView):
             super().mouseMoveEvent(event)
 
     # --- Zoom ---
+    @profiler.timed('Wheel')
     def wheelEvent(self, event):
         zoom_factor = 1.25
         old_pos = self.mapToScene(event.position().toPoint())
@@ -69,56 +156,83 @@ class EditorView(QGraphicsView):
         delta = new_pos - old_pos
         self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
         self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
+        self.visible_rect_changed.emit()
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self.visible_rect_changed.emit()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.visible_rect_changed.emit()
 
     # --- Grid Drawing ---
     GRID_SIZE = Settings.PIXELS_PER_METER
     GRID_SUBDIV = 8
+    GRID_MIN_SPACING = 8  # Lines closer than this on screen (in pixels) are not drawn
+
+    def grid_steps(self) -> tuple[int | None, int]:
+        """Return the (minor, major) grid steps in scene units that are visible at the current zoom.
+
+        The minor step is None when minor lines would be too dense to see. The major step
+        is coarsened by GRID_SUBDIV until its lines are at least GRID_MIN_SPACING apart.
+        """
+        scale = self.transform().m11()
+        minor_step = self.GRID_SIZE if self.GRID_SIZE * scale >= self.GRID_MIN_SPACING else None
+        major_step = self.GRID_SIZE * self.GRID_SUBDIV
+        while major_step * scale < self.GRID_MIN_SPACING:
+            major_step *= self.GRID_SUBDIV
+        return minor_step, major_step
+
+    @staticmethod
+    def grid_lines(rect: QRectF, step: int, skip_every: int = 0) -> list[QLineF]:
+        """Build the grid lines with the given step that cross rect, omitting every skip_every-th line."""
+        left, right, top, bottom = rect.left(), rect.right(), rect.top(), rect.bottom()
+        lines = []
+
+        # Vertical lines
+        for i in range(math.ceil(left / step), math.floor(right / step) + 1):
+            if not skip_every or i % skip_every:
+                lines.append(QLineF(i * step, top, i * step, bottom))
 
+        # Horizontal lines
+        for i in range(math.ceil(top / step), math.floor(bottom / step) + 1):
+            if not skip_every or i % skip_every:
+                lines.append(QLineF(left, i * step, right, i * step))
+
+        return lines
+
+    @profiler.timed('Background')
     def drawBackground(self, painter, rect: QRectF):
         super().drawBackground(painter, rect)
 
         scene_rect = self.scene().sceneRect().adjusted(8 * self.GRID_SIZE, 8 * self.GRID_SIZE, - 8 * self.GRID_SIZE, -8 * self.GRID_SIZE)
 
-        # --- Grid restricted to scene ---
-        left = int(scene_rect.left())
-        right = int(scene_rect.right())
-        top = int(scene_rect.top())
-        bottom = int(scene_rect.bottom())
+        # --- Grid restricted to the exposed part of the scene ---
+        exposed_rect = rect.intersected(scene_rect)
+        if not exposed_rect.isEmpty():
+            minor_step, major_step = self.grid_steps()
 
-        minor_pen = QPen(QColor(60, 60, 60))
-        minor_pen.setWidth(2)
-        major_pen = QPen(QColor(90, 90, 90))
-        major_pen.setWidth(5)
+            minor_pen = QPen(QColor(60, 60, 60))
+            minor_pen.setWidth(2)
+            major_pen = QPen(QColor(90, 90, 90))
+            major_pen.setWidth(5)
 
-        lines_minor = []
-        lines_major = []
+            # Grid lines are axis aligned, antialiasing only costs time here
+            painter.save()
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
 
-        # Vertical lines
-        x = left - (left % self.GRID_SIZE)
-        while x <= right:
-            if (x // self.GRID_SIZE) % self.GRID_SUBDIV == 0:
-                lines_major.append((x, top, x, bottom))
-            else:
-                lines_minor.append((x, top, x, bottom))
-            x += self.GRID_SIZE
+            if minor_step is not None:
+                painter.setPen(minor_pen)
+                painter.drawLines(self.grid_lines(exposed_rect, minor_step, major_step // minor_step))
 
-        # Horizontal lines
-        y = top - (top % self.GRID_SIZE)
-        while y <= bottom:
-            if (y // self.GRID_SIZE) % self.GRID_SUBDIV == 0:
-                lines_major.append((left, y, right, y))
-            else:
-                lines_minor.append((left, y, right, y))
-            y += self.GRID_SIZE
-
-        # Draw grid
-        painter.setPen(minor_pen)
-        for x1, y1, x2, y2 in lines_minor:
-            painter.drawLine(x1, y1, x2, y2)
-
-        painter.setPen(major_pen)
-        for x1, y1, x2, y2 in lines_major:
-            painter.drawLine(x1, y1, x2, y2)
+            painter.setPen(major_pen)
+            painter.drawLines(self.grid_lines(exposed_rect, major_step))
+            painter.restore()
+
+        # --- Buildings, when zoomed out too far for their items ---
+        if not self.scene().detailed:
+            self.draw_flat_buildings(painter, rect)
 
         # --- Thick border around usable area ---
         border_pen = QPen(QColor('lightgray'))
@@ -0,0 +1,63 @@
+import math
+
+from PySide6.QtGui import QPixmap, QPixmapCache
+from PySide6.QtCore import Qt
+
+from model.BuldingInstance import BuildingType
+
+class IconCache:
+    """Process-wide cache of decoded and pre-scaled building icons.
+
+    Backed by QPixmapCache, so memory use is bounded and the least recently used
+    pixmaps are evicted first. Items hold their own (implicitly shared) reference
+    to the pixmap, so eviction never invalidates a building already in the scene.
+    """
+
+    CACHE_LIMIT_KB = 256 * 1024
+    MAX_ZOOM_LEVEL = 4
+
+    _initialized = False
+
+    @classmethod
+    def _init(cls):
+        if not cls._initialized:
+            QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), cls.CACHE_LIMIT_KB))
+            cls._initialized = True
+
+    @classmethod
+    def source(cls, path: str) -> QPixmap:
+        """Return the decoded image at path, decoding it only once."""
+        cls._init()
+        key = f'icon:{path}'
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            pixmap = QPixmap(path)
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    @classmethod
+    def zoom_level(cls, scale: float) -> int:
+        """Return the zoom level for drawing at a view scale: the most halvings of the
+        resolution that still leave a pixmap pixel for every device pixel."""
+        if scale >= 1:
+            return 0
+        return min(cls.MAX_ZOOM_LEVEL, math.floor(-math.log2(scale)))
+
+    @classmethod
+    def pixmap(cls, building_type: BuildingType, width: int, height: int, zoom_level: int = 0) -> QPixmap:
+        """Return the icon of a building type scaled to width x height pixels.
+
+        zoom_level buckets the resolution: each level halves the stored size, so
+        zoomed out renderers can share a cheaper pixmap.
+        """
+        cls._init()
+        width = max(1, int(width) >> zoom_level)
+        height = max(1, int(height) >> zoom_level)
+        key = f'building:{building_type.name}:{width}x{height}'
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            pixmap = cls.source(building_type.icon).scaled(width, height,
+                                                           Qt.AspectRatioMode.IgnoreAspectRatio,
+                                                           Qt.TransformationMode.SmoothTransformation)
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
@@ -0,0 +1,23 @@
+from PySide6.QtCore import QThread, Signal
+
+from model.FactoryLayout import FactoryLayout
+
+class LayoutLoader(QThread):
+    """Reads and parses a layout file off the GUI thread."""
+
+    loaded = Signal(object)  # The parsed FactoryLayout
+    failed = Signal(str)
+
+    def __init__(self, file_name: str, type_lookup: dict, parent=None):
+        super().__init__(parent)
+        self.file_name = file_name
+        self.type_lookup = type_lookup
+
+    def run(self):
+        layout = FactoryLayout()
+        try:
+            layout.load(self.file_name, self.type_lookup)
+        except (OSError, ValueError, KeyError) as e:
+            self.failed.emit(f'Could not load {self.file_name}: {e}')
+            return
+        self.loaded.emit(layout)
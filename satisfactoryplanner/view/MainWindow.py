@@ -1,18 +1,25 @@
 from PySide6.QtWidgets import (
-    QMainWindow, QWidget, QHBoxLayout, QLabel, QStatusBar, QGraphicsView
+    QMainWindow, QWidget, QHBoxLayout, QLabel, QStatusBar, QGraphicsView, QFileDialog, QInputDialog, QMessageBox
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QEvent, QTimer
+import time
 from view.EditorScene import EditorScene
 from view.BuldingSelectorWidget import BuildingPaletteWidget
 from view.EditorView import EditorView
 from view.Minimap import MinimapView
+from view.Settings import Settings
+from view.Profiler import profiler
 from model.BuldingInstance import building_types
 from model.FactoryLayout import FactoryLayout
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, start_time: float = None):
         super().__init__()
 
+        # Time-to-first-frame is measured from here unless the launcher knows better
+        self.start_time = start_time if start_time is not None else time.perf_counter()
+        self.first_frame_time = None
+
         self.setWindowTitle("Satisfactory Layout Planner")
 
         central = QWidget()
@@ -40,9 +47,19 @@ class MainWindow(QMainWindow):
         status.addWidget(self.label_left)           # left side
         status.addPermanentWidget(self.label_right) # right-aligned
         self.editor.scene().mouse_scene_position_changed.connect(self.label_right.setText)
+        self.label_production = QLabel()
+        status.addPermanentWidget(self.label_production)
+        self.editor.scene().production_changed.connect(self.label_production.setText)
+        self.scene.status_changed.connect(self.label_left.setText)
+        self.label_selection = QLabel('No selection')
+        status.addPermanentWidget(self.label_selection)
+        self.scene.selection_changed.connect(self.label_selection.setText)
 
         self.create_menus()
 
+        # Wait for the editor to be painted once before doing any deferred work
+        self.editor.viewport().installEventFilter(self)
+
     def create_menus(self):
         self.menu_bar = self.menuBar()
 
@@ -53,14 +70,42 @@ class MainWindow(QMainWindow):
         self.file_exit_action = self.file_menu.addAction('Exit')
 
         self.edit_menu = self.menu_bar.addMenu('Edit')
+        self.edit_undo_action = self.scene.undo_stack.createUndoAction(self, 'Undo')
+        self.edit_redo_action = self.scene.undo_stack.createRedoAction(self, 'Redo')
+        self.edit_menu.addAction(self.edit_undo_action)
+        self.edit_menu.addAction(self.edit_redo_action)
+        self.edit_menu.addSeparator()
         self.edit_cut_action = self.edit_menu.addAction('Cut')
         self.edit_copy_action = self.edit_menu.addAction('Copy')
         self.edit_paste_action = self.edit_menu.addAction('Paste')
+        self.edit_menu.addSeparator()
+        self.edit_select_all_action = self.edit_menu.addAction('Select All')
+        self.edit_deselect_action = self.edit_menu.addAction('Deselect All')
+        self.edit_deselect_action.setShortcut('Ctrl+Shift+A')
+        self.edit_invert_selection_action = self.edit_menu.addAction('Invert Selection')
+        self.edit_invert_selection_action.setShortcut('Ctrl+I')
+        self.edit_select_same_type_action = self.edit_menu.addAction('Select Same Type')
+        self.edit_menu.addSeparator()
+        self.edit_conveyor_action = self.edit_menu.addAction('Draw Conveyor')
+        self.edit_auto_layout_action = self.edit_menu.addAction('Auto Layout...')
+
+        self.blueprint_menu = self.menu_bar.addMenu('Blueprints')
+        self.blueprint_save_action = self.blueprint_menu.addAction('Save Selection as Blueprint...')
+        self.blueprint_explode_action = self.blueprint_menu.addAction('Explode Selected Blueprints')
+        self.blueprint_place_menu = self.blueprint_menu.addMenu('Place')
+
+        self.view_menu = self.menu_bar.addMenu('View')
+        self.view_profiler_action = self.view_menu.addAction('Profiler Overlay')
+        self.view_profiler_action.setCheckable(True)
+        self.view_profiler_action.setShortcut('F12')
+        self.view_record_trace_action = self.view_menu.addAction('Record Trace')
+        self.view_record_trace_action.setCheckable(True)
+        self.view_export_trace_action = self.view_menu.addAction('Export Trace...')
 
         self.configure_actions()
 
     def configure_actions(self):
-        self.file_new_action.triggered.connect(lambda: None)
+        self.file_new_action.triggered.connect(self.scene.new_layout)
         self.file_open_action.triggered.connect(self.scene.load_layout_from_file)
         self.file_save_action.triggered.connect(self.scene.save_layout_to_file)
         self.file_exit_action.triggered.connect(self.close)
@@ -68,6 +113,89 @@ class MainWindow(QMainWindow):
         self.edit_cut_action.triggered.connect(self.scene.cut_current_selection)
         self.edit_copy_action.triggered.connect(self.scene.copy_current_selection)
         self.edit_paste_action.triggered.connect(self.scene.paste_current_selection)
+        self.edit_conveyor_action.triggered.connect(self.scene.start_conveyor_placement)
+        self.edit_auto_layout_action.triggered.connect(self.auto_layout)
+        self.edit_select_all_action.triggered.connect(self.scene.select_all_items)
+        self.edit_deselect_action.triggered.connect(self.scene.clear_selection)
+        self.edit_invert_selection_action.triggered.connect(self.scene.invert_selection)
+        self.edit_select_same_type_action.triggered.connect(self.scene.select_same_type)
+
+        self.blueprint_save_action.triggered.connect(self.save_blueprint)
+        self.blueprint_explode_action.triggered.connect(self.scene.explode_selected_blueprints)
+        self.blueprint_place_menu.aboutToShow.connect(self.fill_blueprint_place_menu)
+
+        self.view_profiler_action.toggled.connect(self.editor.set_profiler_hud_visible)
+        self.view_record_trace_action.toggled.connect(self.set_trace_recording)
+        self.view_export_trace_action.triggered.connect(self.export_trace)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint and watched is self.editor.viewport():
+            # The timer fires once the paint event has been handled and the window flushed
+            watched.removeEventFilter(self)
+            QTimer.singleShot(0, self.on_first_frame)
+        return super().eventFilter(watched, event)
+
+    def on_first_frame(self):
+        """Report the startup time and load the resources that were not needed for the first frame."""
+        # Only needed once the window is shown, so kept out of the startup path
+        from model.EditJournal import EditJournal
+
+        self.first_frame_time = time.perf_counter() - self.start_time
+        self.label_left.setText(f'Ready ({self.first_frame_time * 1000:.0f} ms to first frame)')
+        self.building_palette.load_icons()
+        self.scene.start_journal(EditJournal())
+
+    def save_blueprint(self):
+        name, ok = QInputDialog.getText(self, 'Save blueprint', 'Blueprint name:')
+        if not ok or not name:
+            return
+        try:
+            self.scene.save_selection_as_blueprint(name)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, 'Save blueprint', str(e))
+
+    def auto_layout(self):
+        # Only needed once an auto layout is asked for, so kept out of the startup path
+        from view.AutoLayoutDialog import AutoLayoutDialog
+
+        # The usable area inside the border drawn around the scene
+        rect = self.scene.sceneRect()
+        area = (int(rect.width() / Settings.PIXELS_PER_METER) - 16, int(rect.height() / Settings.PIXELS_PER_METER) - 16)
+        dialog = AutoLayoutDialog(self.scene.selected_buildings(), area, self)
+        if dialog.exec() != AutoLayoutDialog.DialogCode.Accepted:
+            return
+        try:
+            self.scene.start_auto_layout(dialog.buildings(), dialog.width_box.value(), dialog.height_box.value(),
+                                         dialog.clearance_box.value(), dialog.seconds_box.value(),
+                                         rearrange=dialog.rearrange.isChecked())
+        except ValueError as e:
+            QMessageBox.warning(self, 'Auto Layout', str(e))
+
+    def fill_blueprint_place_menu(self):
+        """List the library's blueprints, the menu is rebuilt every time it opens."""
+        self.blueprint_place_menu.clear()
+        names = self.scene.get_blueprint_library().names()
+        for name in names:
+            action = self.blueprint_place_menu.addAction(name)
+            action.triggered.connect(lambda checked=False, name=name: self.scene.set_preview_blueprint(name))
+        if not names:
+            self.blueprint_place_menu.addAction('No blueprints saved').setEnabled(False)
+
+    def set_trace_recording(self, recording: bool):
+        if recording:
+            profiler.events.clear()
+        profiler.recording = recording
+        profiler.enabled = recording or self.view_profiler_action.isChecked()
+
+    def export_trace(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, 'Export trace', 'trace.json', 'Chrome traces (*.json)')
+        if file_name:
+            profiler.export_chrome_trace(file_name)
+
+    def closeEvent(self, event):
+        self.scene.cancel_auto_layout()
+        self.scene.close_journal()
+        super().closeEvent(event)
 
     def resizeEvent(self, event):
         self.minimap.move(self.width() - self.minimap.width() - 30,
@@ -1,28 +1,163 @@
-from PySide6.QtWidgets import QGraphicsView
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QPen, QColor
+from PySide6.QtWidgets import QGraphicsView, QGraphicsScene
+from PySide6.QtCore import Qt, QTimer, QRectF
+from PySide6.QtGui import QPen, QColor, QPixmap, QPainter, QRegion
+
+from view.Profiler import profiler
+from view.Settings import Settings
 
 class MinimapView(QGraphicsView):
+    REFRESH_DELAY_MS = 100  # Scene changes are collected and re-rendered at most this often
 
     def __init__(self, main_view: QGraphicsView, parent=None):
         super().__init__(parent)
         self.main_view = main_view
-        self.setScene(main_view.scene())
+        self.source_scene = main_view.scene()
+
+        # The minimap paints a cached image of the layout, so it only gets an empty scene
+        # of the same size instead of painting every building on each repaint. The image is
+        # drawn from the model, as the editor scene only has items near its viewport
+        self.setScene(QGraphicsScene(self.source_scene.sceneRect(), self))
+        self.setBackgroundBrush(main_view.backgroundBrush())
         self.setRenderHints(main_view.renderHints())
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setDragMode(QGraphicsView.NoDrag)
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(lambda: self.viewport().update())
-        self.timer.start(33)  # Update at ~30 FPS
+        self.cache = None
+        self.cache_scale = 1.0
+        self.dirty_region = QRegion()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(self.REFRESH_DELAY_MS)
+        self.refresh_timer.timeout.connect(self.refresh_cache)
+
+        self.source_scene.layout_changed.connect(self.on_layout_changed)
+        self.source_scene.sceneRectChanged.connect(self.on_scene_rect_changed)
+        self.main_view.visible_rect_changed.connect(lambda: self.viewport().update())
+
+    ## ======================================================
+    ## Cache handling
+    ## ======================================================
+
+    def invalidate_cache(self):
+        """Drop the cached render, it is rebuilt from scratch on the next refresh."""
+        self.cache = None
+        self.dirty_region = QRegion()
+        self.refresh_timer.start()
+
+    def scene_to_cache(self, rect: QRectF):
+        """Map a scene rectangle to the smallest pixel rectangle of the cache covering it."""
+        scene_rect = self.sceneRect()
+        return QRectF((rect.left() - scene_rect.left()) * self.cache_scale,
+                      (rect.top() - scene_rect.top()) * self.cache_scale,
+                      rect.width() * self.cache_scale,
+                      rect.height() * self.cache_scale).toAlignedRect()
+
+    def cache_to_scene(self, rect) -> QRectF:
+        scene_rect = self.sceneRect()
+        return QRectF(scene_rect.left() + rect.left() / self.cache_scale,
+                      scene_rect.top() + rect.top() / self.cache_scale,
+                      rect.width() / self.cache_scale,
+                      rect.height() / self.cache_scale)
+
+    def create_cache(self):
+        scene_rect = self.sceneRect()
+        resolution = max(self.viewport().width(), self.viewport().height(), 1)
+        self.cache_scale = resolution / max(scene_rect.width(), scene_rect.height())
+        self.cache = QPixmap(max(1, round(scene_rect.width() * self.cache_scale)),
+                             max(1, round(scene_rect.height() * self.cache_scale)))
+        self.dirty_region = QRegion(self.cache.rect())
+
+    @profiler.timed('Minimap cache')
+    def refresh_cache(self):
+        """Redraw the dirty parts of the cached layout image."""
+        if self.cache is None:
+            self.create_cache()
+
+        if self.dirty_region.isEmpty():
+            return
+
+        background = self.backgroundBrush()
+        painter = QPainter(self.cache)
+        for target in self.dirty_region:
+            # Redraw whole cache pixels, so partial updates do not leave seams
+            painter.fillRect(target, background)
+            painter.save()
+            painter.setClipRect(target)
+            self.draw_layout(painter, self.cache_to_scene(target))
+            painter.restore()
+        painter.end()
+
+        self.dirty_region = QRegion()
+        self.viewport().update()
+
+    def draw_layout(self, painter: QPainter, rect: QRectF):
+        """Draw the buildings and placed blueprints within a scene rect as flat, category colored rectangles."""
+        ppm = Settings.PIXELS_PER_METER
+        scene_rect = self.sceneRect()
+        layout = self.source_scene.layout
+        bounds = (rect.left() / ppm, rect.top() / ppm, rect.right() / ppm, rect.bottom() / ppm)
+
+        def cache_rect(footprint):
+            left, top, right, bottom = footprint
+            return QRectF((left * ppm - scene_rect.left()) * self.cache_scale,
+                          (top * ppm - scene_rect.top()) * self.cache_scale,
+                          max((right - left) * ppm * self.cache_scale, 1),
+                          max((bottom - top) * ppm * self.cache_scale, 1))
+
+        colors = {}
+        for building in layout.query_rect(*bounds):
+            category = building.type.category
+            color = colors.get(category)
+            if color is None:
+                color = colors[category] = QColor(Settings.CATEGORY_COLORS.get(category, Settings.DEFAULT_CATEGORY_COLOR))
+            painter.fillRect(cache_rect(building.footprint()), color)
+
+        blueprint_color = QColor(Settings.DEFAULT_CATEGORY_COLOR)
+        for instance in layout.blueprint_index.query_rect(bounds):
+            for footprint in instance.footprints():
+                painter.fillRect(cache_rect(footprint), blueprint_color)
+
+    ## ======================================================
+    ## Slots
+    ## ======================================================
+
+    def on_layout_changed(self, regions: list[QRectF]):
+        if self.cache is None:
+            return
+
+        for rect in regions:
+            self.dirty_region += self.scene_to_cache(rect).intersected(self.cache.rect())
+
+        if not self.dirty_region.isEmpty() and not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def on_scene_rect_changed(self, rect: QRectF):
+        self.setSceneRect(rect)
+        self.invalidate_cache()
+
+    ## ======================================================
+    ## Event handlers
+    ## ======================================================
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.invalidate_cache()
+
+    @profiler.timed('Minimap paint')
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+
+        if self.cache is not None:
+            painter.drawPixmap(self.sceneRect(), self.cache, QRectF(self.cache.rect()))
 
     def drawForeground(self, painter, rect):
         super().drawForeground(painter, rect)
 
         # Map the main view's viewport rect to scene coordinates
         scene_rect = self.main_view.mapToScene(self.main_view.viewport().rect()).boundingRect()
-        
+
         # Draw a rectangle showing the main view
         pen = QPen(QColor('lightgray'))
         pen.setWidth(100)
@@ -0,0 +1,88 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+class Profiler:
+    """Opt-in timers around the editor's hot paths.
+
+    Functions are instrumented with the timed() decorator. While the profiler is disabled
+    the wrapper only checks a flag, so the timers can stay in place permanently. Enabled,
+    the last HISTORY samples of every stage are kept for the statistics shown in the HUD,
+    and while recording every call is also kept as a trace event for export.
+    """
+
+    HISTORY = 120  # Samples per stage used for the statistics
+    MAX_EVENTS = 500000  # Trace events kept while recording, older ones are dropped
+
+    def __init__(self):
+        self.enabled = False
+        self.recording = False
+        self.samples = {}  # Stage name -> deque of (start, duration) in nanoseconds
+        self.events = deque(maxlen=self.MAX_EVENTS)  # (name, thread id, start, duration) in nanoseconds
+
+    def timed(self, name: str):
+        """Decorator timing every call of a function as the given stage."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.add_sample(name, start, time.perf_counter_ns() - start)
+            return wrapper
+        return decorator
+
+    def add_sample(self, name: str, start: int, duration: int):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.HISTORY)
+        samples.append((start, duration))
+        if self.recording:
+            self.events.append((name, threading.get_ident(), start, duration))
+
+    def reset(self):
+        self.samples = {}
+        self.events.clear()
+
+    def stats(self, name: str) -> tuple[float, float, float]:
+        """Return the mean and maximum duration (in ms) and the calls per second of a stage."""
+        samples = self.samples.get(name)
+        if not samples:
+            return 0.0, 0.0, 0.0
+        durations = [duration for _, duration in samples]
+        window = time.perf_counter_ns() - 1_000_000_000
+        rate = sum(1 for start, _ in samples if start >= window)
+        return sum(durations) / len(durations) / 1e6, max(durations) / 1e6, float(rate)
+
+    def report(self) -> str:
+        """Format the statistics of all stages, one line each."""
+        lines = [f'{"Stage":<16}{"avg ms":>8}{"max ms":>8}{"/s":>6}']
+        for name in sorted(self.samples):
+            mean, peak, rate = self.stats(name)
+            lines.append(f'{name:<16}{mean:>8.2f}{peak:>8.2f}{rate:>6.0f}')
+        if self.recording:
+            lines.append(f'Recording ({len(self.events)} events)')
+        return '\n'.join(lines)
+
+    def export_chrome_trace(self, file_name: str):
+        """Write the recorded events in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        origin = min((start for _, _, start, _ in self.events), default=0)  # Events are stored as they end
+        trace = {
+            "traceEvents": [
+                {"name": name, "ph": "X", "pid": pid, "tid": tid,
+                 "ts": (start - origin) / 1000, "dur": duration / 1000}
+                for name, tid, start, duration in self.events
+            ],
+            "displayTimeUnit": "ms"
+        }
+        with open(file_name, mode='w') as trace_file:
+            json.dump(trace, trace_file)
+
+profiler = Profiler()
@@ -0,0 +1,36 @@
+from PySide6.QtWidgets import QLabel
+from PySide6.QtGui import QFont
+from PySide6.QtCore import Qt, QTimer
+
+from view.Profiler import profiler
+
+class ProfilerHud(QLabel):
+    """On-screen overlay with the profiler's per-stage timings, refreshed a few times per second."""
+
+    REFRESH_INTERVAL_MS = 250
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        font = QFont('monospace')
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        self.setFont(font)
+        self.setStyleSheet('background-color: rgba(0, 0, 0, 160); color: #e0e0e0; padding: 6px;')
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.move(10, 10)
+        self.hide()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def set_active(self, active: bool):
+        self.setVisible(active)
+        if active:
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        self.setText(profiler.report())
+        self.adjustSize()
@@ -2,4 +2,17 @@ from dataclasses import dataclass
 
 @dataclass
 class Settings:
-    PIXELS_PER_METER: int = 100
\ No newline at end of file
+    PIXELS_PER_METER: int = 100
+    DETAIL_MIN_SCALE = 0.16  # View scale below which buildings are drawn without their icons
+    AUTO_LAYOUT_CLEARANCE = 2  # Meters kept free around every building by the auto layout, for walkways and belts
+    AUTO_LAYOUT_SECONDS = 10  # Default time budget of the auto layout search
+
+    # Flat colors used where buildings are drawn without their icons (minimap, zoomed out view)
+    CATEGORY_COLORS = {
+        'Production': '#4f8fd6',
+        'Power': '#d6a84f',
+        'Logistics': '#8a8a8a',
+        'Organisation': '#7fb85c',
+        'Other': '#b05cb8',
+    }
+    DEFAULT_CATEGORY_COLOR = '#cccccc'
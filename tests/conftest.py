@@ -0,0 +1,43 @@
+import os
+import sys
+
+# The application imports its packages relative to satisfactoryplanner/, as main.py and cli.py are run from there
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'satisfactoryplanner'))
+
+import pytest
+
+from model.Blueprint import Blueprint
+from model.BuldingInstance import BuildingInstance, Position, Rotation
+from model.FactoryLayout import FactoryLayout, type_lookup
+
+@pytest.fixture
+def make_building():
+    """Factory for buildings that are not part of a layout yet, Constructors unless told otherwise."""
+    def make(x: float, y: float, type_name: str = 'Constructor', rotation: Rotation = Rotation.DEG_0) -> BuildingInstance:
+        return BuildingInstance(type_lookup[type_name], Position(x, y), rotation)
+    return make
+
+@pytest.fixture
+def make_layout(make_building):
+    """Factory for layouts with a building at each of the given (x, y) positions."""
+    def make(*positions, type_name: str = 'Constructor') -> FactoryLayout:
+        layout = FactoryLayout()
+        layout.add_many([make_building(x, y, type_name) for x, y in positions])
+        return layout
+    return make
+
+@pytest.fixture
+def copy_layout():
+    """Copy a layout through its JSON form, as saving and loading it again would."""
+    def copy(layout: FactoryLayout) -> FactoryLayout:
+        result = FactoryLayout()
+        result.deserialize(layout.serialize(), type_lookup)
+        return result
+    return copy
+
+@pytest.fixture
+def make_blueprint(make_building):
+    """Factory for a blueprint of two Constructors side by side, 18 x 10 m."""
+    def make(name: str = 'Pair') -> Blueprint:
+        return Blueprint.from_buildings(name, [make_building(0, 0), make_building(10, 0)])
+    return make
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from model.AutoLayout import AutoLayout, Packing, PackingProblem, anneal, pack, parse_bill
+from model.FactoryLayout import type_lookup
+
+def overlapping(buildings: list) -> list:
+    """Return the pairs of buildings whose footprints overlap."""
+    pairs = []
+    for i, a in enumerate(buildings):
+        for b in buildings[i + 1:]:
+            a_left, a_top, a_right, a_bottom = a.footprint()
+            b_left, b_top, b_right, b_bottom = b.footprint()
+            if a_left < b_right and b_left < a_right and a_top < b_bottom and b_top < a_bottom:
+                pairs.append((a, b))
+    return pairs
+
+def test_parse_bill():
+    assert parse_bill('2 Constructor, smelter,, 1 Assembler') == \
+           [type_lookup['Constructor']] * 2 + [type_lookup['Smelter'], type_lookup['Assembler']]
+    with pytest.raises(ValueError, match='Teleporter'):
+        parse_bill('3 Teleporter')
+
+def test_pack_keeps_slots_apart():
+    problem = PackingProblem(('Constructor', 'Assembler', 'Smelter', 'Foundry', 'Constructor'), 60, 60)
+    sizes = problem.slot_sizes()
+    packing = pack(problem, sizes, Packing(list(range(5)), [False, True, False, True, False], 30))
+
+    rectangles = []
+    for (left, top, turned), (width, length) in zip(packing.slots, sizes):
+        if turned:
+            width, length = length, width
+        assert 0 <= left and left + width <= 30
+        rectangles.append((left, top, left + width, top + length))
+    for i, a in enumerate(rectangles):
+        for b in rectangles[i + 1:]:
+            assert a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1]
+    assert packing.cost == packing.extent[0] * packing.extent[1]
+
+def test_anneal_never_returns_worse_than_its_start():
+    problem = PackingProblem(('Constructor',) * 6 + ('Assembler',) * 3, 80, 80)
+    start = pack(problem, problem.slot_sizes(), Packing(list(range(9)), [False] * 9, 80))
+    best, evaluations = anneal(problem, start, seed=1, seconds=0.05, temperature=0.01)
+    assert best.cost <= start.cost
+    assert evaluations > 1
+
+def test_auto_layout_arranges_buildings_without_overlaps(make_building):
+    rng = random.Random(0)
+    buildings = [make_building(0, 0, rng.choice(['Constructor', 'Smelter', 'Assembler'])) for _ in range(12)]
+    result = AutoLayout(buildings, 60, 60, seconds=0.2, jobs=1).run()
+
+    arranged = result.layout.buildings
+    assert sorted(b.type.name for b in arranged) == sorted(b.type.name for b in buildings)
+    assert overlapping(arranged) == []
+    assert result.fits and result.width <= 60 and result.height <= 60
+
+def test_auto_layout_rejects_buildings_wider_than_the_area(make_building):
+    with pytest.raises(ValueError, match='Foundry'):
+        AutoLayout([make_building(0, 0, 'Foundry')], 5, 100)
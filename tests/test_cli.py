@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import cli
+from model.Blueprint import BlueprintInstance
+from model.BuldingInstance import Position, Rotation
+from model.Conveyor import Conveyor
+
+def save(layout, path) -> str:
+    layout.save(str(path))
+    return str(path)
+
+def test_validate_reports_overlapping_buildings(make_layout, tmp_path):
+    file_name = save(make_layout((0, 0), (4, 0), (40, 0)), tmp_path / 'overlapping.fl')
+    assert cli.validate_file(file_name) == (file_name, ['Constructor at (0, 0) overlaps Constructor at (4, 0)'])
+
+def test_translate_moves_every_building(make_layout, tmp_path):
+    file_name = save(make_layout((0, 0), (20, 0)), tmp_path / 'layout.fl')
+    output = str(tmp_path / 'moved.fl')
+    assert cli.main(['translate', file_name, output, '--dx', '8', '--dy', '-4']) == 0
+    assert [(b.position.x, b.position.y) for b in cli.load_layout(output)] == [(8, -4), (28, -4)]
+
+@pytest.mark.parametrize('command', ['translate', 'convert', 'merge'])
+def test_commands_report_unreadable_layouts(command, tmp_path, capsys):
+    unknown = tmp_path / 'unknown.fl'
+    unknown.write_text(json.dumps([{"type": "Teleporter", "position": {"x": 0, "y": 0}, "rotation": 0}]))
+    output = str(tmp_path / 'output.fl')
+    arguments = [output, str(unknown)] if command == 'merge' else [str(unknown), output]
+
+    assert cli.main([command] + arguments) == 2
+    assert "unknown building type or recipe 'Teleporter'" in capsys.readouterr().err
+    assert cli.main([command] + [a.replace('unknown', 'missing') for a in arguments]) == 2
+    assert 'No such file' in capsys.readouterr().err
+
+## ======================================================
+## Blueprints
+## ======================================================
+
+@pytest.fixture
+def blueprint_layout(make_layout, make_blueprint):
+    """Factory for a layout of two connected Smelters and a blueprint placed at (x, y)."""
+    def make(x: float, y: float):
+        layout = make_layout((0, 0), (20, 0), type_name='Smelter')
+        source, target = layout.buildings
+        layout.conveyors.add(Conveyor(source, target, [(x, 0) for x in range(3, 18)]))
+        layout.add_blueprint_instance(BlueprintInstance(make_blueprint(), Position(x, y), Rotation.DEG_0))
+        return layout
+    return make
+
+def test_validate_reports_buildings_overlapping_blueprints(blueprint_layout, tmp_path):
+    file_name = save(blueprint_layout(0, 5), tmp_path / 'overlapping.fl')
+    _, problems = cli.validate_file(file_name)
+    assert problems
+    assert all('blueprint Pair' in problem for problem in problems)
+
+def test_validate_accepts_separate_blueprints(blueprint_layout, tmp_path):
+    file_name = save(blueprint_layout(0, 50), tmp_path / 'separate.fl')
+    assert cli.validate_file(file_name) == (file_name, [])
+
+def test_merge_keeps_blueprints(blueprint_layout, tmp_path):
+    first = save(blueprint_layout(0, 50), tmp_path / 'first.fl')
+    second = save(blueprint_layout(100, 50), tmp_path / 'second.fl')
+    output = str(tmp_path / 'merged.fl')
+    assert cli.main(['merge', output, first, second]) == 0
+
+    merged = cli.load_layout(output)
+    assert len(merged) == 4
+    assert sorted((p.position.x, p.position.y) for p in merged.blueprint_map.values()) == [(0, 50), (100, 50)]
+
+def test_translate_moves_blueprints_and_conveyors(blueprint_layout, tmp_path):
+    file_name = save(blueprint_layout(0, 50), tmp_path / 'layout.fl')
+    output = str(tmp_path / 'moved.fl')
+    assert cli.main(['translate', file_name, output, '--dx', '8', '--dy', '-4']) == 0
+
+    moved = cli.load_layout(output)
+    assert [(b.position.x, b.position.y) for b in moved.buildings] == [(8, -4), (28, -4)]
+    assert [(p.position.x, p.position.y) for p in moved.blueprint_map.values()] == [(8, 46)]
+    assert [c.path for c in moved.conveyors] == [[(x, -4) for x in range(11, 26)]]
@@ -0,0 +1,93 @@
+from model.Conveyor import Conveyor
+from model.ConveyorRouter import ConveyorRouter, port_cells
+from model.FactoryLayout import FactoryLayout
+
+def is_connected(path: list) -> bool:
+    return all(abs(x1 - x2) + abs(y1 - y2) == 1 for (x1, y1), (x2, y2) in zip(path, path[1:]))
+
+def test_route_runs_straight_between_facing_ports(make_layout):
+    layout = make_layout((0, 0), (20, 0))
+    source, target = layout.buildings
+    path = ConveyorRouter(layout).route_buildings(source, target)
+
+    assert path == [(x, 0) for x in range(4, 16)]
+    assert path[0] in port_cells(source) and path[-1] in port_cells(target)
+
+def test_route_goes_around_buildings(make_layout):
+    # A wall of three Constructors between the ports, 30 m wide
+    layout = make_layout((0, 0), (40, 0), (20, -10), (20, 0), (20, 10))
+    source, target = layout.get_building(0), layout.get_building(1)
+    router = ConveyorRouter(layout)
+    path = router.route_buildings(source, target)
+
+    assert path is not None and is_connected(path)
+    assert not any(router.is_blocked(cell) for cell in path)
+    assert min(y for _, y in path) < -15 or max(y for _, y in path) > 15
+
+def test_route_gives_up_beyond_the_search_margin(make_layout):
+    # The wall reaches further than the search margin on both sides of the ports
+    wall = [(20, y) for y in range(-40, 41, 10)]
+    layout = make_layout((0, 0), (40, 0), *wall)
+    router = ConveyorRouter(layout)
+    assert router.route_buildings(layout.get_building(0), layout.get_building(1)) is None
+
+def test_route_gives_up_after_max_expansions(make_layout, monkeypatch):
+    layout = make_layout((0, 0), (200, 0))
+    monkeypatch.setattr(ConveyorRouter, 'MAX_EXPANSIONS', 50)
+    assert ConveyorRouter(layout).route_buildings(*layout.buildings) is None
+
+def test_unroutable_conveyor_is_kept_without_a_path(make_layout):
+    layout = make_layout((0, 0), (40, 0), *[(20, y) for y in range(-40, 41, 10)])
+    conveyor = Conveyor(layout.get_building(0), layout.get_building(1))
+    layout.conveyors.add(conveyor)
+    assert conveyor.path == []
+
+    # It is routed again once one of its buildings changes, here moving past the end of the wall
+    layout.get_building(1).translate(0, 60)
+    assert layout.conveyors.reroute_dirty() == [conveyor]
+    assert conveyor.path and is_connected(conveyor.path)
+
+def test_moving_a_building_reroutes_only_its_conveyors(make_layout):
+    layout = make_layout((0, 0), (20, 0), (0, 40), (20, 40))
+    a, b, c, d = layout.buildings
+    moved, untouched = Conveyor(a, b), Conveyor(c, d)
+    layout.conveyors.add(moved)
+    layout.conveyors.add(untouched)
+    untouched_path = untouched.path
+
+    b.translate(10, 0)
+    assert layout.conveyors.reroute_dirty() == [moved]
+    assert moved.path[-1] in port_cells(b)
+    assert untouched.path is untouched_path
+
+def test_building_placed_on_a_belt_reroutes_it(make_layout, make_building):
+    layout = make_layout((0, 0), (40, 0))
+    conveyor = Conveyor(*layout.buildings)
+    layout.conveyors.add(conveyor)
+
+    layout.add_building(make_building(20, 0, 'Splitter'))
+    assert layout.conveyors.reroute_dirty() == [conveyor]
+    assert (20, 0) not in conveyor.path and is_connected(conveyor.path)
+
+def test_removing_buildings_removes_their_conveyors_with_one_notification(make_layout):
+    layout = make_layout((0, 0), (20, 0), (40, 0), (60, 0))
+    buildings = layout.buildings
+    layout.conveyors.add(Conveyor(buildings[0], buildings[1], [(x, 0) for x in range(4, 16)]))
+    layout.conveyors.add(Conveyor(buildings[1], buildings[2], [(x, 0) for x in range(24, 36)]))
+    notifications = []
+    layout.topology_listeners.append(notifications.append)
+
+    layout.remove_many([buildings[0], buildings[1]])
+
+    # The building at the other end of a removed conveyor is reported along
+    assert notifications == [[buildings[0], buildings[1], buildings[2]]]
+    assert len(layout.conveyors) == 0
+    assert layout.conveyors.cell_conveyors == {}
+
+def test_moved_layout_routes_in_its_new_owner(make_layout):
+    source = make_layout((0, 0), (40, 0))
+    layout = FactoryLayout()
+    layout.replace_contents(source)
+    conveyor = Conveyor(*layout.buildings)
+    layout.conveyors.add(conveyor)
+    assert conveyor.path == [(x, 0) for x in range(4, 36)]
@@ -0,0 +1,84 @@
+import glob
+import json
+import os
+
+import pytest
+
+from model.BuldingInstance import Position
+from model.EditJournal import EditJournal, JournalError
+from model.FactoryLayout import FactoryLayout, type_lookup
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = EditJournal(str(tmp_path / 'journal'))
+    journal.start().result(timeout=10)
+    yield journal
+    journal.close()
+
+def recover(directory: str) -> FactoryLayout:
+    """Recover the layout journaled to a directory, as the next editor started would."""
+    journal = EditJournal(directory)
+    try:
+        return journal.start().result(timeout=10)
+    finally:
+        journal.close()
+
+def test_save_writes_journaled_edits(journal, make_layout, tmp_path):
+    journal.buildings_added(make_layout((10, 20)).buildings)
+    file_name = str(tmp_path / 'saved.fl')
+    journal.save(file_name).result(timeout=10)
+
+    saved = FactoryLayout()
+    saved.load(file_name, type_lookup)
+    assert [b.position for b in saved.buildings] == [Position(10, 20)]
+
+def test_save_fails_after_an_edit_could_not_be_applied(journal, make_building, make_layout, tmp_path):
+    errors = []
+    journal.on_error = errors.append
+    journal.buildings_removed([make_building(0, 0)])
+    journal.buildings_added(make_layout((10, 20)).buildings)
+
+    file_name = tmp_path / 'saved.fl'
+    with pytest.raises(JournalError):
+        journal.save(str(file_name)).result(timeout=10)
+    assert not file_name.exists()
+    assert len(errors) == 1 and isinstance(errors[0], KeyError)
+
+def test_reset_clears_the_error(journal, make_building, make_layout, tmp_path):
+    journal.buildings_removed([make_building(0, 0)])
+    journal.reset().result(timeout=10)
+    journal.buildings_added(make_layout((4, 4)).buildings)
+    journal.save(str(tmp_path / 'saved.fl')).result(timeout=10)
+
+def test_edit_that_could_not_be_applied_is_not_recovered(journal, make_building, make_layout):
+    journal.buildings_added(make_layout((10, 20)).buildings)
+    journal.buildings_removed([make_building(0, 0)])
+    journal.close()
+
+    recovered = recover(journal.directory)
+    assert [b.position for b in recovered.buildings] == [Position(10, 20)]
+
+def test_recovery_stops_at_a_damaged_record(journal, make_building, make_layout):
+    journal.buildings_added(make_layout((10, 20)).buildings)
+    journal.close()
+
+    # Appended as if written by an older editor, the remove does not match the layout
+    segment, = glob.glob(os.path.join(journal.directory, 'journal-*.log'))
+    with open(segment, 'a') as segment_file:
+        for record in ({"op": "add", "buildings": [dict(make_building(30, 20).to_dict(), id=1)], "conveyors": []},
+                       {"op": "remove", "buildings": [7]},
+                       {"op": "add", "buildings": [dict(make_building(50, 20).to_dict(), id=2)], "conveyors": []}):
+            segment_file.write(json.dumps(record) + '\n')
+
+    assert [b.position for b in recover(journal.directory).buildings] == [Position(10, 20), Position(30, 20)]
+    # The recovered layout was compacted, the damaged records are gone
+    assert [b.position for b in recover(journal.directory).buildings] == [Position(10, 20), Position(30, 20)]
+
+def test_directory_is_used_by_one_journal_at_a_time(journal):
+    second = EditJournal(journal.directory)
+    with pytest.raises(JournalError):
+        second.start().result(timeout=10)
+    second.close()
+
+    journal.close()
+    assert len(recover(journal.directory)) == 0
@@ -0,0 +1,118 @@
+import pytest
+
+from model.Blueprint import BlueprintInstance
+from model.BuldingInstance import Position, Rotation
+from model.Conveyor import Conveyor
+from model.FactoryLayout import BINARY_HEADER, BINARY_TYPE_NAME_LENGTH, FactoryLayout, type_lookup
+
+def listen(layout: FactoryLayout) -> list:
+    notifications = []
+    layout.topology_listeners.append(notifications.append)
+    return notifications
+
+def test_add_many_assigns_ids_and_notifies_once(make_building):
+    layout = FactoryLayout()
+    notifications = listen(layout)
+    buildings = [make_building(i * 20, 0) for i in range(5)]
+    layout.add_many(buildings)
+
+    assert notifications == [buildings]
+    assert [b.id for b in buildings] == [0, 1, 2, 3, 4]
+    assert layout.query_point(40, 0) == [buildings[2]]
+
+def test_removed_building_gets_its_id_back(make_layout):
+    layout = make_layout((0, 0), (20, 0))
+    building = layout.get_building(0)
+    layout.remove_building(building)
+    layout.add_building(building)
+
+    assert building.id == 0
+    assert layout.get_building(0) is building
+
+def test_remove_many_notifies_once(make_layout):
+    layout = make_layout((0, 0), (20, 0), (40, 0))
+    buildings = layout.buildings
+    notifications = listen(layout)
+    layout.remove_many(buildings[:2])
+
+    assert notifications == [buildings[:2]]
+    assert layout.buildings == [buildings[2]]
+    assert layout.query_point(0, 0) == [] and layout.query_point(40, 0) == [buildings[2]]
+
+def test_remove_many_checks_every_building_first(make_building):
+    layout = FactoryLayout()
+    buildings = [make_building(0, 0), make_building(20, 0)]
+    layout.add_building(buildings[0])
+    with pytest.raises(ValueError):
+        layout.remove_many(buildings)
+    assert len(layout) == 1
+
+## ======================================================
+## Binary format
+## ======================================================
+
+@pytest.fixture
+def smelter_data(make_building) -> tuple[bytearray, int]:
+    """A binary layout of a single Smelter, and the offset of its building record."""
+    layout = FactoryLayout()
+    layout.add_building(make_building(0, 0, 'Smelter'))
+    # The only building record follows the header and the single type name
+    return bytearray(layout.serialize_binary()), BINARY_HEADER.size + BINARY_TYPE_NAME_LENGTH.size + len('Smelter')
+
+def test_binary_round_trip(make_building):
+    layout = FactoryLayout()
+    layout.add_many([make_building(0.5, -3, 'Smelter', Rotation.DEG_90),
+                     make_building(20, 7.5, 'Foundry', Rotation.DEG_270)])
+    loaded = FactoryLayout()
+    loaded.deserialize_binary(layout.serialize_binary(), type_lookup)
+    assert [(b.type.name, b.position, b.rotation) for b in loaded.buildings] == \
+           [(b.type.name, b.position, b.rotation) for b in layout.buildings]
+
+@pytest.mark.parametrize('field, value', [('rotation', 4), ('type', 7)])
+def test_binary_corrupt_index_raises_value_error(smelter_data, field, value):
+    data, record = smelter_data
+    data[record + (2 if field == 'rotation' else 0)] = value
+    with pytest.raises(ValueError):
+        FactoryLayout().deserialize_binary(bytes(data), type_lookup)
+
+def test_binary_unknown_type_name_raises_value_error(smelter_data):
+    data, record = smelter_data
+    data[record - 1] = ord('x')
+    with pytest.raises(ValueError, match='Smeltex'):
+        FactoryLayout().deserialize_binary(bytes(data), type_lookup)
+
+## ======================================================
+## Blueprints
+## ======================================================
+
+def test_overlaps_finds_placed_blueprints(make_layout, make_blueprint, make_building):
+    layout = make_layout((0, 30))
+    instance = BlueprintInstance(make_blueprint(), Position(0, 0), Rotation.DEG_0)
+    layout.add_blueprint_instance(instance)
+
+    assert layout.overlaps(make_building(5, 4)) == [instance]
+    assert layout.overlaps(make_building(40, 0)) == []
+    assert layout.overlaps(BlueprintInstance(make_blueprint(), Position(0, 26), Rotation.DEG_0)) == [layout.get_building(0)]
+
+def test_add_sublayout_offsets_blueprints(make_layout, make_blueprint):
+    sublayout = make_layout((0, 0))
+    sublayout.add_blueprint_instance(BlueprintInstance(make_blueprint(), Position(0, 30), Rotation.DEG_0))
+    layout = FactoryLayout()
+    layout.add_sublayout(sublayout, 100, 0)
+
+    assert [(b.position.x, b.position.y) for b in layout.buildings] == [(100, 0)]
+    assert [(p.position.x, p.position.y) for p in layout.blueprint_map.values()] == [(100, 30)]
+
+def test_translate_keeps_conveyors_marked_for_rerouting(make_layout):
+    layout = make_layout((0, 0), (20, 0), (0, 40), (20, 40))
+    a, b, c, d = layout.buildings
+    first = Conveyor(a, b, [(x, 0) for x in range(4, 16)])
+    second = Conveyor(c, d, [(x, 40) for x in range(4, 16)])
+    layout.conveyors.add(first)
+    layout.conveyors.add(second)
+    c.translate(0, 2)  # Not rerouted yet
+
+    layout.translate(8, 0)
+    assert layout.conveyors.dirty == {second.id}
+    assert first.path == [(x, 0) for x in range(12, 24)]
+    assert layout.conveyors.reroute_dirty() == [second]
@@ -0,0 +1,52 @@
+import pytest
+
+from model.FactoryLayout import FactoryLayout
+from model.LayoutDiff import diff_layouts, merge_layouts
+
+@pytest.fixture
+def base(make_layout) -> FactoryLayout:
+    return make_layout((0, 0), (20, 0), (40, 0))
+
+def positions(layout: FactoryLayout) -> list[tuple[float, float]]:
+    return sorted((b.position.x, b.position.y) for b in layout.buildings)
+
+def test_diff_describes_a_move(base, copy_layout):
+    new = copy_layout(base)
+    new.buildings[1].translate(0, 10)
+
+    diff = diff_layouts(base, new)
+    assert not diff.added and not diff.removed
+    assert len(diff.changes) == 1 and diff.changes[0].moved and not diff.changes[0].rotated
+    assert diff.describe() == ['~ Constructor at (20, 0) moved (20, 0) -> (20, 10)']
+
+def test_diff_of_equal_layouts_is_empty(base, copy_layout):
+    assert not diff_layouts(base, copy_layout(base))
+
+def test_merge_takes_edits_of_both_sides(base, copy_layout, make_building):
+    ours, theirs = copy_layout(base), copy_layout(base)
+    ours.buildings[0].translate(0, 20)
+    theirs.remove_building(theirs.buildings[2])
+    theirs.add_building(make_building(0, -30, 'Smelter'))
+
+    result = merge_layouts(base, ours, theirs)
+    assert result.conflicts == []
+    assert positions(result.layout) == [(0, -30), (0, 20), (20, 0)]
+
+def test_merge_reports_a_building_changed_on_both_sides_and_keeps_ours(base, copy_layout):
+    ours, theirs = copy_layout(base), copy_layout(base)
+    ours.buildings[1].translate(0, 10)
+    theirs.buildings[1].translate(0, -10)
+
+    result = merge_layouts(base, ours, theirs)
+    assert len(result.conflicts) == 1 and 'changed differently on both sides' in result.conflicts[0]
+    assert positions(result.layout) == [(0, 0), (20, 10), (40, 0)]
+
+def test_merge_reports_an_addition_of_theirs_overlapping_ours(base, copy_layout, make_building):
+    ours, theirs = copy_layout(base), copy_layout(base)
+    ours.add_building(make_building(0, 30))
+    theirs.add_building(make_building(0, 31, 'Smelter'))
+
+    result = merge_layouts(base, ours, theirs)
+    assert len(result.conflicts) == 1 and 'overlaps Constructor' in result.conflicts[0]
+    assert [b.type.name for b in result.layout.buildings].count('Smelter') == 0
+    assert len(result.layout.buildings) == 4
@@ -0,0 +1,53 @@
+import pytest
+
+from model.BuldingInstance import Position, Rotation, to_units, to_meters
+from model.FactoryLayout import FactoryLayout, type_lookup
+
+@pytest.mark.parametrize('meters, units', [(0, 0), (0.3, 1), (0.74, 1), (0.75, 2), (2.25, 5), (-0.25, 0), (-0.3, -1)])
+def test_to_units_snaps_to_the_nearest_half_meter(meters, units):
+    assert to_units(meters) == units
+
+def test_to_meters_keeps_whole_meters_ints():
+    assert to_meters(6) == 3 and isinstance(to_meters(6), int)
+    assert to_meters(-3) == -1.5
+
+def test_repeated_translation_does_not_drift(make_building):
+    building = make_building(0, 0)
+    for _ in range(1000):
+        building.translate(0.5, -1.5)
+    assert building.position == Position(500, -1500)
+    assert building.position.units == (1000, -3000)
+
+@pytest.mark.parametrize('dx, dy', [(0.1, 0), (0, 0.25), (1 / 3, 1)])
+def test_translation_off_the_grid_is_rejected(make_building, dx, dy):
+    building = make_building(10, 20)
+    with pytest.raises(ValueError):
+        building.translate(dx, dy)
+    assert building.position == Position(10, 20)
+
+def test_grid_position_centers_odd_sizes_between_grid_lines(make_building):
+    smelter = make_building(0, 0, 'Smelter')
+    assert (smelter.type.width, smelter.type.length) == (6, 9)
+
+    position = smelter.grid_position(10.3, 7.8)
+    assert position == Position(10, 7.5)
+    smelter.move_to(position.x, position.y)
+    assert smelter.footprint() == (7, 3, 13, 12)
+
+    smelter.rotate_clockwise()
+    position = smelter.grid_position(10.3, 7.8)
+    assert position == Position(10.5, 8)
+    smelter.move_to(position.x, position.y)
+    assert smelter.footprint() == (6, 5, 15, 11)
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_half_meter_positions_survive_a_round_trip(make_building, binary):
+    layout = FactoryLayout()
+    layout.add_many([make_building(10, 7.5, 'Smelter'), make_building(-20.5, 3, 'Smelter', Rotation.DEG_90)])
+
+    loaded = FactoryLayout()
+    if binary:
+        loaded.deserialize_binary(layout.serialize_binary(), type_lookup)
+    else:
+        loaded.deserialize(layout.serialize(), type_lookup)
+    assert [b.position.units for b in loaded.buildings] == [(20, 15), (-41, 6)]
@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import model
+from model.Conveyor import Conveyor
+from model.ProductionSolver import NO_RECIPE, ProductionSolver
+from model.Recipe import recipe_lookup
+
+@pytest.fixture
+def make_chain(make_building):
+    """Factory for a Smelter of Iron Ingots at (x, y) feeding Constructors of Iron Plates through the given buildings."""
+    def make(layout, x: float, y: float, *middle: str, constructors: int = 1) -> list:
+        smelter = make_building(x, y, 'Smelter')
+        smelter.set_recipe(recipe_lookup['Iron Ingot'])
+        buildings = [smelter] + [make_building(x + 20 * (i + 1), y, name) for i, name in enumerate(middle)]
+        end = x + 20 * (len(middle) + 1)
+        targets = [make_building(end, y + 20 * i) for i in range(constructors)]
+        for target in targets:
+            target.set_recipe(recipe_lookup['Iron Plate'])
+        layout.add_many(buildings + targets)
+        for source, target in zip(buildings, buildings[1:]):
+            layout.conveyors.add(Conveyor(source, target))
+        for target in targets:
+            layout.conveyors.add(Conveyor(buildings[-1], target))
+        return buildings + targets
+    return make
+
+def test_chain_runs_at_full_rate(make_layout, make_chain):
+    layout = make_layout()
+    smelter, constructor = make_chain(layout, 0, 0)
+    solver = ProductionSolver(layout)
+    solver.solve()
+
+    assert solver.flow(smelter).utilization == 1 and solver.flow(smelter).limit is None
+    assert solver.flow(constructor).inputs == {'Iron Ingot': 30}
+    assert solver.flow(constructor).outputs == {'Iron Plate': 20}
+    conveyor, = layout.conveyors
+    assert solver.conveyor_flow(conveyor.id).rate == pytest.approx(30)
+    assert solver.bottlenecks() == []
+
+def test_split_input_starves_constructors(make_layout, make_chain):
+    layout = make_layout()
+    smelter, splitter, *constructors = make_chain(layout, 0, 0, 'Splitter', constructors=2)
+    solver = ProductionSolver(layout)
+    solver.solve()
+
+    assert solver.flow(splitter).utilization is None
+    for constructor in constructors:
+        assert solver.flow(constructor).utilization == pytest.approx(0.5)
+        assert solver.flow(constructor).limit == 'input: Iron Ingot'
+    assert set(solver.bottlenecks()) == set(constructors)
+
+def test_building_without_recipe_is_not_a_bottleneck(make_layout):
+    layout = make_layout((0, 0))
+    solver = ProductionSolver(layout)
+    solver.solve()
+
+    flow = solver.flow(layout.get_building(0))
+    assert (flow.utilization, flow.limit) == (0, NO_RECIPE)
+    assert not flow.is_bottleneck
+
+def test_solve_recomputes_only_the_edited_component(make_layout, make_chain):
+    layout = make_layout()
+    first = make_chain(layout, 0, 0)
+    second = make_chain(layout, 0, 40)
+    solver = ProductionSolver(layout)
+    assert solver.solve() == set(first + second)
+    assert solver.solve() == set()
+
+    second[1].set_recipe(recipe_lookup['Iron Rod'])
+    assert solver.solve() == set(second)
+    assert solver.flow(second[1]).outputs == {'Iron Rod': 15}
+    assert solver.flow(first[1]).outputs == {'Iron Plate': 20}
+
+def test_import_does_not_load_numpy():
+    # NumPy is only imported once something is solved, it would slow down the editor's startup
+    code = 'import sys; import model.ProductionSolver; print("numpy" in sys.modules)'
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(model.__file__)))
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=environment)
+    assert result.stdout.strip() == 'False'
@@ -0,0 +1,61 @@
+from model.Selection import Selection
+
+def listen(selection: Selection) -> list:
+    changes = []
+    selection.listeners.append(lambda added, removed: changes.append((added, removed)))
+    return changes
+
+def test_every_operation_reports_its_net_change_once(make_layout):
+    layout = make_layout((0, 0), (20, 0), (40, 0))
+    selection = Selection(layout)
+    changes = listen(selection)
+
+    selection.select([0, 1])
+    selection.replace([1, 2])
+    selection.select([1])  # Already selected, nothing changes
+    assert changes == [({0, 1}, set()), ({2}, {0})]
+
+def test_batch_coalesces_changes(make_layout):
+    layout = make_layout((0, 0), (20, 0), (40, 0))
+    selection = Selection(layout)
+    selection.select([0])
+    changes = listen(selection)
+
+    with selection.batch():
+        selection.select_all()
+        selection.deselect([1])
+        with selection.batch():
+            selection.toggle(0)
+        assert changes == []
+    assert changes == [({2}, {0})]
+    assert selection.buildings() == [layout.get_building(2)]
+
+def test_batch_without_net_change_is_not_reported(make_layout):
+    layout = make_layout((0, 0), (20, 0))
+    selection = Selection(layout)
+    selection.select([0])
+    changes = listen(selection)
+
+    with selection.batch():
+        selection.clear()
+        selection.select([0])
+    assert changes == []
+
+def test_removed_buildings_leave_the_selection(make_layout):
+    layout = make_layout((0, 0), (20, 0), (40, 0))
+    selection = Selection(layout)
+    selection.select_all()
+    changes = listen(selection)
+
+    layout.remove_many([layout.get_building(0), layout.get_building(1)])
+    assert changes == [(set(), {0, 1})]
+    assert list(selection) == [2]
+
+def test_select_rect_uses_the_overlapping_buildings(make_layout):
+    layout = make_layout((0, 0), (20, 0), (40, 0))
+    selection = Selection(layout)
+    selection.select_rect((15, -5, 45, 5))
+    assert sorted(selection) == [1, 2]
+
+    selection.select_rect((-5, -5, 5, 5), add=True)
+    assert len(selection) == 3